@@ -1,15 +1,21 @@
 from .getters import (
     get_broker_url,
+    get_checkers_config,
     get_db_config,
+    get_db_pool_config,
     get_celery_config,
+    get_receiver_config,
     get_redis_config,
     get_web_credentials,
 )
 
 __all__ = (
     'get_broker_url',
+    'get_checkers_config',
     'get_db_config',
+    'get_db_pool_config',
     'get_celery_config',
+    'get_receiver_config',
     'get_redis_config',
     'get_web_credentials',
 )
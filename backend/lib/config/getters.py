@@ -16,6 +16,18 @@ def get_db_config() -> models.Database:
     return models.Database()
 
 
+def get_db_pool_config() -> models.DatabasePool:
+    return models.DatabasePool()
+
+
+def get_checkers_config() -> models.Checkers:
+    return models.Checkers()
+
+
+def get_receiver_config() -> models.Receiver:
+    return models.Receiver()
+
+
 def get_broker_url() -> str:
     """Get broker url for RabbitMQ from config."""
     host = os.environ['RABBITMQ_HOST']
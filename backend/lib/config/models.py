@@ -34,6 +34,45 @@ class Database(BaseSettings):
     dbname: str = Field(validation_alias='postgres_db')
 
 
+class DatabasePool(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix='postgres_')
+
+    # connection pool of each process
+    pool_min_size: int = 5
+    pool_max_size: int = 20
+    pool_timeout: float = 30
+    # connected through a transaction pooler (e.g. PgBouncer), so each
+    # transaction can run in a different session, without prepared statements
+    transaction_pooling: bool = False
+
+
+class Checkers(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix='checkers_')
+
+    # checker processes of all worker threads are run by one asyncio loop
+    async_executor: bool = False
+    # all actions of a team's task in a round are run by a single celery job
+    single_round_job: bool = False
+    # actions report verdicts to the round's stream instead of the result backend
+    stream_verdicts: bool = False
+
+
+class Receiver(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix='receiver_')
+
+    # process-local cache of the submitted flags lookups, as most submissions
+    # are the same flags resubmitted by many teams
+    flag_cache_size: int = 100000
+    flag_cache_ttl: float = 60
+    # unknown flags are cached for less time, as they can be generated later
+    flag_cache_negative_ttl: float = 5
+    # false positive rate of the live flags filter, 0 disables it
+    flags_filter_error_rate: float = Field(
+        0.001,
+        validation_alias='flags_filter_error_rate',
+    )
+
+
 class Celery(BaseModel):
     broker_url: str
     result_backend: str
@@ -1,9 +1,11 @@
 from .judge import Judge
+from .live_filter import LiveFlagsFilter
 from .notifier import Notifier
 from .submit_monitor import SubmitMonitor
 
 __all__ = (
     'Judge',
+    'LiveFlagsFilter',
     'SubmitMonitor',
     'Notifier',
 )
@@ -1,38 +1,60 @@
-from typing import List
+from typing import List, Optional
 
 import eventlet
 
 from lib import storage
+from lib.helpers.cache import LocalCache
 from lib.models import AttackResult
+from .live_filter import LiveFlagsFilter
 from .notifier import Notifier
 from .submit_monitor import SubmitMonitor
 
 
 class Judge:
-    def __init__(self, monitor: SubmitMonitor, logger):
+    def __init__(
+            self,
+            monitor: SubmitMonitor,
+            logger,
+            flag_cache: Optional[LocalCache] = None,
+            flags_filter: Optional[LiveFlagsFilter] = None,
+    ):
         self._monitor = monitor
+        self._flag_cache = flag_cache
+        self._flags_filter = flags_filter
         self._notifier = Notifier(logger=logger)
         eventlet.spawn_n(self._monitor)
         eventlet.spawn_n(self._notifier)
+        if self._flags_filter is not None:
+            eventlet.spawn_n(self._flags_filter.run)
 
-    def _process_attack(self, team_id: int, flag: str) -> AttackResult:
-        current_round = storage.game.get_real_round()
-        ar = storage.attacks.handle_attack(
-            attacker_id=team_id,
-            flag_str=flag,
-            current_round=current_round,
-        )
-
+    def _register(self, ar: AttackResult) -> None:
         if ar.submit_ok:
             self._notifier.add(ar)
             self._monitor.inc_ok()
         else:
             self._monitor.inc_bad()
 
-        return ar
-
     def process(self, team_id: int, flag: str) -> AttackResult:
-        return self._process_attack(team_id, flag)
+        ar, = self.process_many(team_id, [flag])
+        return ar
 
     def process_many(self, team_id: int, flags: List[str]) -> List[AttackResult]:
-        return [self._process_attack(team_id, flag) for flag in flags]
+        current_round = storage.game.get_real_round()
+        rejected: List[Optional[AttackResult]] = [None] * len(flags)
+        if self._flags_filter is not None:
+            rejected, flags = self._flags_filter.reject_unknown(
+                attacker_id=team_id,
+                flag_strs=flags,
+                current_round=current_round,
+            )
+
+        checked = iter(storage.attacks.handle_attacks(
+            attacker_id=team_id,
+            flag_strs=flags,
+            current_round=current_round,
+            local_cache=self._flag_cache,
+        ))
+        results = [ar if ar is not None else next(checked) for ar in rejected]
+        for ar in results:
+            self._register(ar)
+        return results
@@ -0,0 +1,181 @@
+import itertools
+import threading
+import time
+from logging import Logger
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lib import models, storage
+from lib.helpers.bloom import BloomFilter
+from lib.helpers.exceptions import FlagExceptionEnum
+from lib.storage.keys import CacheKeys
+
+# per-round filters are sized for the flags of a round, but at least for that many
+MIN_ROUND_CAPACITY = 1000
+
+
+class LiveFlagsFilter:
+    """
+    Per-process probabilistic filter of the flags of the last "flag_lifetime" rounds.
+
+    Keeps a bloom filter per round, loaded from the database and then
+    appended to with the flags published by "storage.flags.add_flag".
+    Filters of expired rounds are dropped, so memory stays bounded.
+    Flags missing from the filter are surely invalid, so they can be rejected
+    without any storage lookups. Until the filter is loaded (or after
+    the feed is lost), all flags pass it.
+
+    "error_rate" is the false positive rate of all live rounds together.
+    """
+
+    def __init__(self, logger: Logger, error_rate: float = 0.001):
+        self._logger = logger
+        self._error_rate = error_rate
+        self._filters: Dict[int, BloomFilter] = {}
+        self._capacity = MIN_ROUND_CAPACITY
+        self._flag_lifetime = 0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bloom.nbytes for bloom in list(self._filters.values()))
+
+    def load(self) -> None:
+        """
+        Fill the filter with the flags of the last "flag_lifetime" rounds.
+
+        Subscribe to the feed before loading and apply it after,
+        so that the flags added meanwhile are not missed.
+        """
+        game_config = storage.game.get_current_game_config()
+        flags_per_round = len(storage.teams.get_teams()) * sum(
+            task.puts for task in storage.tasks.get_tasks()
+        )
+        batches = storage.flags.iter_live_flags(
+            current_round=storage.game.get_real_round(),
+            flag_lifetime=game_config.flag_lifetime,
+        )
+        self.load_flags(
+            flags=itertools.chain.from_iterable(batches),
+            capacity=flags_per_round,
+            flag_lifetime=game_config.flag_lifetime,
+        )
+        self._logger.info('Live flags filter loaded, %d bytes', self.nbytes)
+
+    def load_flags(
+            self,
+            flags: Iterable[Tuple[str, int]],
+            capacity: int,
+            flag_lifetime: int,
+    ) -> None:
+        """
+        Replace the filter contents with the flags passed.
+
+        :param flags: iterable of (flag, round) tuples
+        :param capacity: expected number of flags in a round
+        :param flag_lifetime: flag lifetime from game config
+        """
+        self._ready = False
+        with self._lock:
+            self._filters = {}
+            self._capacity = max(capacity, MIN_ROUND_CAPACITY)
+            self._flag_lifetime = flag_lifetime
+
+        for flag_str, flag_round in flags:
+            self.add(flag_round, flag_str)
+        self._ready = True
+
+    def invalidate(self) -> None:
+        """Let all flags pass until the filter is loaded again."""
+        self._ready = False
+
+    def add(self, flag_round: int, flag_str: str) -> None:
+        with self._lock:
+            bloom = self._filters.get(flag_round)
+            if bloom is None:
+                error_rate = self._error_rate / (self._flag_lifetime + 1)
+                bloom = BloomFilter(capacity=self._capacity, error_rate=error_rate)
+                self._filters[flag_round] = bloom
+                for old_round in list(self._filters):
+                    if old_round < flag_round - self._flag_lifetime:
+                        del self._filters[old_round]
+            bloom.add(flag_str)
+
+    def add_published(self, data: str) -> None:
+        """Add the flag from the "storage.flags.add_flag" message."""
+        flag_round, flag_str = data.split(':', 1)
+        self.add(int(flag_round), flag_str)
+
+    def contains_many(self, flag_strs: List[str], current_round: int) -> List[bool]:
+        """Check which flags might be live, all do if the filter isn't ready."""
+        if not self._ready:
+            return [True] * len(flag_strs)
+
+        min_round = current_round - self._flag_lifetime
+        with self._lock:
+            blooms = [
+                bloom for flag_round, bloom in self._filters.items()
+                if min_round <= flag_round <= current_round
+            ]
+        if not blooms:
+            return [False] * len(flag_strs)
+
+        # all round filters are of the same size, so flags are hashed once
+        result = []
+        for flag_str in flag_strs:
+            positions = blooms[0].positions(flag_str)
+            result.append(any(bloom.contains_positions(positions) for bloom in blooms))
+        return result
+
+    def reject_unknown(
+            self,
+            attacker_id: int,
+            flag_strs: List[str],
+            current_round: int,
+    ) -> Tuple[List[Optional[models.AttackResult]], List[str]]:
+        """
+        Reject the flags missing from the filter.
+
+        :returns: results with None in place of the flags left to check,
+                  and the list of these flags
+        """
+        if current_round == -1:
+            return [None] * len(flag_strs), flag_strs
+
+        # submitted values aren't always strings (e.g. elements of a JSON list)
+        valid = [flag_str for flag_str in flag_strs if isinstance(flag_str, str)]
+        live_flags = iter(self.contains_many(valid, current_round))
+
+        results: List[Optional[models.AttackResult]] = []
+        left = []
+        for flag_str in flag_strs:
+            if isinstance(flag_str, str) and next(live_flags):
+                results.append(None)
+                left.append(flag_str)
+            else:
+                ar = models.AttackResult(attacker_id=attacker_id)
+                ar.message = str(FlagExceptionEnum.FLAG_INVALID)
+                results.append(ar)
+        return results, left
+
+    def run(self) -> None:
+        """Load the filter and keep it fed, reloading after errors."""
+        while True:
+            try:
+                pubsub = storage.utils.RedisStorage.get().pubsub()
+                pubsub.subscribe(CacheKeys.new_flags())
+                messages = pubsub.listen()
+                # subscription is confirmed, so no new flags are missed
+                next(messages)
+                self.load()
+                for message in messages:
+                    if message['type'] == 'message':
+                        self.add_published(message['data'])
+            except Exception as e:
+                self.invalidate()
+                self._logger.error('Error in live flags filter: %s', str(e))
+                time.sleep(1)
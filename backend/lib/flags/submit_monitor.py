@@ -26,7 +26,7 @@ class SubmitMonitor:
     def inc_requests(self) -> None:
         self._requests += 1
 
-    def _process_statistics(self) -> None:
+    def report_statistics(self) -> None:
         new_ok, new_bad = self._ok_submits, self._bad_submits
         new_requests = self._requests
         self._logger.info(
@@ -43,7 +43,7 @@ class SubmitMonitor:
     def __call__(self) -> None:
         while True:
             try:
-                self._process_statistics()
+                self.report_statistics()
             except Exception as e:
                 self._logger.error("Error in monitoring: %s", str(e))
             eventlet.sleep(self._interval)
@@ -1,15 +1,19 @@
 from . import (
-    cache, checkers, commands,
-    events, exceptions, jobs,
+    async_commands, bloom, cache, checker_pool, checkers, commands,
+    events, exceptions, jobs, module_checkers,
     singleton,
 )
 
 __all__ = (
+    'async_commands',
+    'bloom',
     'cache',
+    'checker_pool',
     'checkers',
     'commands',
     'events',
     'exceptions',
     'jobs',
+    'module_checkers',
     'singleton',
 )
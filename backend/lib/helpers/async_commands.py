@@ -0,0 +1,125 @@
+import asyncio
+import subprocess
+import threading
+from typing import Any, AnyStr, List, Optional, Tuple
+
+from lib.helpers.singleton import Singleton
+
+
+def _signal(proc: asyncio.subprocess.Process, kill: bool) -> None:
+    try:
+        if kill:
+            proc.kill()
+        else:
+            proc.terminate()
+    except ProcessLookupError:
+        # exited meanwhile
+        pass
+
+
+async def run_command_gracefully_async(
+        command: List[str],
+        input: Optional[AnyStr] = None,
+        timeout: float = 0,
+        terminate_timeout: float = 3,
+        **kwargs: Any,
+) -> Tuple[subprocess.CompletedProcess, bool]:
+    """
+    Asyncio version of "run_command_gracefully" with captured output.
+
+    First sends SIGTERM, waits for "terminate_timeout" seconds and if
+    the timeout occurs the second time, sends SIGKILL.
+
+    :param command: command to run
+    :param input: data to be sent to the process stdin
+    :param timeout: "soft" timeout, after which the SIGTERM is sent
+    :param terminate_timeout: the "hard" timeout to wait after the SIGTERM
+    :raises subprocess.TimeoutExpired: if the process timed out
+    :return: tuple of CompletedProcess instance and "killed" boolean
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=subprocess.PIPE if input is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **kwargs,
+    )
+    communicate = asyncio.ensure_future(proc.communicate(input))
+
+    killed = False
+    try:
+        stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), timeout)
+    except asyncio.TimeoutError as timeout_exc:
+        _signal(proc, kill=False)
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                asyncio.shield(communicate),
+                terminate_timeout,
+            )
+        except asyncio.TimeoutError:
+            _signal(proc, kill=True)
+            killed = True
+            stdout, stderr = await communicate
+        except BaseException:
+            _signal(proc, kill=True)
+            raise
+
+        raise subprocess.TimeoutExpired(
+            command,
+            timeout=timeout,
+            output=stdout,
+            stderr=stderr,
+        ) from timeout_exc
+    except BaseException:
+        _signal(proc, kill=True)
+        raise
+
+    res_proc: subprocess.CompletedProcess = subprocess.CompletedProcess(
+        args=command,
+        returncode=proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+    )
+    return res_proc, killed
+
+
+class AsyncCommandExecutor:
+    """
+    Event loop running the commands of all threads of the process.
+
+    Celery worker threads (with "threads" pool) only wait for the results,
+    while all processes are driven by a single asyncio loop
+    in a background thread, so hundreds of checkers can run at once
+    without a worker process (or a busy thread) each.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(
+            self,
+            command: List[str],
+            timeout: float,
+            terminate_timeout: float = 3,
+            **kwargs: Any,
+    ) -> Tuple[subprocess.CompletedProcess, bool]:
+        """Run the command in the loop, see "run_command_gracefully_async"."""
+        future = asyncio.run_coroutine_threadsafe(
+            run_command_gracefully_async(
+                command,
+                timeout=timeout,
+                terminate_timeout=terminate_timeout,
+                **kwargs,
+            ),
+            self._loop,
+        )
+        return future.result()
+
+
+class AsyncExecutor(Singleton[AsyncCommandExecutor]):
+
+    @staticmethod
+    def create() -> AsyncCommandExecutor:
+        return AsyncCommandExecutor()
@@ -0,0 +1,57 @@
+import hashlib
+import math
+from typing import List
+
+
+class BloomFilter:
+    """
+    Set of strings with no false negatives and a bounded false positive rate.
+
+    Sized for "capacity" items at "error_rate", the rate grows slowly if
+    more items are added. Positions are derived from a single blake2b digest
+    by double hashing. Lookups don't yield, additions should be serialized
+    by the caller if done from multiple threads.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(64, math.ceil(bits))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_positions(self.positions(item))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self.positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains_positions(self, positions: List[int]) -> bool:
+        """
+        Check the item by its positions, see "positions".
+
+        Filters of the same size and number of hashes share positions,
+        so the item can be hashed once to check it in all of them.
+        """
+        bits = self._bits
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
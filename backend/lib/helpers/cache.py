@@ -1,45 +1,104 @@
+import threading
 import time
-from typing import Callable, Optional, Iterable, Any, Dict
+from collections import OrderedDict
+from typing import Callable, Optional, Any, Tuple
 
-import redis
 
-ArgsType = Optional[Iterable[Any]]
-KwargsType = Optional[Dict[str, Any]]
+class LocalCache:
+    """
+    Per-process LRU cache with expiring entries.
 
+    None values are cached as negative results with a separate (short) ttl.
+    Operations don't yield, so it's safe to share between green threads
+    of a single process, but not between OS threads.
+    """
 
-def cache_helper(
-        pipeline: redis.client.Pipeline,
-        cache_key: str,
-        cache_func: Callable[..., Any],
-        cache_args: ArgsType = None,
-        cache_kwargs: KwargsType = None,
-):
-    if cache_args is None:
-        cache_args = tuple()
-    if cache_kwargs is None:
-        cache_kwargs = {}
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._data: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
 
-    # FIXME: there's a possible race condition in caching
-    # if cache is reset at the moment the round is updated,
-    # we could override the correct cache state with the state
-    # of the previous round if caching is started earlier
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
 
-    was_changed = False
-    while True:
-        try:
-            pipeline.watch(cache_key)
-            cached = pipeline.exists(cache_key)
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Get value from cache.
 
-            pipeline.multi()
+        :returns: tuple (found, value), value is None for negative results
+        """
+        try:
+            expires, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
 
-            if not cached:
-                was_changed = True
-                cache_func(*cache_args, **cache_kwargs)
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return False, None
 
-            pipeline.execute()
-        except redis.WatchError:
-            time.sleep(0.05)
+        self._data.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
         else:
-            break
+            self.hits += 1
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Put value to cache, evicting the least recently used entries.
+
+        :param ttl: entry lifetime in seconds, cache default if not specified
+        """
+        if value is None:
+            ttl = self._negative_ttl
+        elif ttl is None:
+            ttl = self._ttl
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class InvalidatedValue:
+    """
+    Value loaded once and kept in process memory until invalidated.
+
+    Values loaded concurrently with an invalidation are not stored,
+    so a stale value can't outlive the invalidation that should drop it.
+    """
+
+    def __init__(self, load: Callable[[], Any]):
+        self._load = load
+        self._value: Any = None
+        self._loaded = False
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._value
+
+        generation = self._generation
+        value = self._load()
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._loaded = True
+        return value
 
-    return was_changed
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+            self._value = None
@@ -0,0 +1,213 @@
+import base64
+import json
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib.helpers.singleton import Singleton
+
+WARM_CHECKER_SERVER_PATH = str(Path(__file__).resolve().parent / 'warm_checker.py')
+
+
+class WarmCheckerError(Exception):
+    """Warm checker server failed, it shouldn't be used anymore."""
+
+
+class WarmChecker:
+    """
+    Long-lived server running actions of a single python checker.
+
+    The server (see "warm_checker.py") is started with "python3" from
+    the checker's environment ("env_path" is prepended to PATH, as for
+    the checker processes) and imports the checker's modules once,
+    then forks a process for each action. Like "run_command_gracefully",
+    the action process gets SIGTERM on timeout, then SIGKILL if it's
+    still running after "terminate_timeout".
+    """
+
+    def __init__(self, checker: str, env_path: str):
+        self.checker = checker
+        self.env_path = env_path
+
+        env = os.environ.copy()
+        env['PATH'] = f"{env_path}:{env['PATH']}"
+        self._proc = subprocess.Popen(
+            ['python3', WARM_CHECKER_SERVER_PATH, checker],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+        )
+        self._buffer = b''
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def close(self) -> None:
+        if self.alive:
+            self._proc.kill()
+        self._proc.wait()
+        self._proc.stdin.close()
+        self._proc.stdout.close()
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        try:
+            self._proc.stdin.write(json.dumps(message).encode() + b'\n')
+            self._proc.stdin.flush()
+        except OSError as e:
+            raise WarmCheckerError(f'Warm checker server is gone: {e}') from e
+
+    def _receive(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Read a message, or return None if it didn't arrive in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        fd = self._proc.stdout.fileno()
+        while b'\n' not in self._buffer:
+            wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([fd], [], [], wait)
+            if not ready:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WarmCheckerError(
+                    f'Warm checker server exited with code {self._proc.wait()}',
+                )
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    @staticmethod
+    def _signal(pid: Optional[int], sig: int) -> None:
+        # no pid if the checker failed to load, the process could've exited
+        if pid is None:
+            return
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def run(
+            self,
+            args: List[str],
+            timeout: float,
+            terminate_timeout: float = 3,
+    ) -> Tuple[subprocess.CompletedProcess, bool]:
+        """
+        Run the checker with the arguments, like "run_command_gracefully".
+
+        :raises subprocess.TimeoutExpired: if the action timed out
+        :raises WarmCheckerError: if the server failed
+        :return: tuple of CompletedProcess instance and "killed" boolean
+        """
+        start = time.monotonic()
+        self._send({'args': args})
+        started = self._receive()
+        assert started is not None
+        pid = started['pid']
+
+        timed_out = killed = False
+        result = self._receive(max(timeout - (time.monotonic() - start), 0))
+        if result is None:
+            timed_out = True
+            self._signal(pid, signal.SIGTERM)
+            result = self._receive(terminate_timeout)
+        if result is None:
+            killed = True
+            self._signal(pid, signal.SIGKILL)
+            result = self._receive()
+        assert result is not None
+
+        command = [self.checker, *args]
+        stdout = base64.b64decode(result['stdout'])
+        stderr = base64.b64decode(result['stderr'])
+        if timed_out:
+            raise subprocess.TimeoutExpired(
+                command,
+                timeout=timeout,
+                output=stdout,
+                stderr=stderr,
+            )
+
+        res_proc: subprocess.CompletedProcess = subprocess.CompletedProcess(
+            args=command,
+            returncode=result['returncode'],
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return res_proc, killed
+
+
+class CheckerPool:
+    """
+    Process-local pool of warm checker servers by checker & environment.
+
+    Servers are started on first use (or with "warm_up") and reused
+    for the following actions, one action at a time each, so concurrent
+    actions of the same checker get servers of their own.
+    """
+
+    def __init__(self):
+        self._idle: Dict[Tuple[str, str], List[WarmChecker]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _take(self, checker: str, env_path: str) -> WarmChecker:
+        key = (checker, env_path)
+        with self._lock:
+            servers = self._idle[key]
+            while servers:
+                server = servers.pop()
+                if server.alive:
+                    return server
+                server.close()
+        return WarmChecker(checker, env_path)
+
+    def _put(self, server: WarmChecker) -> None:
+        with self._lock:
+            self._idle[(server.checker, server.env_path)].append(server)
+
+    def warm_up(self, checker: str, env_path: str) -> None:
+        """Start a server for the checker, if there's no idle one."""
+        self._put(self._take(checker, env_path))
+
+    def run(
+            self,
+            command: List[str],
+            timeout: float,
+            env_path: str,
+            terminate_timeout: float = 3,
+    ) -> Tuple[subprocess.CompletedProcess, bool]:
+        """
+        Run checker command on a warm server, like "run_command_gracefully".
+
+        :param command: checker path & action arguments
+        :param timeout: "soft" timeout, after which the SIGTERM is sent
+        :param env_path: path to be inserted to the checker's environment
+        :param terminate_timeout: the "hard" timeout to wait after the SIGTERM
+        :return: tuple of CompletedProcess instance and "killed" boolean
+        """
+        checker, *args = command
+        server = self._take(checker, env_path)
+        try:
+            result = server.run(args, timeout, terminate_timeout)
+        except subprocess.TimeoutExpired:
+            self._put(server)
+            raise
+        except BaseException:
+            server.close()
+            raise
+
+        self._put(server)
+        return result
+
+
+class WarmCheckerPool(Singleton[CheckerPool]):
+
+    @staticmethod
+    def create() -> CheckerPool:
+        return CheckerPool()
@@ -4,7 +4,10 @@ import subprocess
 from logging import Logger
 from typing import List, Any, AnyStr, Optional, Tuple, Dict
 
-from lib import models
+from lib import config, models
+from lib.helpers.async_commands import AsyncExecutor
+from lib.helpers.checker_pool import WarmCheckerPool
+from lib.helpers.module_checkers import ModuleCheckersCache
 from lib.models import TaskStatus, Action
 
 
@@ -120,6 +123,9 @@ def run_generic_command(
         logger: Logger,
 ) -> models.CheckerVerdict:
     """Runs generic checker command, calls "run_command_gracefully"
+        (or its asyncio version if the async executor is enabled,
+        runs it on a warm checker server for "warm" checkers,
+        or calls it in-process for "module" checkers)
         and handles exceptions
 
     :param command: command to run
@@ -129,15 +135,31 @@ def run_generic_command(
     :param logger: logger instance
     :return: models.CheckerVerdict instance
     """
-    env = get_patched_environ(env_path=task.env_path)
-
     try:
-        result, killed = run_command_gracefully(
-            command,
-            capture_output=True,
-            timeout=task.checker_timeout,
-            env=env,
-        )
+        if task.checker_is_module:
+            result, killed = ModuleCheckersCache.get().run(
+                command,
+                timeout=task.checker_timeout,
+            )
+        elif task.checker_is_warm:
+            result, killed = WarmCheckerPool.get().run(
+                command,
+                timeout=task.checker_timeout,
+                env_path=task.env_path,
+            )
+        elif config.get_checkers_config().async_executor:
+            result, killed = AsyncExecutor.get().run(
+                command,
+                timeout=task.checker_timeout,
+                env=get_patched_environ(env_path=task.env_path),
+            )
+        else:
+            result, killed = run_command_gracefully(
+                command,
+                capture_output=True,
+                timeout=task.checker_timeout,
+                env=get_patched_environ(env_path=task.env_path),
+            )
 
         if killed:
             logger.warning(
@@ -9,3 +9,4 @@ class FlagExceptionEnum:
     FLAG_YOUR_OWN = FlagSubmitException('Flag is your own')
     FLAG_ALREADY_STOLEN = FlagSubmitException('Flag already stolen')
     SERVICE_IS_DOWN = FlagSubmitException('Cannot submit flags while service is down')
+    RATE_LIMITED = FlagSubmitException('Flag submission rate limit exceeded')
@@ -3,6 +3,7 @@ class JobNames:
     put_action = 'actions.put'
     get_action = 'actions.get'
     noop_action = 'actions.noop'
+    round_action = 'actions.round'
 
     result_handler = 'handlers.result'
     error_handler = 'handlers.error'
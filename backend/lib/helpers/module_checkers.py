@@ -0,0 +1,192 @@
+import ctypes
+import hashlib
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import threading
+import traceback
+from types import ModuleType
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from lib.helpers.singleton import Singleton
+
+
+class CheckerTimeout(BaseException):
+    """Raised in the checker thread on timeout, like SIGTERM for processes."""
+
+
+class _CapturingStream(io.TextIOBase):
+    """Standard stream writing to the buffer of the current thread, if any."""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def buffer(self) -> Any:
+        return self._stream.buffer
+
+    def capture(self, buffer: Optional[io.StringIO]) -> None:
+        self._local.buffer = buffer
+
+    def write(self, data: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            return self._stream.write(data)
+        return buffer.write(data)
+
+    def flush(self) -> None:
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+
+class ModuleCheckers:
+    """
+    Process-local cache of python checkers imported as modules.
+
+    The checker file is imported once (and again if it changes), then its
+    "check", "put" and "get" functions are called with the same arguments
+    as the command line actions in a separate thread. They either exit
+    with the status like the script does (e.g. checklib's "cquit"),
+    or return it. Messages are taken from the output printed in that
+    thread, exceptions end up in stderr with return code 1, so the results
+    are mapped to verdicts exactly like for the checker processes.
+
+    Threads can't be killed, so on timeout CheckerTimeout exception is
+    raised in the thread (as SIGTERM), and if it's still running after
+    "terminate_timeout" (e.g. blocked in a system call), it's abandoned.
+    """
+
+    def __init__(self):
+        self._modules: Dict[str, Tuple[float, ModuleType]] = {}
+        self._lock = threading.Lock()
+        self._stdout = self._stderr = None
+
+    def _install_streams(self) -> Tuple[_CapturingStream, _CapturingStream]:
+        with self._lock:
+            if self._stdout is None:
+                self._stdout = sys.stdout = _CapturingStream(sys.stdout)
+                self._stderr = sys.stderr = _CapturingStream(sys.stderr)
+        return self._stdout, self._stderr
+
+    def load(self, checker: str) -> ModuleType:
+        path = os.path.abspath(checker)
+        mtime = os.stat(path).st_mtime
+        with self._lock:
+            cached = self._modules.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            checker_dir = os.path.dirname(path)
+            if checker_dir not in sys.path:
+                sys.path.insert(0, checker_dir)
+
+            name = f'checker_{hashlib.md5(path.encode()).hexdigest()}'
+            spec = importlib.util.spec_from_file_location(name, path)
+            assert spec is not None and spec.loader is not None
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._modules[path] = (mtime, module)
+            return module
+
+    def _call(
+            self,
+            module: ModuleType,
+            action: str,
+            args: List[str],
+            streams: Tuple[_CapturingStream, _CapturingStream],
+            output: Tuple[io.StringIO, io.StringIO],
+            result: Dict[str, int],
+    ) -> None:
+        for stream, buffer in zip(streams, output):
+            stream.capture(buffer)
+
+        try:
+            code = getattr(module, action)(*args)
+        except SystemExit as e:
+            code = e.code
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+
+        if code is None:
+            code = 0
+        elif not isinstance(code, int):
+            print(code, file=sys.stderr)
+            code = 1
+
+        result['returncode'] = code
+        for stream in streams:
+            stream.capture(None)
+
+    def run(
+            self,
+            command: List[str],
+            timeout: float,
+            terminate_timeout: float = 3,
+    ) -> Tuple[subprocess.CompletedProcess, bool]:
+        """
+        Run checker command in a thread, like "run_command_gracefully".
+
+        :param command: checker path, action & its arguments
+        :param timeout: "soft" timeout, after which CheckerTimeout is raised
+        :param terminate_timeout: the "hard" timeout to wait after it
+        :raises subprocess.TimeoutExpired: if the action timed out
+        :return: tuple of CompletedProcess instance and "killed" boolean
+                 (always False, as the timed out actions raise)
+        """
+        checker, action, *args = command
+        streams = self._install_streams()
+        output = (io.StringIO(), io.StringIO())
+        result: Dict[str, int] = {}
+
+        try:
+            module = self.load(checker)
+        except BaseException:
+            module = None
+            output[1].write(traceback.format_exc())
+            result['returncode'] = 1
+
+        if module is not None:
+            thread = threading.Thread(
+                target=self._call,
+                args=(module, action, args, streams, output, result),
+                daemon=True,
+            )
+            thread.start()
+            thread.join(timeout)
+
+        timed_out = module is not None and thread.is_alive()
+        if timed_out:
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                ctypes.c_ulong(thread.ident),
+                ctypes.py_object(CheckerTimeout),
+            )
+            thread.join(terminate_timeout)
+
+        stdout = output[0].getvalue().encode()
+        stderr = output[1].getvalue().encode()
+        if timed_out:
+            raise subprocess.TimeoutExpired(
+                command,
+                timeout=timeout,
+                output=stdout,
+                stderr=stderr,
+            )
+
+        res_proc: subprocess.CompletedProcess = subprocess.CompletedProcess(
+            args=command,
+            returncode=result['returncode'],
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return res_proc, False
+
+
+class ModuleCheckersCache(Singleton[ModuleCheckers]):
+
+    @staticmethod
+    def create() -> ModuleCheckers:
+        return ModuleCheckers()
@@ -0,0 +1,175 @@
+"""
+Warm checker server for the checkers with "warm" tag.
+
+Run by the celery workers with the checker's interpreter
+(so it must only use the standard library):
+
+    python3 warm_checker.py /checkers/task/checker.py
+
+Imports the modules the checker imports at the top level once, then
+for each action read from stdin forks a child running the checker as
+"__main__" with the action arguments, so the interpreter startup and the
+imports are paid once per server instead of once per action.
+
+Protocol: one JSON object per line. For {"args": [...]} request the server
+replies {"pid": ...} with the pid of the child as soon as it's forked
+(so the caller can terminate it on timeout), then
+{"returncode": ..., "stdout": ..., "stderr": ...} (outputs base64-encoded)
+when it exits. Return code is negative signal number if the child was killed.
+"""
+
+import ast
+import atexit
+import base64
+import builtins
+import importlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import traceback
+
+# larger outputs are truncated, verdicts only use their beginning anyway
+MAX_OUTPUT_SIZE = 1024 * 1024
+
+
+def get_top_level_imports(tree):
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            modules.append(node.module)
+    return modules
+
+
+class Checker:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.mtime = None
+        self.code = None
+
+    def load(self):
+        """(Re)compile the checker if it changed and import its modules."""
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self.mtime:
+            return
+
+        with open(self.path, 'rb') as f:
+            source = f.read()
+        tree = ast.parse(source, self.path)
+        for module in get_top_level_imports(tree):
+            try:
+                importlib.import_module(module)
+            except (Exception, SystemExit):
+                # the checker will fail the same way in the child
+                pass
+        self.code = compile(tree, self.path, 'exec')
+        self.mtime = mtime
+
+    def run(self, args):
+        """Run the checker in the current (child) process and exit."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        sys.argv = [self.path, *args]
+
+        code = 0
+        try:
+            exec(self.code, {
+                '__name__': '__main__',
+                '__file__': self.path,
+                '__builtins__': builtins,
+            })
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+
+        try:
+            atexit._run_exitfuncs()
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def read_output(f):
+    f.seek(0)
+    return base64.b64encode(f.read(MAX_OUTPUT_SIZE)).decode()
+
+
+def serve(checker, requests, responses):
+    def send(message):
+        responses.write(json.dumps(message).encode() + b'\n')
+        responses.flush()
+
+    for line in requests:
+        request = json.loads(line)
+        try:
+            checker.load()
+        except Exception:
+            # reported as the checker failing to start
+            send({'pid': None})
+            error = traceback.format_exc().encode()
+            send({
+                'returncode': 1,
+                'stdout': '',
+                'stderr': base64.b64encode(error[:MAX_OUTPUT_SIZE]).decode(),
+            })
+            continue
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    requests.close()
+                    responses.close()
+                    os.dup2(stdout.fileno(), 1)
+                    os.dup2(stderr.fileno(), 2)
+                    checker.run(request['args'])
+                finally:
+                    os._exit(1)
+
+            send({'pid': pid})
+            _, status = os.waitpid(pid, 0)
+            send({
+                'returncode': os.waitstatus_to_exitcode(status),
+                'stdout': read_output(stdout),
+                'stderr': read_output(stderr),
+            })
+
+
+def main():
+    checker = Checker(sys.argv[1])
+    sys.argv = [checker.path]
+    sys.path[0] = os.path.dirname(checker.path)
+
+    # protocol streams are moved away from stdio, so that nothing printed
+    # by the checker or its imports can break it
+    requests = os.fdopen(os.dup(0), 'rb')
+    responses = os.fdopen(os.dup(1), 'wb')
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+
+    try:
+        checker.load()
+    except Exception:
+        # reported for each action then
+        pass
+    serve(checker, requests, responses)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,44 @@
+import functools
+import hashlib
+import hmac
 import secrets
 import string
 
-from typing import Optional
+from typing import Optional, Tuple
 
 from .base import BaseModel
 
 ALPHABET = string.ascii_uppercase + string.digits
+BASE36_DIGITS = string.digits + string.ascii_uppercase
+
+# Signed flag layout (base36, 32 characters as the regular flags):
+# service letter, team id, task id, round, nonce, hmac tag, "=".
+SIGNED_FIELD_WIDTHS = (3, 2, 4, 5)
+SIGNED_PAYLOAD_LENGTH = 1 + sum(SIGNED_FIELD_WIDTHS)
+SIGNED_TAG_LENGTH = 16
+SIGNED_FLAG_LENGTH = SIGNED_PAYLOAD_LENGTH + SIGNED_TAG_LENGTH + 1
+
+
+def _encode_base36(value: int, width: int) -> str:
+    if not 0 <= value < 36 ** width:
+        raise ValueError(f'{value} does not fit in {width} flag characters')
+    chars = []
+    for _ in range(width):
+        value, rem = divmod(value, 36)
+        chars.append(BASE36_DIGITS[rem])
+    return ''.join(reversed(chars))
+
+
+@functools.lru_cache(maxsize=4)
+def _get_hmac(key: str) -> 'hmac.HMAC':
+    return hmac.new(key.encode(), digestmod=hashlib.sha256)
+
+
+def _sign(key: str, payload: str) -> str:
+    mac = _get_hmac(key).copy()
+    mac.update(payload.encode())
+    tag = int.from_bytes(mac.digest()[:11], 'big') % 36 ** SIGNED_TAG_LENGTH
+    return _encode_base36(tag, SIGNED_TAG_LENGTH)
 
 
 class Flag(BaseModel):
@@ -40,20 +73,39 @@ class Flag(BaseModel):
 
     @classmethod
     def generate(
-            cls, service: str, team_id: int, task_id: int, current_round: int
+            cls,
+            service: str,
+            team_id: int,
+            task_id: int,
+            current_round: int,
+            signing_key: Optional[str] = None,
     ) -> 'Flag':
         """
         Generate a new flag.
 
+        If the signing key is passed, the flag contains its team, task
+        and round followed by the hmac tag instead of random data,
+        so it can be verified with "verify_signed" without storage lookups.
+
         :param service: service of new flag (to pick the first flag letter)
         :param team_id: team id
         :param task_id: task id
         :param current_round: current round
+        :param signing_key: optional key to generate a signed flag
         :return: Flag model instance
         """
         service_letter = service[0].upper()
-        rnd_data = ''.join(secrets.choice(ALPHABET) for _ in range(30))
-        flag_text = service_letter + rnd_data + '='
+        if signing_key:
+            nonce = secrets.randbelow(36 ** SIGNED_FIELD_WIDTHS[-1])
+            fields = (team_id, task_id, current_round, nonce)
+            payload = service_letter + ''.join(
+                _encode_base36(value, width)
+                for value, width in zip(fields, SIGNED_FIELD_WIDTHS)
+            )
+            flag_text = payload + _sign(signing_key, payload) + '='
+        else:
+            rnd_data = ''.join(secrets.choice(ALPHABET) for _ in range(30))
+            flag_text = service_letter + rnd_data + '='
 
         return cls(
             id=None,
@@ -66,5 +118,51 @@ class Flag(BaseModel):
             vuln_number=None,
         )
 
+    @staticmethod
+    def verify_signed(flag: str, signing_key: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Check the tag of the flag generated with the signing key.
+
+        :returns: (team id, task id, round) of the flag or None if it's invalid
+        """
+        if not isinstance(flag, str) or len(flag) != SIGNED_FLAG_LENGTH:
+            return None
+        if not flag.isascii() or flag[-1] != '=':
+            return None
+
+        payload = flag[:SIGNED_PAYLOAD_LENGTH]
+        tag = flag[SIGNED_PAYLOAD_LENGTH:-1]
+        if not hmac.compare_digest(_sign(signing_key, payload), tag):
+            return None
+
+        # payload is trusted after the tag check, so it's surely base36
+        team_end = 1 + SIGNED_FIELD_WIDTHS[0]
+        task_end = team_end + SIGNED_FIELD_WIDTHS[1]
+        round_end = task_end + SIGNED_FIELD_WIDTHS[2]
+        return (
+            int(payload[1:team_end], 36),
+            int(payload[team_end:task_end], 36),
+            int(payload[task_end:round_end], 36),
+        )
+
+    def pack(self) -> str:
+        """Compact representation with the fields needed to submit the flag."""
+        return f'{self.id}|{self.team_id}|{self.task_id}|{self.round}'
+
+    @classmethod
+    def unpack(cls, flag: str, packed: str) -> 'Flag':
+        """Restore the flag packed by "pack", without the checker data."""
+        flag_id, team_id, task_id, flag_round = map(int, packed.split('|'))
+        return cls(
+            id=flag_id,
+            team_id=team_id,
+            task_id=task_id,
+            flag=flag,
+            round=flag_round,
+            public_flag_data=None,
+            private_flag_data=None,
+            vuln_number=None,
+        )
+
     def __str__(self) -> str:
         return f"Flag({self.id}, task {self.task_id}, team {self.team_id})"
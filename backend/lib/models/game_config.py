@@ -14,6 +14,11 @@ class GameConfig(BaseModel):
     game_hardness: float
     inflation: bool
     volga_attacks_mode: bool
+    flag_rate_limit: float
+    flag_rate_burst: int
+    write_behind_mode: bool
+    signed_flags: bool
+    flag_signing_key: str
 
     round_time: int
     mode: str
@@ -25,12 +30,25 @@ class GameConfig(BaseModel):
 
     table_name = 'GameConfig'
 
+    defaults = {
+        'flag_rate_limit': 0,
+        'flag_rate_burst': 500,
+        'write_behind_mode': False,
+        'signed_flags': False,
+        'flag_signing_key': '',
+    }
+
     __slots__ = (
         'id',
         'flag_lifetime',
         'game_hardness',
         'inflation',
         'volga_attacks_mode',
+        'flag_rate_limit',
+        'flag_rate_burst',
+        'write_behind_mode',
+        'signed_flags',
+        'flag_signing_key',
         'round_time',
         'mode',
         'timezone',
@@ -45,9 +63,14 @@ class GameConfig(BaseModel):
             self.start_time = parse(self.start_time)
 
     def __str__(self) -> str:
-        return str(self.to_dict())
+        return str(self.to_dict_for_participants())
 
     def to_dict(self) -> Dict[str, Any]:
         data = super().to_dict()
         data['start_time'] = str(data['start_time'])
         return data
+
+    def to_dict_for_participants(self) -> Dict[str, Any]:
+        d = self.to_dict()
+        d.pop('flag_signing_key', None)
+        return d
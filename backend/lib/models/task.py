@@ -70,6 +70,14 @@ class Task(BaseModel):
     def checker_provides_public_flag_data(self) -> bool:
         return 'pfr' in self.checker_tags
 
+    @property
+    def checker_is_warm(self) -> bool:
+        return 'warm' in self.checker_tags
+
+    @property
+    def checker_is_module(self) -> bool:
+        return 'module' in self.checker_tags
+
     def set_flag_data(self, flag: Flag, verdict: CheckerVerdict) -> Flag:
         if not self.checker_returns_flag_id:
             flag.public_flag_data = ''
@@ -1,3 +1,27 @@
-from . import attacks, caching, flags, keys, game, tasks, teams, utils
+from . import (
+    attacks,
+    caching,
+    flags,
+    keys,
+    game,
+    scores,
+    scripts,
+    tasks,
+    teams,
+    utils,
+    verdicts,
+)
 
-__all__ = ('attacks', 'caching', 'flags', 'keys', 'game', 'tasks', 'teams', 'utils')
+__all__ = (
+    'attacks',
+    'caching',
+    'flags',
+    'keys',
+    'game',
+    'scores',
+    'scripts',
+    'tasks',
+    'teams',
+    'utils',
+    'verdicts',
+)
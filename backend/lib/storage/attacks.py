@@ -1,10 +1,22 @@
+from typing import List, Dict, Optional, Tuple
+
 from lib import models, storage
 from lib.helpers import exceptions
+from lib.helpers.cache import LocalCache
 from lib.helpers.exceptions import FlagExceptionEnum
 from lib.models.types import TaskStatus
-from lib.storage import utils, game
+from lib.storage import utils, game, scripts
 from lib.storage.keys import CacheKeys
 
+_RECALCULATE_RATING_BATCH_QUERY = utils.PreparedQuery(
+    name='recalculate_rating_batch',
+    query="""
+SELECT * FROM recalculate_rating_batch(
+    %(attacker_ids)s, %(victim_ids)s, %(task_ids)s, %(flag_ids)s
+)
+""",
+)
+
 
 def get_attack_data() -> str:
     """Get public flag ids for tasks that provide them, as json string."""
@@ -13,6 +25,247 @@ def get_attack_data() -> str:
     return attack_data or 'null'
 
 
+def take_submit_tokens(team_id: int, count: int) -> Tuple[int, float]:
+    """
+    Take tokens for "count" flags from the team's submit token bucket.
+
+    The bucket is refilled with "flag_rate_limit" tokens per second
+    up to "flag_rate_burst" tokens. Does nothing if the limit isn't set.
+
+    :param team_id: id of the submitting team
+    :param count: number of flags submitted
+    :returns: number of flags that can be processed now and seconds
+              to wait before the rest of them can be submitted
+    """
+    game_config = game.get_current_game_config()
+    if game_config.flag_rate_limit <= 0 or not count:
+        return count, 0.0
+
+    taken, retry_after = scripts.TakeSubmitTokensScript.get()(
+        keys=[CacheKeys.team_submit_bucket(team_id)],
+        args=[
+            game_config.flag_rate_limit,
+            game_config.flag_rate_burst,
+            count,
+        ],
+    )
+    return taken, retry_after / 1000
+
+
+def get_submit_buckets(team_ids: List[int]) -> Dict[int, float]:
+    """Get current number of tokens in the teams' submit token buckets."""
+    game_config = game.get_current_game_config()
+    burst = game_config.flag_rate_burst
+
+    with utils.redis_pipeline(transaction=False) as pipe:
+        # same time source as the buckets refill
+        pipe.time()
+        for team_id in team_ids:
+            pipe.hmget(CacheKeys.team_submit_bucket(team_id), 'tokens', 'ts')
+        (seconds, microseconds), *states = pipe.execute()
+    now = seconds + microseconds / 1000000
+
+    result = {}
+    for team_id, (tokens, ts) in zip(team_ids, states):
+        if tokens is None or ts is None:
+            result[team_id] = float(burst)
+            continue
+        refill = max(now - float(ts), 0) * game_config.flag_rate_limit
+        result[team_id] = min(float(burst), float(tokens) + refill)
+    return result
+
+
+def get_rate_limit_message(retry_after: float) -> str:
+    return f'{FlagExceptionEnum.RATE_LIMITED}, retry in {retry_after:.1f}s.'
+
+
+def check_flag(
+        attacker_id: int,
+        flag: Optional[models.Flag],
+        current_round: int,
+        game_config: models.GameConfig,
+        teamtasks: Dict[int, Optional[dict]],
+) -> models.Flag:
+    """
+    Validate the flag submitted by the attacker before marking it stolen.
+
+    :param teamtasks: cache of the attacker's latest teamtasks by task id,
+                      filled lazily in volga attacks mode
+    :raises FlagSubmitException: if the flag can't be accepted
+    :returns: the validated flag
+    """
+    if flag is None:
+        raise FlagExceptionEnum.FLAG_INVALID
+    if flag.team_id == attacker_id:
+        raise FlagExceptionEnum.FLAG_YOUR_OWN
+
+    if current_round - flag.round > game_config.flag_lifetime:
+        raise FlagExceptionEnum.FLAG_TOO_OLD
+
+    if game_config.volga_attacks_mode:
+        if flag.task_id not in teamtasks:
+            teamtasks[flag.task_id] = storage.tasks.get_latest_teamtask(
+                team_id=attacker_id,
+                task_id=flag.task_id,
+            )
+        teamtask = teamtasks[flag.task_id]
+        # Status is a string from redis stream.
+        if not teamtask or teamtask['status'] != str(TaskStatus.UP.value):
+            raise FlagExceptionEnum.SERVICE_IS_DOWN
+
+    return flag
+
+
+def check_signed_flag(
+        attacker_id: int,
+        flag_str: str,
+        current_round: int,
+        game_config: models.GameConfig,
+) -> None:
+    """
+    Validate the signed flag without any storage lookups.
+
+    Forged, own and expired flags are rejected here, so only the flags
+    which could be accepted reach the flags cache.
+
+    :raises FlagSubmitException: if the flag can't be accepted
+    """
+    data = models.Flag.verify_signed(flag_str, game_config.flag_signing_key)
+    if data is None:
+        raise FlagExceptionEnum.FLAG_INVALID
+
+    team_id, _, flag_round = data
+    if flag_round > current_round:
+        raise FlagExceptionEnum.FLAG_INVALID
+    if team_id == attacker_id:
+        raise FlagExceptionEnum.FLAG_YOUR_OWN
+    if current_round - flag_round > game_config.flag_lifetime:
+        raise FlagExceptionEnum.FLAG_TOO_OLD
+
+
+def filter_signed_flags(
+        attacker_id: int,
+        results: List[models.AttackResult],
+        flag_strs: List[str],
+        current_round: int,
+        game_config: models.GameConfig,
+) -> Tuple[List[models.AttackResult], List[str]]:
+    """
+    Reject the flags failing "check_signed_flag" if signed flags are enabled.
+
+    :returns: attack results and flags left to look up
+    """
+    if not game_config.signed_flags:
+        return results, flag_strs
+
+    left_results, left_flags = [], []
+    for result, flag_str in zip(results, flag_strs):
+        try:
+            check_signed_flag(
+                attacker_id=attacker_id,
+                flag_str=flag_str,
+                current_round=current_round,
+                game_config=game_config,
+            )
+        except exceptions.FlagSubmitException as e:
+            result.message = str(e)
+        else:
+            left_results.append(result)
+            left_flags.append(flag_str)
+
+    return left_results, left_flags
+
+
+def get_attack_results(
+        attacker_id: int,
+        flag_strs: List[str],
+        current_round: int,
+) -> List[models.AttackResult]:
+    """Get empty attack results for the flags, rejected if the game isn't running."""
+    results = [models.AttackResult(attacker_id=attacker_id) for _ in flag_strs]
+    if current_round == -1:
+        for result in results:
+            result.message = str(FlagExceptionEnum.GAME_NOT_AVAILABLE)
+    return results
+
+
+def check_flags(
+        attacker_id: int,
+        results: List[models.AttackResult],
+        flags: List[Optional[models.Flag]],
+        current_round: int,
+        game_config: models.GameConfig,
+        teamtasks: Dict[int, Optional[dict]],
+) -> List[Tuple[models.AttackResult, models.Flag]]:
+    """
+    Run "check_flag" for the looked up flags, set messages of the rejected ones.
+
+    :returns: attack results with the flags to be marked as stolen
+    """
+    checked = []
+    for result, flag in zip(results, flags):
+        try:
+            flag = check_flag(
+                attacker_id=attacker_id,
+                flag=flag,
+                current_round=current_round,
+                game_config=game_config,
+                teamtasks=teamtasks,
+            )
+        except exceptions.FlagSubmitException as e:
+            result.message = str(e)
+        else:
+            result.victim_id = flag.team_id
+            result.task_id = flag.task_id
+            checked.append((result, flag))
+    return checked
+
+
+def get_accepted_flags(
+        checked: List[Tuple[models.AttackResult, models.Flag]],
+        errors: List[Optional[exceptions.FlagSubmitException]],
+) -> List[Tuple[models.AttackResult, models.Flag]]:
+    """
+    Filter the flags newly marked as stolen, set messages of the rest.
+
+    :param checked: attack results with flags returned by "check_flags"
+    :param errors: stolen flags marking errors for each of them
+    """
+    accepted = []
+    for (result, flag), error in zip(checked, errors):
+        if error is not None:
+            result.message = str(error)
+        else:
+            accepted.append((result, flag))
+    return accepted
+
+
+def get_rating_batch_params(attacker_id: int, flags: List[models.Flag]) -> dict:
+    """Get arguments of "recalculate_rating_batch" database function."""
+    return {
+        'attacker_ids': [attacker_id] * len(flags),
+        'victim_ids': [flag.team_id for flag in flags],
+        'task_ids': [flag.task_id for flag in flags],
+        'flag_ids': [flag.id for flag in flags],
+    }
+
+
+def set_attack_results(
+        accepted: List[Tuple[models.AttackResult, models.Flag]],
+        deltas: List[Tuple[Optional[float], Optional[float]]],
+) -> None:
+    """Fill the accepted flags' results with the rating changes."""
+    for (result, _), (attacker_delta, victim_delta) in zip(accepted, deltas):
+        if attacker_delta is None:
+            # already credited in the database
+            result.message = str(FlagExceptionEnum.FLAG_ALREADY_STOLEN)
+            continue
+        result.submit_ok = True
+        result.attacker_delta = attacker_delta
+        result.victim_delta = victim_delta
+        result.message = f'Flag accepted! Earned {attacker_delta} flag points!'
+
+
 def handle_attack(
         attacker_id: int, flag_str: str, current_round: int
 ) -> models.AttackResult:
@@ -28,67 +281,96 @@ def handle_attack(
 
     :return: attacker rating change
     """
+    result, = handle_attacks(
+        attacker_id=attacker_id,
+        flag_strs=[flag_str],
+        current_round=current_round,
+    )
+    return result
 
-    result = models.AttackResult(attacker_id=attacker_id)
 
-    try:
-        if current_round == -1:
-            raise FlagExceptionEnum.GAME_NOT_AVAILABLE
-
-        flag = storage.flags.get_flag_by_str(
-            flag_str=flag_str,
-            current_round=current_round,
-        )
-        if flag is None:
-            raise FlagExceptionEnum.FLAG_INVALID
-        if flag.team_id == attacker_id:
-            raise FlagExceptionEnum.FLAG_YOUR_OWN
-
-        game_config = game.get_current_game_config()
-        if current_round - flag.round > game_config.flag_lifetime:
-            raise FlagExceptionEnum.FLAG_TOO_OLD
-
-        if game_config.volga_attacks_mode:
-            teamtask = storage.tasks.get_latest_teamtask(
-                team_id=attacker_id,
-                task_id=flag.task_id,
-            )
-            # Status is a string from redis stream.
-            if not teamtask or teamtask['status'] != str(TaskStatus.UP.value):
-                raise FlagExceptionEnum.SERVICE_IS_DOWN
-
-        result.victim_id = flag.team_id
-        result.task_id = flag.task_id
-        success = storage.flags.try_add_stolen_flag(
-            flag=flag,
-            attacker=attacker_id,
-            current_round=current_round,
-        )
-        if not success:
-            raise FlagExceptionEnum.FLAG_ALREADY_STOLEN
-
-    except exceptions.FlagSubmitException as e:
-        result.submit_ok = False
-        result.message = str(e)
-
-    else:
-        result.submit_ok = True
+def handle_attacks(
+        attacker_id: int,
+        flag_strs: List[str],
+        current_round: int,
+        local_cache: Optional[LocalCache] = None,
+) -> List[models.AttackResult]:
+    """
+    Batch version of "handle_attack".
+
+    Flags are resolved with a single pipeline (signed flags are verified
+    before that, if enabled), game config is read once and stolen flags
+    are marked in a single pipeline. Rating is recalculated
+    for all accepted flags in one transaction in submission order,
+    so the results are the same as if the flags were submitted one by one.
+    In write-behind mode it's recalculated on the redis scores mirror instead,
+    otherwise the mirror is updated with the database rating changes.
+
+    :param attacker_id: id of the attacking team
+    :param flag_strs: flags to be checked
+    :param current_round: round of the attack
+    :param local_cache: optional process-local flags cache
+
+    :return: list of attack results in the same order as flags
+    """
+    results = get_attack_results(attacker_id, flag_strs, current_round)
+    if current_round == -1:
+        return results
+
+    game_config = game.get_current_game_config()
+    pending, pending_flags = filter_signed_flags(
+        attacker_id=attacker_id,
+        results=results,
+        flag_strs=flag_strs,
+        current_round=current_round,
+        game_config=game_config,
+    )
+    flags = storage.flags.get_flags_by_str(
+        flag_strs=pending_flags,
+        current_round=current_round,
+        local_cache=local_cache,
+    )
+    checked = check_flags(
+        attacker_id=attacker_id,
+        results=pending,
+        flags=flags,
+        current_round=current_round,
+        game_config=game_config,
+        teamtasks={},
+    )
+    errors = storage.flags.mark_stolen_flags(
+        flags=[flag for _, flag in checked],
+        attacker=attacker_id,
+        current_round=current_round,
+        flag_lifetime=game_config.flag_lifetime,
+    )
+    accepted = get_accepted_flags(checked, errors)
+    if not accepted:
+        return results
 
-        with utils.db_cursor() as (conn, curs):
-            curs.callproc(
-                "recalculate_rating",
-                (
-                    attacker_id,
-                    flag.team_id,
-                    flag.task_id,
-                    flag.id,
-                ),
+    accepted_flags = [flag for _, flag in accepted]
+    try:
+        if game_config.write_behind_mode:
+            deltas = storage.scores.record_attacks(
+                attacker_id=attacker_id,
+                flags=accepted_flags,
+                game_config=game_config,
             )
-            attacker_delta, victim_delta = curs.fetchone()
-            conn.commit()
+        else:
+            with utils.db_cursor() as (conn, curs):
+                _RECALCULATE_RATING_BATCH_QUERY.execute(
+                    curs,
+                    get_rating_batch_params(attacker_id, accepted_flags),
+                )
+                deltas = curs.fetchall()
+                conn.commit()
+    except Exception:
+        # none of the attacks are recorded, let the flags be resubmitted
+        storage.flags.unmark_stolen_flags(accepted_flags, attacker_id)
+        raise
 
-        result.attacker_delta = attacker_delta
-        result.victim_delta = victim_delta
-        result.message = f'Flag accepted! Earned {attacker_delta} flag points!'
+    if not game_config.write_behind_mode:
+        storage.scores.apply_deltas(attacker_id, accepted_flags, deltas)
 
-    return result
+    set_attack_results(accepted, deltas)
+    return results
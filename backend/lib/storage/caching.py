@@ -1,7 +1,15 @@
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from redis import RedisError, WatchError
 from redis.client import Pipeline
 
 from lib import models
-from lib.storage import utils, game
+from lib.storage import utils, game, scripts
 from lib.storage.keys import CacheKeys
 
 _SELECT_LAST_STOLEN_TEAM_FLAGS_QUERY = """
@@ -12,6 +20,23 @@ WHERE sf.attacker_id = %(attacker_id)s AND f.round >= %(round)s
 
 _SELECT_ALL_LAST_FLAGS_QUERY = "SELECT * from Flags WHERE round >= %(round)s"
 
+_SELECT_TEAMTASKS_SCORES_QUERY = """
+SELECT team_id, task_id, score, stolen, lost FROM TeamTasks
+"""
+
+# sent to subscribers after (re)connecting, as messages could have been missed
+ALL_CACHES = '*'
+
+# builders holding the lock for longer are considered dead
+CACHE_LOCK_TTL = 30
+
+# flags fetched from the database & written to redis at once during warm-up
+FLAGS_WARMUP_BATCH_SIZE = 1000
+
+_invalidation_callbacks: List[Callable[[str], None]] = []
+_invalidation_listener_pid: Optional[int] = None
+_invalidation_lock = threading.Lock()
+
 
 def cache_teams(pipe: Pipeline) -> None:
     """
@@ -54,6 +79,9 @@ def cache_last_stolen(team_id: int, current_round: int, pipe: Pipeline) -> None:
     """
     Caches stolen flags from "flag_lifetime" rounds.
 
+    The set is only filled if it's still missing when the command is executed,
+    so it's safe to call concurrently without WATCH.
+
     Just adds commands to pipeline stack, don't forget to execute afterwards.
 
     :param team_id: attacker team id
@@ -72,16 +100,52 @@ def cache_last_stolen(team_id: int, current_round: int, pipe: Pipeline) -> None:
         )
         flags = curs.fetchall()
 
-    key = CacheKeys.team_stolen_flags(team_id)
-    pipe.delete(key)
-    if flags:
-        pipe.sadd(key, *(flag[0] for flag in flags))
+    scripts.FillStolenFlagsScript.get()(
+        keys=[CacheKeys.team_stolen_flags(team_id)],
+        args=[scripts.STOLEN_FLAGS_PLACEHOLDER, *(flag[0] for flag in flags)],
+        client=pipe,
+    )
+
+
+def cache_teamtasks_scores(pipe: Pipeline) -> None:
+    """
+    Add teamtasks missing in the scores mirror from database.
+
+    Teamtasks already in the mirror are never overwritten, as they can
+    include attacks not yet written to the database.
+
+    Just adds commands to pipeline stack, don't forget to execute afterwards.
+
+    :param pipe: redis connection to add command to
+    """
+    with utils.db_cursor() as (_, curs):
+        curs.execute(_SELECT_TEAMTASKS_SCORES_QUERY)
+        scores = curs.fetchall()
+
+    args = []
+    for team_id, task_id, score, stolen, lost in scores:
+        args.extend((f'{team_id}:{task_id}', repr(score), stolen, lost))
+
+    scripts.FillScoresScript.get()(
+        keys=[
+            CacheKeys.teamtasks_scores(),
+            CacheKeys.teamtasks_stolen(),
+            CacheKeys.teamtasks_lost(),
+        ],
+        args=args,
+        client=pipe,
+    )
 
 
 def cache_last_flags(current_round: int, pipe: Pipeline) -> None:
     """
     Cache all generated flags from last "flag_lifetime" rounds.
 
+    Flags are streamed from the database with a server-side cursor and written
+    in batches of non-transactional pipelines, so that neither redis nor
+    the process handles all of them at once. Only the "flags cached" marker is
+    added to the pipeline, so it's set after all flags are written.
+
     Just adds commands to pipeline stack, don't forget to execute afterwards.
 
     :param current_round: current round
@@ -90,19 +154,61 @@ def cache_last_flags(current_round: int, pipe: Pipeline) -> None:
     game_config = game.get_current_game_config()
     expires = game_config.flag_lifetime * game_config.round_time * 2
 
-    with utils.db_cursor(dict_cursor=True) as (_, curs):
+    with utils.db_cursor(dict_cursor=True, name='cache_last_flags') as (_, curs):
+        curs.itersize = FLAGS_WARMUP_BATCH_SIZE
         curs.execute(
             _SELECT_ALL_LAST_FLAGS_QUERY,
             {'round': current_round - game_config.flag_lifetime},
         )
-        flags = curs.fetchall()
+        while True:
+            flags = curs.fetchmany(FLAGS_WARMUP_BATCH_SIZE)
+            if not flags:
+                break
 
-    flag_models = list(models.Flag.from_dict(data) for data in flags)
+            with utils.redis_pipeline(transaction=False) as batch_pipe:
+                cache_flags(
+                    flags=[models.Flag.from_dict(data) for data in flags],
+                    expires=expires,
+                    pipe=batch_pipe,
+                )
+                batch_pipe.execute()
 
     pipe.set(CacheKeys.flags_cached(), 1)
-    for flag in flag_models:
-        pipe.set(CacheKeys.flag_by_id(flag.id), flag.to_json(), ex=expires)
-        pipe.set(CacheKeys.flag_by_str(flag.flag), flag.to_json(), ex=expires)
+
+
+def cache_flags(flags: List[models.Flag], expires: int, pipe: Pipeline) -> None:
+    """
+    Put flags to the hashes of their rounds.
+
+    Submitted flags are looked up in the round hash by flag string,
+    which only holds packed ids, checker data is kept in a separate hash by id.
+    Ids are also added to the per team & task sets of the round to pick
+    flags for GET actions from. Keys expire in "expires" seconds after
+    the last flag is added.
+
+    Just adds commands to pipeline stack, don't forget to execute afterwards.
+    """
+    by_round: Dict[int, List[models.Flag]] = defaultdict(list)
+    for flag in flags:
+        by_round[flag.round].append(flag)
+
+    for flag_round, round_flags in by_round.items():
+        round_key = CacheKeys.round_flags(flag_round)
+        data_key = CacheKeys.round_flags_data(flag_round)
+        pipe.hset(round_key, mapping={flag.flag: flag.pack() for flag in round_flags})
+        pipe.hset(data_key, mapping={flag.id: flag.to_json() for flag in round_flags})
+        pipe.expire(round_key, expires)
+        pipe.expire(data_key, expires)
+
+        ids: Dict[str, List[int]] = defaultdict(list)
+        for flag in round_flags:
+            key = CacheKeys.round_team_task_flags(
+                flag_round, flag.team_id, flag.task_id,
+            )
+            ids[key].append(flag.id)
+        for key, flag_ids in ids.items():
+            pipe.sadd(key, *flag_ids)
+            pipe.expire(key, expires)
 
 
 def cache_game_config(pipe: Pipeline) -> None:
@@ -114,9 +220,147 @@ def cache_game_config(pipe: Pipeline) -> None:
 
 def flush_teams_cache():
     with utils.redis_pipeline(transaction=False) as pipe:
-        pipe.delete(CacheKeys.teams()).execute()
+        pipe.delete(CacheKeys.teams())
+        pipe.incr(CacheKeys.cache_generation(CacheKeys.teams()))
+        pipe.publish(CacheKeys.cache_invalidation(), 'teams')
+        pipe.execute()
 
 
 def flush_tasks_cache():
     with utils.redis_pipeline(transaction=False) as pipe:
-        pipe.delete(CacheKeys.tasks()).execute()
+        pipe.delete(CacheKeys.tasks())
+        pipe.incr(CacheKeys.cache_generation(CacheKeys.tasks()))
+        pipe.publish(CacheKeys.cache_invalidation(), 'tasks')
+        pipe.execute()
+
+
+def flush_game_config_cache():
+    with utils.redis_pipeline(transaction=False) as pipe:
+        pipe.delete(CacheKeys.game_config())
+        pipe.incr(CacheKeys.cache_generation(CacheKeys.game_config()))
+        pipe.publish(CacheKeys.cache_invalidation(), 'game_config')
+        pipe.execute()
+
+
+def ensure_cached(
+        cache_key: str,
+        cache_func: Callable[[Pipeline, int], None],
+        generation_key: Optional[str] = None,
+) -> None:
+    """
+    Build the cache if "cache_key" is missing.
+
+    Only one process (holding the lock) builds the cache, others wait for
+    the notification that it's ready instead of querying the database too.
+    The cache is built for a generation (value of "generation_key")
+    and is not written if the generation changes during the build,
+    so a cache flushed in the meantime is not overwritten with stale data.
+
+    :param cache_key: key that exists when the cache is built
+    :param cache_func: function adding cache commands to the pipeline,
+                       called with the pipeline & the generation
+    :param generation_key: generation counter, "<cache_key>:generation" by default
+    """
+    if generation_key is None:
+        generation_key = CacheKeys.cache_generation(cache_key)
+
+    client = utils.RedisStorage.get()
+    lock_key = CacheKeys.cache_lock(cache_key)
+    while not client.exists(cache_key):
+        token = secrets.token_hex(8)
+        if client.set(lock_key, token, nx=True, ex=CACHE_LOCK_TTL):
+            _build_cache(cache_key, cache_func, generation_key, token)
+        else:
+            _wait_cache(cache_key)
+
+
+def _build_cache(
+        cache_key: str,
+        cache_func: Callable[[Pipeline, int], None],
+        generation_key: str,
+        token: str,
+) -> None:
+    client = utils.RedisStorage.get()
+    lock_key = CacheKeys.cache_lock(cache_key)
+    release = scripts.ReleaseCacheLockScript.get()
+    try:
+        while True:
+            generation = int(client.get(generation_key) or 0)
+            with utils.redis_pipeline(transaction=True) as pipe:
+                # the database is queried while the commands are only queued,
+                # they're sent if the generation is the same after that
+                cache_func(pipe, generation)
+                release(keys=[lock_key], args=[token], client=pipe)
+                pipe.publish(CacheKeys.cache_ready(cache_key), generation)
+                try:
+                    pipe.watch(generation_key)
+                    if int(pipe.get(generation_key) or 0) != generation:
+                        continue
+                    pipe.execute()
+                except WatchError:
+                    continue
+            break
+    except Exception:
+        # let the waiters take over
+        with utils.redis_pipeline(transaction=True) as pipe:
+            release(keys=[lock_key], args=[token], client=pipe)
+            pipe.publish(CacheKeys.cache_ready(cache_key), -1)
+            pipe.execute()
+        raise
+
+
+def _wait_cache(cache_key: str) -> None:
+    """Wait until the cache is built or its builder is gone."""
+    client = utils.RedisStorage.get()
+    lock_key = CacheKeys.cache_lock(cache_key)
+
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        # subscribe before checking, so the notification can't be missed
+        pubsub.subscribe(CacheKeys.cache_ready(cache_key))
+        while True:
+            with utils.redis_pipeline(transaction=False) as pipe:
+                cached, lock_ttl = pipe.exists(cache_key).pttl(lock_key).execute()
+            if cached or lock_ttl <= 0:
+                return
+            # the lock expires if its holder dies
+            pubsub.get_message(timeout=lock_ttl / 1000)
+    finally:
+        pubsub.close()
+
+
+def subscribe_invalidation(callback: Callable[[str], None]) -> None:
+    """
+    Call "callback" with the cache name each time it's invalidated.
+
+    Callbacks are called from a background thread (green one if patched)
+    of the current process, so subscribe again after fork.
+    The thread also calls them with ALL_CACHES after (re)connecting to redis.
+    """
+    global _invalidation_listener_pid
+
+    with _invalidation_lock:
+        if _invalidation_listener_pid != os.getpid():
+            _invalidation_callbacks.clear()
+            _invalidation_listener_pid = os.getpid()
+            threading.Thread(target=_listen_invalidations, daemon=True).start()
+        _invalidation_callbacks.append(callback)
+
+
+def _notify_invalidation(name: str) -> None:
+    with _invalidation_lock:
+        callbacks = list(_invalidation_callbacks)
+    for callback in callbacks:
+        callback(name)
+
+
+def _listen_invalidations() -> None:
+    while True:
+        try:
+            pubsub = utils.RedisStorage.get().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CacheKeys.cache_invalidation())
+            _notify_invalidation(ALL_CACHES)
+            for message in pubsub.listen():
+                _notify_invalidation(message['data'])
+        except RedisError:
+            time.sleep(1)
@@ -1,9 +1,10 @@
 from collections import defaultdict
-from typing import Optional, List, Dict, DefaultDict, Union
+from typing import Optional, List, Dict, DefaultDict, Iterator, Tuple
 
 from lib import models
-from lib.helpers.cache import cache_helper
-from lib.storage import caching, game, utils
+from lib.helpers.cache import LocalCache
+from lib.helpers.exceptions import FlagExceptionEnum, FlagSubmitException
+from lib.storage import caching, game, scripts, utils
 from lib.storage.keys import CacheKeys
 
 _GET_UNEXPIRED_FLAGS_QUERY = """
@@ -12,13 +13,30 @@ INNER JOIN Teams t on f.team_id = t.id
 WHERE f.round >= %s AND f.task_id IN %s
 """
 
-_GET_RANDOM_ROUND_FLAG_QUERY = """
+_GET_RANDOM_ROUND_FLAG_QUERY = utils.PreparedQuery(
+    name='get_random_round_flag',
+    query="""
 SELECT id FROM Flags
 WHERE round = %(round)s AND team_id = %(team_id)s AND task_id = %(task_id)s
 ORDER BY RANDOM()
 LIMIT 1
+""",
+)
+
+_SELECT_LIVE_FLAGS_QUERY = "SELECT flag, round FROM Flags WHERE round >= %(round)s"
+
+_SELECT_ROUNDS_FLAGS_QUERY = """
+SELECT * FROM Flags WHERE round = ANY(%(rounds)s) AND task_id = ANY(%(task_ids)s)
 """
 
+# statuses returned by the stolen flags marking script
+STOLEN_FLAG_ERRORS: Dict[int, Optional[FlagSubmitException]] = {
+    1: None,
+    0: FlagExceptionEnum.FLAG_ALREADY_STOLEN,
+    -1: FlagExceptionEnum.FLAG_YOUR_OWN,
+    -2: FlagExceptionEnum.FLAG_TOO_OLD,
+}
+
 
 def try_add_stolen_flag(flag: models.Flag, attacker: int, current_round: int) -> bool:
     """
@@ -31,27 +49,79 @@ def try_add_stolen_flag(flag: models.Flag, attacker: int, current_round: int) ->
     :param attacker: attacker team id
     :param current_round: current round
     """
-    stolen_key = CacheKeys.team_stolen_flags(attacker)
-    with utils.redis_pipeline(transaction=True) as pipe:
-        # optimization of redis request count
-        cached_stolen = pipe.exists(stolen_key).execute()
-
-        if not cached_stolen:
-            cache_helper(
-                pipeline=pipe,
-                cache_key=stolen_key,
-                cache_func=caching.cache_last_stolen,
-                cache_args=(attacker, current_round, pipe),
-            )
+    error, = mark_stolen_flags(
+        flags=[flag],
+        attacker=attacker,
+        current_round=current_round,
+        flag_lifetime=game.get_current_game_config().flag_lifetime,
+    )
+    return error is None
+
+
+def mark_stolen_flags(
+        flags: List[models.Flag],
+        attacker: int,
+        current_round: int,
+        flag_lifetime: int,
+) -> List[Optional[FlagSubmitException]]:
+    """
+    Batch version of "try_add_stolen_flag".
+
+    Flags are validated and added to the attacker's stolen set
+    by a single script call. If the set is not cached, it's filled
+    from the database once and the script is retried.
+    Duplicates in "flags" are reported as already stolen after the first one,
+    as if they were submitted one by one.
+
+    :param flags: list of Flag model instances
+    :param attacker: attacker team id
+    :param current_round: current round
+    :param flag_lifetime: flag lifetime from game config
+    :returns: list of errors, None for each newly stolen flag
+    """
+    if not flags:
+        return []
+
+    keys = [CacheKeys.team_stolen_flags(attacker)]
+    args = [attacker, current_round, flag_lifetime]
+    for flag in flags:
+        args.extend((flag.id, flag.team_id, flag.round))
+
+    script = scripts.MarkStolenFlagsScript.get()
+    statuses = script(keys=keys, args=args)
+    if statuses is None:
+        with utils.redis_pipeline(transaction=False) as pipe:
+            caching.cache_last_stolen(attacker, current_round, pipe)
+            script(keys=keys, args=args, client=pipe)
+            *_, statuses = pipe.execute()
+
+    return [STOLEN_FLAG_ERRORS[status] for status in statuses]
+
+
+def unmark_stolen_flags(flags: List[models.Flag], attacker: int) -> None:
+    """
+    Remove the flags marked by "mark_stolen_flags" from the attacker's stolen set.
+
+    Used when the attacks couldn't be recorded, so the flags can be resubmitted.
 
-        is_new, = pipe.sadd(stolen_key, flag.id).execute()
-    return bool(is_new)
+    :param flags: list of Flag model instances newly marked as stolen
+    :param attacker: attacker team id
+    """
+    if not flags:
+        return
+
+    utils.RedisStorage.get().srem(
+        CacheKeys.team_stolen_flags(attacker),
+        *(flag.id for flag in flags),
+    )
 
 
 def add_flag(flag: models.Flag) -> models.Flag:
     """
     Inserts a newly generated flag into the database and cache.
 
+    The flag is also published to the receivers' live flags filters.
+
     :param flag: Flag model instance to be inserted
     :returns: flag with set "id" field
     """
@@ -64,45 +134,55 @@ def add_flag(flag: models.Flag) -> models.Flag:
     expires = game_config.flag_lifetime * game_config.round_time * 2
 
     with utils.redis_pipeline(transaction=True) as pipe:
-        pipe.set(CacheKeys.flag_by_id(flag.id), flag.to_json(), ex=expires)
-        pipe.set(CacheKeys.flag_by_str(flag.flag), flag.to_json(), ex=expires)
+        caching.cache_flags(flags=[flag], expires=expires, pipe=pipe)
+        pipe.publish(CacheKeys.new_flags(), f'{flag.round}:{flag.flag}')
         pipe.execute()
 
     return flag
 
 
-def get_flag_by_field(
-        name: str,
-        value: Union[str, int],
+def iter_live_flags(
         current_round: int,
-) -> Optional[models.Flag]:
+        flag_lifetime: int,
+        batch_size: int = 1000,
+) -> Iterator[List[Tuple[str, int]]]:
     """
-    Get flag by generic field.
+    Stream the flags of the last "flag_lifetime" rounds from the database.
 
-    :param name: field name to ask cache for
-    :param value: value of the field "field_name" to filter on
-    :param current_round: current round
-    :returns: Flag model instance with flag.field_name == field_value or None
+    :returns: iterator over batches of (flag, round) tuples
     """
-    cached_key = CacheKeys.flags_cached()
-    with utils.redis_pipeline(transaction=True) as pipe:
-        cached, = pipe.exists(cached_key).execute()
-        if not cached:
-            cache_helper(
-                pipeline=pipe,
-                cache_key=cached_key,
-                cache_func=caching.cache_last_flags,
-                cache_args=(current_round, pipe),
-            )
+    with utils.db_cursor(name='iter_live_flags') as (_, curs):
+        curs.itersize = batch_size
+        curs.execute(_SELECT_LIVE_FLAGS_QUERY, {'round': current_round - flag_lifetime})
+        while True:
+            flags = curs.fetchmany(batch_size)
+            if not flags:
+                break
+            yield flags
 
-        flag_json, = pipe.get(CacheKeys.flag_by_field(name, value)).execute()
 
-    if not flag_json:
-        return None
+def _ensure_flags_cached(current_round: int) -> None:
+    """
+    Warm up the flags cache, if it's missing.
+
+    Generation of the cache is the round, so if the round is updated
+    during the warm-up, flags are cached for the new round instead.
+    """
+    caching.ensure_cached(
+        cache_key=CacheKeys.flags_cached(),
+        cache_func=lambda pipe, r: caching.cache_last_flags(r or current_round, pipe),
+        generation_key=CacheKeys.current_round(),
+    )
 
-    flag = models.Flag.from_json(flag_json)
 
-    return flag
+def flags_cache_ready() -> bool:
+    """Check if the flags cache warm-up is done."""
+    return bool(utils.RedisStorage.get().exists(CacheKeys.flags_cached()))
+
+
+def warm_up_flags_cache() -> None:
+    """Warm up the flags cache for the current round, if it's missing."""
+    _ensure_flags_cached(game.get_real_round())
 
 
 def get_flag_by_str(flag_str: str, current_round: int) -> Optional[models.Flag]:
@@ -111,24 +191,163 @@ def get_flag_by_str(flag_str: str, current_round: int) -> Optional[models.Flag]:
 
     :param flag_str: flag value
     :param current_round: current round
-    :returns: Flag model instance or None
+    :returns: Flag model instance without checker data or None
     """
-    return get_flag_by_field(
-        name='str', value=flag_str, current_round=current_round,
-    )
+    flag, = get_flags_by_str(flag_strs=[flag_str], current_round=current_round)
+    return flag
 
 
-def get_flag_by_id(flag_id: int, current_round: int) -> Optional[models.Flag]:
+def get_flag_by_id(
+        flag_id: int,
+        flag_round: int,
+        current_round: int,
+) -> Optional[models.Flag]:
     """
-    Get flag by its id value.
+    Get flag with checker data by its id value.
 
     :param flag_id: flag id
+    :param flag_round: round the flag was generated in
     :param current_round: current round
     :return: Flag model instance or None
     """
-    return get_flag_by_field(
-        name='id', value=flag_id, current_round=current_round,
+    data_key = CacheKeys.round_flags_data(flag_round)
+    cached_key = CacheKeys.flags_cached()
+    with utils.redis_pipeline(transaction=False) as pipe:
+        cached, flag_json = pipe.exists(cached_key).hget(data_key, flag_id).execute()
+
+    if not cached:
+        _ensure_flags_cached(current_round)
+        flag_json = utils.RedisStorage.get().hget(data_key, flag_id)
+
+    if not flag_json:
+        return None
+    return models.Flag.from_json(flag_json)
+
+
+def get_flags_lookup_keys(current_round: int, flag_lifetime: int) -> List[str]:
+    """Keys of the round hashes the submitted flags can be in, newest first."""
+    first_round = max(current_round - flag_lifetime, 0)
+    return [
+        CacheKeys.round_flags(flag_round)
+        for flag_round in range(current_round, first_round - 1, -1)
+    ]
+
+
+def unpack_flags(
+        flag_strs: List[str],
+        packed_by_round: List[List[Optional[str]]],
+) -> List[Optional[models.Flag]]:
+    """
+    Get flags from the results of HMGET to each of the round hashes.
+
+    :param flag_strs: flag values requested
+    :param packed_by_round: packed flags (or None) from each round hash
+    :returns: list of Flag model instances without checker data or None
+    """
+    flags: List[Optional[models.Flag]] = []
+    for i, flag_str in enumerate(flag_strs):
+        packed = next(
+            (values[i] for values in packed_by_round if values[i] is not None),
+            None,
+        )
+        flags.append(models.Flag.unpack(flag_str, packed) if packed else None)
+    return flags
+
+
+def get_flags_by_str(
+        flag_strs: List[str],
+        current_round: int,
+        local_cache: Optional[LocalCache] = None,
+) -> List[Optional[models.Flag]]:
+    """
+    Get multiple flags by their string values.
+
+    Flags are fetched from the hashes of the last "flag_lifetime" rounds
+    in a single round trip, the flags cache is only warmed up if it's missing.
+    If the process-local cache is passed, only flags missing from it are
+    requested from redis, and the results (including the missing flags)
+    are stored there.
+
+    :param flag_strs: list of flag values
+    :param current_round: current round
+    :param local_cache: optional process-local cache of flags by flag value
+    :returns: list of Flag model instances (without checker data) or None,
+              in the same order
+    """
+    # submitted values aren't always strings (e.g. elements of a JSON list),
+    # the other ones are never found
+    flag_strs_left = list(dict.fromkeys(
+        flag_str for flag_str in flag_strs if isinstance(flag_str, str)
+    ))
+
+    found: Dict[str, Optional[models.Flag]] = {}
+    if local_cache is not None:
+        for flag_str in flag_strs_left:
+            hit, flag = local_cache.get(flag_str)
+            if hit:
+                found[flag_str] = flag
+
+    missing = [flag_str for flag_str in flag_strs_left if flag_str not in found]
+    if missing:
+        fetched = _get_flags_by_strs(missing, current_round)
+        found.update(zip(missing, fetched))
+        if local_cache is not None:
+            _cache_flags_locally(local_cache, missing, fetched, current_round)
+
+    return [
+        found[flag_str] if isinstance(flag_str, str) else None
+        for flag_str in flag_strs
+    ]
+
+
+def _cache_flags_locally(
+        local_cache: LocalCache,
+        flag_strs: List[str],
+        flags: List[Optional[models.Flag]],
+        current_round: int,
+) -> None:
+    game_config = game.get_current_game_config()
+    for flag_str, flag in zip(flag_strs, flags):
+        if flag is None:
+            local_cache.set(flag_str, None)
+            continue
+
+        # don't keep the flag after it expires
+        rounds_left = flag.round + game_config.flag_lifetime - current_round
+        if rounds_left > 0:
+            local_cache.set(
+                flag_str,
+                flag,
+                ttl=rounds_left * game_config.round_time,
+            )
+
+
+def _get_flags_by_strs(
+        flag_strs: List[str],
+        current_round: int,
+) -> List[Optional[models.Flag]]:
+    if not flag_strs:
+        return []
+
+    keys = get_flags_lookup_keys(
+        current_round=current_round,
+        flag_lifetime=game.get_current_game_config().flag_lifetime,
     )
+    cached_key = CacheKeys.flags_cached()
+    with utils.redis_pipeline(transaction=False) as pipe:
+        pipe.exists(cached_key)
+        for key in keys:
+            pipe.hmget(key, flag_strs)
+        cached, *packed_by_round = pipe.execute()
+
+    if not cached:
+        _ensure_flags_cached(current_round)
+        with utils.redis_pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hmget(key, flag_strs)
+            packed_by_round = pipe.execute()
+
+    return unpack_flags(flag_strs, packed_by_round)
 
 
 def get_random_round_flag(
@@ -139,15 +358,31 @@ def get_random_round_flag(
     """
     Get random flag for team generated for specified round and task.
 
+    The flag is picked from the cached ids of the team's task flags of
+    the round in a single call, the database is only queried
+    if there are none (e.g. the cache was filled before they were tracked).
+
     :param team_id: team id
     :param task_id: task id
     :param from_round: round to fetch flag for
     :param current_round: current round
     :returns: Flag mode instance or None if no flag from rounds exist
     """
+    keys = [
+        CacheKeys.flags_cached(),
+        CacheKeys.round_team_task_flags(from_round, team_id, task_id),
+        CacheKeys.round_flags_data(from_round),
+    ]
+    flag_json = scripts.GetRandomRoundFlagScript.get()(keys=keys)
+    if flag_json is None:
+        _ensure_flags_cached(current_round)
+        flag_json = scripts.GetRandomRoundFlagScript.get()(keys=keys)
+    if flag_json:
+        return models.Flag.from_json(flag_json)
+
     with utils.db_cursor() as (_, curs):
-        curs.execute(
-            _GET_RANDOM_ROUND_FLAG_QUERY,
+        _GET_RANDOM_ROUND_FLAG_QUERY.execute(
+            curs,
             {
                 'round': from_round,
                 'team_id': team_id,
@@ -158,7 +393,40 @@ def get_random_round_flag(
 
     if not result:
         return None
-    return get_flag_by_id(result[0], current_round)
+    return get_flag_by_id(result[0], from_round, current_round)
+
+
+def get_rounds_to_check(current_round: int, flag_lifetime: int) -> List[int]:
+    """Rounds the flags for GET actions are picked from (uniformly)."""
+    return sorted(set(max(1, current_round - x) for x in range(0, flag_lifetime)))
+
+
+def get_rounds_flags(
+        rounds: List[int],
+        task_ids: List[int],
+) -> DefaultDict[Tuple[int, int, int], List[models.Flag]]:
+    """
+    Get flags with checker data generated for the tasks in the rounds.
+
+    :param rounds: rounds to fetch flags for
+    :param task_ids: ids of tasks to fetch flags for
+    :returns: lists of flags by (team_id, task_id, round)
+    """
+    result: DefaultDict[Tuple[int, int, int], List[models.Flag]] = defaultdict(list)
+    if not rounds or not task_ids:
+        return result
+
+    with utils.db_cursor(dict_cursor=True) as (_, curs):
+        curs.execute(
+            _SELECT_ROUNDS_FLAGS_QUERY,
+            {'rounds': rounds, 'task_ids': task_ids},
+        )
+        flags = curs.fetchall()
+
+    for data in flags:
+        flag = models.Flag.from_dict(data)
+        result[(flag.team_id, flag.task_id, flag.round)].append(flag)
+    return result
 
 
 def get_attack_data(
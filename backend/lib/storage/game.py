@@ -1,10 +1,11 @@
+import os
 import time
-from typing import Optional
+from typing import Optional, List
 
 from kombu.utils import json as kjson
 
 from lib import models, storage
-from lib.helpers.cache import cache_helper
+from lib.helpers.cache import InvalidatedValue
 from lib.storage import caching, utils
 from lib.storage.keys import CacheKeys
 
@@ -18,6 +19,8 @@ _GET_GAME_RUNNING_QUERY = 'SELECT game_running FROM GameConfig WHERE id=1'
 
 _GET_GAME_CONFIG_QUERY = 'SELECT * FROM GameConfig WHERE id=1'
 
+_local_subscriber_pid: Optional[int] = None
+
 
 def get_round_start(r: int) -> int:
     """Get start time for round as unix timestamp."""
@@ -33,16 +36,23 @@ def set_round_start(r: int) -> None:
         pipe.set(CacheKeys.round_start(r), cur_time).execute()
 
 
+def _get_cached_real_round() -> int:
+    with utils.redis_pipeline(transaction=False) as pipe:
+        r, = pipe.get(CacheKeys.current_round()).execute()
+
+    return int(r or -1)
+
+
 def get_real_round() -> int:
     """
     Get real round of system (for flag submitting).
 
+    Kept in process memory until the round is updated.
+
     :returns: -1 if round not in cache, else round
     """
-    with utils.redis_pipeline(transaction=False) as pipe:
-        r, = pipe.get(CacheKeys.current_round()).execute()
-
-    return int(r or -1)
+    _subscribe_local_cache()
+    return _local_real_round.get()
 
 
 def get_real_round_from_db() -> int:
@@ -67,6 +77,9 @@ def set_game_running(new_value: bool) -> None:
         curs.execute(_SET_GAME_RUNNING_QUERY, {'value': new_value})
         conn.commit()
 
+    caching.flush_game_config_cache()
+    _local_game_config.invalidate()
+
 
 def get_game_running() -> bool:
     """Get current game_running value from db."""
@@ -86,25 +99,74 @@ def get_db_game_config() -> models.GameConfig:
     return models.GameConfig.from_dict(result)
 
 
-def get_current_game_config() -> models.GameConfig:
-    """Get game config from cache is cached, cache it otherwise."""
-    with utils.redis_pipeline(transaction=True) as pipe:
-        cache_helper(
-            pipeline=pipe,
-            cache_key=CacheKeys.game_config(),
-            cache_func=caching.cache_game_config,
-            cache_args=(pipe,),
+def _get_cached_game_config() -> models.GameConfig:
+    key = CacheKeys.game_config()
+    result = utils.RedisStorage.get().get(key)
+    if result is None:
+        caching.ensure_cached(
+            cache_key=key,
+            cache_func=lambda pipe, _: caching.cache_game_config(pipe),
         )
-
-        result, = pipe.get(CacheKeys.game_config()).execute()
+        result = utils.RedisStorage.get().get(key)
 
     game_config = models.GameConfig.from_json(result)
     return game_config
 
 
+def get_current_game_config() -> models.GameConfig:
+    """
+    Get game config from cache is cached, cache it otherwise.
+
+    Kept in process memory until the config cache is flushed,
+    so the returned config must not be modified.
+    """
+    _subscribe_local_cache()
+    return _local_game_config.get()
+
+
+_local_real_round = InvalidatedValue(_get_cached_real_round)
+_local_game_config = InvalidatedValue(_get_cached_game_config)
+
+
+def _invalidate_local_cache(name: str) -> None:
+    if name in ('round', caching.ALL_CACHES):
+        _local_real_round.invalidate()
+    if name in ('game_config', caching.ALL_CACHES):
+        _local_game_config.invalidate()
+
+
+def _subscribe_local_cache() -> None:
+    """Drop values inherited from the parent process & listen for invalidations."""
+    global _local_subscriber_pid
+
+    if _local_subscriber_pid != os.getpid():
+        _local_subscriber_pid = os.getpid()
+        _invalidate_local_cache(caching.ALL_CACHES)
+        caching.subscribe_invalidation(_invalidate_local_cache)
+
+
+def apply_teamtasks_mirror(teamtasks: List[dict]) -> List[dict]:
+    """
+    Replace teamtasks scores with the ones from redis mirror in write-behind mode.
+
+    Database scores can lag behind the mirror by a few flushes of queued attacks.
+    """
+    if not get_current_game_config().write_behind_mode:
+        return teamtasks
+
+    mirror = storage.scores.get_teamtasks_scores()
+    for teamtask in teamtasks:
+        key = (int(teamtask['team_id']), int(teamtask['task_id']))
+        if key in mirror:
+            teamtask.update(mirror[key])
+
+    return teamtasks
+
+
 def construct_game_state_from_db(current_round: int) -> models.GameState:
     """Get game state for specified round with teamtasks from db."""
     teamtasks = storage.tasks.get_teamtasks_from_db()
+    teamtasks = apply_teamtasks_mirror(teamtasks)
     teamtasks = storage.tasks.filter_teamtasks_for_participants(teamtasks)
 
     team_ids = {team.id for team in storage.teams.get_teams()}
@@ -127,6 +189,7 @@ def construct_game_state_from_db(current_round: int) -> models.GameState:
 def construct_latest_game_state(current_round: int) -> models.GameState:
     """Get game state from latest teamtasks from redis stream."""
     teamtasks = storage.tasks.get_last_teamtasks()
+    teamtasks = apply_teamtasks_mirror(teamtasks)
     teamtasks = storage.tasks.filter_teamtasks_for_participants(teamtasks)
 
     round_start = get_round_start(current_round)
@@ -155,10 +218,11 @@ def construct_scoreboard() -> dict:
 
     teams = [team.to_dict_for_participants() for team in storage.teams.get_teams()]
     tasks = [task.to_dict_for_participants() for task in storage.tasks.get_tasks()]
-    cfg = storage.game.get_current_game_config().to_dict()
+    cfg = storage.game.get_current_game_config().to_dict_for_participants()
 
     state = get_cached_game_state()
     if state:
+        state.team_tasks = apply_teamtasks_mirror(state.team_tasks)
         state = state.to_dict()
 
     data = {
@@ -178,13 +242,14 @@ def construct_ctftime_scoreboard() -> Optional[list]:
         return None
 
     teams = storage.teams.get_teams()
+    team_tasks = apply_teamtasks_mirror(game_state.team_tasks)
 
     standings = []
     for team in teams:
         team_id = team.id
         teamtasks = list(filter(
             lambda x: x['team_id'] == team_id,
-            game_state.team_tasks,
+            team_tasks,
         ))
 
         score = sum(map(
@@ -210,8 +275,11 @@ def update_round(finished_round: int) -> None:
 
     with utils.redis_pipeline(transaction=False) as pipe:
         pipe.set(CacheKeys.current_round(), new_round)
+        pipe.publish(CacheKeys.cache_invalidation(), 'round')
         pipe.execute()
 
+    _local_real_round.invalidate()
+
 
 def update_attack_data(current_round: int) -> None:
     tasks = storage.tasks.get_tasks()
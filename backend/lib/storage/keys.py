@@ -1,6 +1,3 @@
-from typing import Union
-
-
 class CacheKeys:
     @staticmethod
     def round_start(r: int) -> str:
@@ -30,6 +27,10 @@ class CacheKeys:
     def team_stolen_flags(team_id: int) -> str:
         return f'team:{team_id}:stolen_flags'
 
+    @staticmethod
+    def team_submit_bucket(team_id: int) -> str:
+        return f'team:{team_id}:submit_bucket'
+
     @staticmethod
     def tasks() -> str:
         return 'tasks'
@@ -39,16 +40,36 @@ class CacheKeys:
         return 'flags:cached'
 
     @staticmethod
-    def flag_by_field(field: str, value: Union[str, int]):
-        return f'flag:{field}:{value}'
+    def new_flags() -> str:
+        return 'flags:new'
+
+    @staticmethod
+    def round_flags(r: int) -> str:
+        return f'round:{r}:flags'
+
+    @staticmethod
+    def round_flags_data(r: int) -> str:
+        return f'round:{r}:flags:data'
 
-    @classmethod
-    def flag_by_id(cls, flag_id: int) -> str:
-        return cls.flag_by_field('id', flag_id)
+    @staticmethod
+    def round_team_task_flags(r: int, team_id: int, task_id: int) -> str:
+        return f'round:{r}:flags:team:{team_id}:task:{task_id}'
+
+    @staticmethod
+    def verdict_rounds() -> str:
+        return 'verdicts:rounds'
+
+    @staticmethod
+    def round_verdicts(r: int) -> str:
+        return f'round:{r}:verdicts'
+
+    @staticmethod
+    def round_verdicts_expected(r: int) -> str:
+        return f'round:{r}:verdicts:expected'
 
-    @classmethod
-    def flag_by_str(cls, flag_str: str) -> str:
-        return cls.flag_by_field('str', flag_str)
+    @staticmethod
+    def round_verdicts_done(r: int) -> str:
+        return f'round:{r}:verdicts:done'
 
     @staticmethod
     def attack_data() -> str:
@@ -58,6 +79,38 @@ class CacheKeys:
     def teamtasks(team_id: int, task_id: int) -> str:
         return f'teamtasks:{team_id}:{task_id}'
 
+    @staticmethod
+    def teamtasks_scores() -> str:
+        return 'teamtasks:scores'
+
+    @staticmethod
+    def teamtasks_stolen() -> str:
+        return 'teamtasks:stolen'
+
+    @staticmethod
+    def teamtasks_lost() -> str:
+        return 'teamtasks:lost'
+
+    @staticmethod
+    def pending_attacks() -> str:
+        return 'attacks:pending'
+
+    @staticmethod
+    def cache_invalidation() -> str:
+        return 'cache:invalidation'
+
+    @staticmethod
+    def cache_lock(cache_key: str) -> str:
+        return f'{cache_key}:lock'
+
+    @staticmethod
+    def cache_generation(cache_key: str) -> str:
+        return f'{cache_key}:generation'
+
+    @staticmethod
+    def cache_ready(cache_key: str) -> str:
+        return f'{cache_key}:ready'
+
     @staticmethod
     def session(session_key: str) -> str:
         return f'session:{session_key}'
@@ -0,0 +1,352 @@
+from datetime import datetime, timezone
+from typing import List, Tuple, Optional, Dict, Any, Iterable
+
+from redis.exceptions import ResponseError
+
+from lib import models
+from lib.storage import caching, scripts, utils
+from lib.storage.keys import CacheKeys
+
+PENDING_ATTACKS_GROUP = 'attacks_writer'
+
+_INSERT_STOLEN_FLAGS_QUERY = """
+INSERT INTO StolenFlags (attacker_id, flag_id, submit_time)
+SELECT * FROM unnest(
+    %(attacker_ids)s::INTEGER[],
+    %(flag_ids)s::INTEGER[],
+    %(submit_times)s::TIMESTAMP WITH TIME ZONE[]
+)
+ON CONFLICT DO NOTHING
+RETURNING attacker_id, flag_id
+"""
+
+_RECONCILE_TEAMTASKS_QUERY = """
+UPDATE TeamTasks tt
+SET score  = tt.score + m.score,
+    stolen = tt.stolen + m.stolen,
+    lost   = tt.lost + m.lost
+FROM unnest(
+    %(team_ids)s::INTEGER[],
+    %(task_ids)s::INTEGER[],
+    %(scores)s::FLOAT[],
+    %(stolen)s::INTEGER[],
+    %(lost)s::INTEGER[]
+) AS m(team_id, task_id, score, stolen, lost)
+WHERE tt.team_id = m.team_id AND tt.task_id = m.task_id
+"""
+
+TeamTaskKey = Tuple[int, int]
+
+
+def _mirror_keys() -> List[str]:
+    return [
+        CacheKeys.teamtasks_scores(),
+        CacheKeys.teamtasks_stolen(),
+        CacheKeys.teamtasks_lost(),
+    ]
+
+
+def get_record_attacks_params(
+        attacker_id: int,
+        flags: List[models.Flag],
+        game_config: models.GameConfig,
+) -> Tuple[List[str], list]:
+    """Get keys & args for the attacks recording script."""
+    keys = [*_mirror_keys(), CacheKeys.pending_attacks()]
+    args = [game_config.game_hardness, int(game_config.inflation), attacker_id]
+    for flag in flags:
+        args.extend((flag.team_id, flag.task_id, flag.id))
+    return keys, args
+
+
+def parse_deltas(deltas: Optional[list]) -> List[Tuple[float, float]]:
+    if deltas is None:
+        raise ValueError('Teamtasks scores are missing in the database')
+    return [
+        (float(attacker_delta), float(victim_delta))
+        for attacker_delta, victim_delta in deltas
+    ]
+
+
+def record_attacks(
+        attacker_id: int,
+        flags: List[models.Flag],
+        game_config: models.GameConfig,
+) -> List[Tuple[float, float]]:
+    """
+    Write-behind version of "recalculate_rating_batch" database function.
+
+    Rating changes are calculated from the redis teamtasks mirror,
+    stolen flags are queued to be written to the database by "write_attacks".
+
+    :param attacker_id: id of the attacking team
+    :param flags: stolen flags, already marked in the stolen flags set
+    :param game_config: current game config
+    :returns: attacker and victim deltas for each flag
+    """
+    if not flags:
+        return []
+
+    keys, args = get_record_attacks_params(attacker_id, flags, game_config)
+    script = scripts.RecordAttacksScript.get()
+    deltas = script(keys=keys, args=args)
+    if deltas is None:
+        with utils.redis_pipeline(transaction=False) as pipe:
+            caching.cache_teamtasks_scores(pipe)
+            script(keys=keys, args=args, client=pipe)
+            *_, deltas = pipe.execute()
+
+    return parse_deltas(deltas)
+
+
+def _read_mirror(fields: Optional[List[str]]) -> Dict[str, list]:
+    with utils.redis_pipeline(transaction=True) as pipe:
+        if fields is None:
+            for mirror_key in _mirror_keys():
+                pipe.hgetall(mirror_key)
+            score, stolen, lost = pipe.execute()
+            return {
+                field: [score[field], stolen.get(field), lost.get(field)]
+                for field in score
+            }
+
+        if not fields:
+            return {}
+        for mirror_key in _mirror_keys():
+            pipe.hmget(mirror_key, fields)
+        values = pipe.execute()
+
+    return {
+        field: list(field_values)
+        for field, *field_values in zip(fields, *values)
+        if field_values[0] is not None
+    }
+
+
+def get_teamtasks_scores(
+        keys: Optional[Iterable[TeamTaskKey]] = None,
+) -> Dict[TeamTaskKey, Dict[str, Any]]:
+    """
+    Get score, stolen & lost of teamtasks from the redis mirror.
+
+    :param keys: (team id, task id) pairs to get, all teamtasks by default
+    :returns: dictionary of teamtask data by (team id, task id)
+    """
+    fields = None
+    if keys is not None:
+        fields = [f'{team_id}:{task_id}' for team_id, task_id in keys]
+
+    data = _read_mirror(fields)
+    if fields is None and not data:
+        with utils.redis_pipeline(transaction=False) as pipe:
+            caching.cache_teamtasks_scores(pipe)
+            pipe.execute()
+        data = _read_mirror(fields)
+
+    result = {}
+    for field, (score, stolen, lost) in data.items():
+        team_id, task_id = map(int, field.split(':'))
+        result[team_id, task_id] = {
+            'score': float(score),
+            'stolen': int(stolen or 0),
+            'lost': int(lost or 0),
+        }
+    return result
+
+
+def sum_teamtasks_deltas(
+        attacks: Iterable[Tuple[int, int, int, float, float]],
+) -> Dict[TeamTaskKey, Dict[str, Any]]:
+    """
+    Sum the changes of the teamtasks made by the attacks.
+
+    :param attacks: (attacker id, victim id, task id, attacker delta, victim delta)
+    :returns: dictionary of score, stolen & lost changes by (team id, task id)
+    """
+    teamtasks: Dict[TeamTaskKey, Dict[str, Any]] = {}
+    for attacker_id, victim_id, task_id, attacker_delta, victim_delta in attacks:
+        for key, delta, counter in (
+                ((attacker_id, task_id), attacker_delta, 'stolen'),
+                ((victim_id, task_id), victim_delta, 'lost'),
+        ):
+            teamtask = teamtasks.setdefault(key, {'score': 0.0, 'stolen': 0, 'lost': 0})
+            teamtask['score'] += delta
+            teamtask[counter] += 1
+    return teamtasks
+
+
+def reconcile_teamtasks(
+        curs,
+        teamtasks: Dict[TeamTaskKey, Dict[str, Any]],
+) -> None:
+    """
+    Add the teamtasks changes to the database.
+
+    Changes are applied in (team id, task id) order, so concurrent
+    reconciliations can't deadlock.
+    """
+    if not teamtasks:
+        return
+
+    keys = sorted(teamtasks)
+    curs.execute(
+        _RECONCILE_TEAMTASKS_QUERY,
+        {
+            'team_ids': [team_id for team_id, _ in keys],
+            'task_ids': [task_id for _, task_id in keys],
+            'scores': [teamtasks[key]['score'] for key in keys],
+            'stolen': [teamtasks[key]['stolen'] for key in keys],
+            'lost': [teamtasks[key]['lost'] for key in keys],
+        },
+    )
+
+
+def get_apply_deltas_params(
+        attacker_id: int,
+        flags: List[models.Flag],
+        deltas: List[Tuple[Optional[float], Optional[float]]],
+) -> Tuple[List[str], list]:
+    """
+    Get keys & args for the script applying rating changes to the mirror.
+
+    Flags with None deltas weren't credited and are skipped.
+    """
+    teamtasks = sum_teamtasks_deltas(
+        (attacker_id, flag.team_id, flag.task_id, attacker_delta, victim_delta)
+        for flag, (attacker_delta, victim_delta) in zip(flags, deltas)
+        if attacker_delta is not None
+    )
+    args = []
+    for (team_id, task_id), teamtask in teamtasks.items():
+        args.extend((
+            f'{team_id}:{task_id}',
+            repr(teamtask['score']),
+            teamtask['stolen'],
+            teamtask['lost'],
+        ))
+    return _mirror_keys(), args
+
+
+def apply_deltas(
+        attacker_id: int,
+        flags: List[models.Flag],
+        deltas: List[Tuple[Optional[float], Optional[float]]],
+) -> None:
+    """
+    Apply rating changes of the attacks written to the database to the mirror.
+
+    Keeps the mirror up to date when the attacks are not recorded
+    by "record_attacks", so it can be read at any time.
+
+    :param attacker_id: id of the attacking team
+    :param flags: stolen flags
+    :param deltas: attacker and victim deltas for each flag
+    """
+    keys, args = get_apply_deltas_params(attacker_id, flags, deltas)
+    if args:
+        scripts.ApplyScoresDeltasScript.get()(keys=keys, args=args)
+
+
+def create_pending_attacks_group() -> None:
+    """Create the pending attacks stream consumer group if it doesn't exist."""
+    try:
+        utils.RedisStorage.get().xgroup_create(
+            name=CacheKeys.pending_attacks(),
+            groupname=PENDING_ATTACKS_GROUP,
+            id='0',
+            mkstream=True,
+        )
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def read_pending_attacks(
+        consumer: str,
+        count: int,
+        block: Optional[int] = None,
+        replay: bool = False,
+) -> List[Tuple[str, dict]]:
+    """
+    Read queued attacks from the stream.
+
+    :param consumer: consumer name in the writers group
+    :param count: maximum number of attacks to read
+    :param block: milliseconds to wait for new attacks
+    :param replay: read attacks delivered to the consumer earlier,
+                   but not written, instead of new ones
+    :returns: list of (stream entry id, attack data)
+    """
+    data = utils.RedisStorage.get().xreadgroup(
+        groupname=PENDING_ATTACKS_GROUP,
+        consumername=consumer,
+        streams={CacheKeys.pending_attacks(): '0' if replay else '>'},
+        count=count,
+        block=None if replay else block,
+    )
+    if not data:
+        return []
+
+    _, entries = data[0]
+    return entries
+
+
+def write_attacks(entries: List[Tuple[str, dict]]) -> int:
+    """
+    Write queued attacks to database in one transaction & remove them from queue.
+
+    Stolen flags already written are skipped, so the entries can be
+    safely replayed after a crash. Rating changes of the written attacks
+    are added to the teamtasks in the same transaction.
+
+    :returns: number of stolen flags written
+    """
+    # entries deleted before the crash are still delivered on replay, but empty
+    attacks = [(entry_id, data) for entry_id, data in entries if data]
+    written = 0
+
+    if attacks:
+        with utils.db_cursor() as (conn, curs):
+            curs.execute(
+                _INSERT_STOLEN_FLAGS_QUERY,
+                {
+                    'attacker_ids': [int(data['attacker_id']) for _, data in attacks],
+                    'flag_ids': [int(data['flag_id']) for _, data in attacks],
+                    'submit_times': [_entry_time(entry_id) for entry_id, _ in attacks],
+                },
+            )
+            inserted = set(curs.fetchall())
+            written = len(inserted)
+
+            credited = []
+            for _, data in attacks:
+                stolen_flag = (int(data['attacker_id']), int(data['flag_id']))
+                # only the first of the duplicate entries is written
+                if stolen_flag not in inserted:
+                    continue
+                inserted.remove(stolen_flag)
+                credited.append((
+                    int(data['attacker_id']),
+                    int(data['victim_id']),
+                    int(data['task_id']),
+                    float(data['attacker_delta']),
+                    float(data['victim_delta']),
+                ))
+
+            reconcile_teamtasks(curs, sum_teamtasks_deltas(credited))
+            conn.commit()
+
+    entry_ids = [entry_id for entry_id, _ in entries]
+    key = CacheKeys.pending_attacks()
+    with utils.redis_pipeline(transaction=True) as pipe:
+        pipe.xack(key, PENDING_ATTACKS_GROUP, *entry_ids)
+        pipe.xdel(key, *entry_ids)
+        pipe.execute()
+
+    return written
+
+
+def _entry_time(entry_id: str) -> datetime:
+    """Stream entry ids start with the unix time in milliseconds."""
+    ms = int(entry_id.split('-')[0])
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
@@ -0,0 +1,271 @@
+from redis.commands.core import Script
+
+from lib.helpers.singleton import Singleton
+from lib.storage import utils
+
+# Flag ids start from 1, so this member can't clash with a real flag.
+# It marks the stolen flags set as cached even if the team stole nothing.
+STOLEN_FLAGS_PLACEHOLDER = 0
+
+MARK_STOLEN_FLAGS_SCRIPT = """
+-- KEYS[1]: attacker's stolen flags set
+-- ARGV: attacker id, current round, flag lifetime,
+--       then (flag id, flag team id, flag round) for each flag
+-- Returns nil if the stolen flags set is not cached, otherwise a status
+-- for each flag: 1 stolen, 0 already stolen, -1 own flag, -2 too old.
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+
+local attacker = tonumber(ARGV[1])
+local current_round = tonumber(ARGV[2])
+local flag_lifetime = tonumber(ARGV[3])
+
+local result = {}
+for i = 4, #ARGV, 3 do
+    local team_id = tonumber(ARGV[i + 1])
+    local round = tonumber(ARGV[i + 2])
+    if team_id == attacker then
+        result[#result + 1] = -1
+    elseif current_round - round > flag_lifetime then
+        result[#result + 1] = -2
+    else
+        result[#result + 1] = redis.call('SADD', KEYS[1], ARGV[i])
+    end
+end
+return result
+"""
+
+FILL_STOLEN_FLAGS_SCRIPT = """
+-- KEYS[1]: team's stolen flags set
+-- ARGV: placeholder, then ids of flags stolen by the team
+-- Fills the set only if it's missing, so a concurrent fill
+-- can't drop the flags marked after the database was queried.
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+
+for i = 1, #ARGV, 1000 do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+return 1
+"""
+
+TAKE_SUBMIT_TOKENS_SCRIPT = """
+-- KEYS[1]: team's submit token bucket hash
+-- ARGV: rate (tokens per second), burst, tokens requested
+-- Takes at most the requested number of whole tokens from the bucket.
+-- Bucket is refilled by redis server time, so the receivers' clocks don't matter.
+-- Returns the number of tokens taken and, if less than requested,
+-- milliseconds until the rest of the request fits into the bucket.
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+if now > ts then
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+end
+
+local taken = math.min(requested, math.floor(tokens))
+tokens = tokens - taken
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+
+local retry_after = 0
+if taken < requested then
+    local missing = math.min(requested - taken, burst) - tokens
+    retry_after = math.ceil(missing / rate * 1000)
+end
+return {taken, retry_after}
+"""
+
+RECORD_ATTACKS_SCRIPT = """
+-- KEYS[1], KEYS[2], KEYS[3]: teamtasks score, stolen and lost hashes
+-- KEYS[4]: pending attacks stream
+-- ARGV: game hardness, inflation (1 or 0), attacker id,
+--       then (victim id, task id, flag id) for each stolen flag
+-- Calculates rating changes like recalculate_rating function does,
+-- updates the teamtasks and queues the stolen flags with the rating changes
+-- to be written to the database.
+-- Returns nil if some of the scores are not cached, otherwise
+-- attacker and victim deltas for each flag as strings.
+local hardness = tonumber(ARGV[1])
+local inflation = ARGV[2] == '1'
+local attacker = ARGV[3]
+
+for i = 4, #ARGV, 3 do
+    local task = ARGV[i + 1]
+    if redis.call('HEXISTS', KEYS[1], attacker .. ':' .. task) == 0 or
+            redis.call('HEXISTS', KEYS[1], ARGV[i] .. ':' .. task) == 0 then
+        return nil
+    end
+end
+
+local scale = 50 * math.sqrt(hardness)
+local norm = math.log(math.log(hardness)) / 12
+
+local result = {}
+for i = 4, #ARGV, 3 do
+    local victim = ARGV[i]
+    local task = ARGV[i + 1]
+    local attacker_field = attacker .. ':' .. task
+    local victim_field = victim .. ':' .. task
+
+    local attacker_score = tonumber(redis.call('HGET', KEYS[1], attacker_field))
+    local victim_score = tonumber(redis.call('HGET', KEYS[1], victim_field))
+
+    local sqrt_diff = math.sqrt(attacker_score) - math.sqrt(victim_score)
+    local attacker_delta = scale / (1 + math.exp(sqrt_diff * norm))
+    local victim_delta = -math.min(victim_score, attacker_delta)
+    if not inflation then
+        attacker_delta = math.min(attacker_delta, -victim_delta)
+    end
+
+    -- %.17g keeps doubles exact, Lua numbers are truncated on return
+    local attacker_delta_str = string.format('%.17g', attacker_delta)
+    local victim_delta_str = string.format('%.17g', victim_delta)
+    redis.call(
+        'HSET', KEYS[1],
+        attacker_field, string.format('%.17g', attacker_score + attacker_delta),
+        victim_field, string.format('%.17g', victim_score + victim_delta)
+    )
+    redis.call('HINCRBY', KEYS[2], attacker_field, 1)
+    redis.call('HINCRBY', KEYS[3], victim_field, 1)
+    redis.call(
+        'XADD', KEYS[4], '*',
+        'attacker_id', attacker,
+        'victim_id', victim,
+        'task_id', task,
+        'flag_id', ARGV[i + 2],
+        'attacker_delta', attacker_delta_str,
+        'victim_delta', victim_delta_str
+    )
+    result[#result + 1] = {attacker_delta_str, victim_delta_str}
+end
+return result
+"""
+
+FILL_SCORES_SCRIPT = """
+-- KEYS[1], KEYS[2], KEYS[3]: teamtasks score, stolen and lost hashes
+-- ARGV: ("team_id:task_id", score, stolen, lost) from the database
+-- Only adds missing teamtasks, so the ones changed by attacks are kept.
+for i = 1, #ARGV, 4 do
+    redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1])
+    redis.call('HSETNX', KEYS[2], ARGV[i], ARGV[i + 2])
+    redis.call('HSETNX', KEYS[3], ARGV[i], ARGV[i + 3])
+end
+return 1
+"""
+
+APPLY_SCORES_DELTAS_SCRIPT = """
+-- KEYS[1], KEYS[2], KEYS[3]: teamtasks score, stolen and lost hashes
+-- ARGV: ("team_id:task_id", score delta, stolen delta, lost delta)
+-- Applies the changes already written to the database to the mirror.
+-- Teamtasks missing in the mirror are skipped, they're filled
+-- from the database with the changes included.
+for i = 1, #ARGV, 4 do
+    if redis.call('HEXISTS', KEYS[1], ARGV[i]) == 1 then
+        redis.call('HINCRBYFLOAT', KEYS[1], ARGV[i], ARGV[i + 1])
+        redis.call('HINCRBY', KEYS[2], ARGV[i], ARGV[i + 2])
+        redis.call('HINCRBY', KEYS[3], ARGV[i], ARGV[i + 3])
+    end
+end
+return 1
+"""
+
+RELEASE_CACHE_LOCK_SCRIPT = """
+-- KEYS[1]: cache build lock
+-- ARGV[1]: token the lock was taken with
+-- Deletes the lock only if it's still held with the same token,
+-- so a builder can't release the lock that expired & was taken by another.
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+GET_RANDOM_ROUND_FLAG_SCRIPT = """
+-- KEYS[1]: flags cached marker
+-- KEYS[2]: ids of the team's flags of the task generated in the round
+-- KEYS[3]: checker data of the round flags by id
+-- Returns nil if the flags are not cached, otherwise json of a random flag
+-- from the set, or an empty string if the set is empty.
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+
+local flag_id = redis.call('SRANDMEMBER', KEYS[2])
+if not flag_id then
+    return ''
+end
+return redis.call('HGET', KEYS[3], flag_id) or ''
+"""
+
+
+class MarkStolenFlagsScript(Singleton[Script]):
+    """Atomically validates flags and adds them to the stolen flags set."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(MARK_STOLEN_FLAGS_SCRIPT)
+
+
+class FillStolenFlagsScript(Singleton[Script]):
+    """Initializes the stolen flags set if it's not cached yet."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(FILL_STOLEN_FLAGS_SCRIPT)
+
+
+class TakeSubmitTokensScript(Singleton[Script]):
+    """Token bucket limiting the flag submission rate of a team."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(TAKE_SUBMIT_TOKENS_SCRIPT)
+
+
+class RecordAttacksScript(Singleton[Script]):
+    """Updates the teamtasks mirror and queues attacks for write-behind."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(RECORD_ATTACKS_SCRIPT)
+
+
+class FillScoresScript(Singleton[Script]):
+    """Adds missing teamtasks to the mirror."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(FILL_SCORES_SCRIPT)
+
+
+class ApplyScoresDeltasScript(Singleton[Script]):
+    """Applies the rating changes written to the database to the mirror."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(APPLY_SCORES_DELTAS_SCRIPT)
+
+
+class ReleaseCacheLockScript(Singleton[Script]):
+    """Releases the cache build lock if it's held with the token."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(RELEASE_CACHE_LOCK_SCRIPT)
+
+
+class GetRandomRoundFlagScript(Singleton[Script]):
+    """Picks a random cached flag of the team's task from the round."""
+
+    @staticmethod
+    def create() -> Script:
+        return utils.RedisStorage.get().register_script(GET_RANDOM_ROUND_FLAG_SCRIPT)
@@ -1,9 +1,8 @@
 from typing import List, Optional
 
 from lib import models, storage
-from lib.helpers.cache import cache_helper
 from lib.models import TaskStatus, Action
-from lib.storage import caching
+from lib.storage import caching, utils
 from lib.storage.keys import CacheKeys
 
 _SELECT_TEAMTASKS_QUERY = "SELECT * from TeamTasks"
@@ -30,7 +29,9 @@ UNION SELECT * FROM logged_teamtasks
 ORDER BY id DESC
 '''
 
-_INSERT_TEAMTASKS_TO_LOG_QUERY = '''
+_INSERT_TEAMTASKS_TO_LOG_QUERY = utils.PreparedQuery(
+    name='insert_teamtasks_to_log',
+    query='''
 INSERT INTO TeamTasksLog
 (round, task_id, team_id, status, stolen, lost, score, checks, checks_passed,
 public_message, private_message, command)
@@ -40,9 +41,12 @@ FROM TeamTasks
 WHERE
 team_id = %(team_id)s AND task_id = %(task_id)s
 FOR NO KEY UPDATE
-'''
+''',
+)
 
-_UPDATE_TEAMTASKS_QUERY = '''
+_UPDATE_TEAMTASKS_QUERY = utils.PreparedQuery(
+    name='update_teamtasks',
+    query='''
 UPDATE TeamTasks
 SET status = %(status)s,
     public_message = %(public_message)s,
@@ -53,23 +57,24 @@ SET status = %(status)s,
 WHERE
 team_id = %(team_id)s AND task_id = %(task_id)s
 RETURNING *
-'''
+''',
+)
 
 
 def get_tasks() -> List[models.Task]:
     """Get list of tasks registered in database."""
     key = CacheKeys.tasks()
-    with storage.utils.redis_pipeline(transaction=True) as pipe:
-        cache_helper(
-            pipeline=pipe,
+    with storage.utils.redis_pipeline(transaction=False) as pipe:
+        cached, tasks = pipe.exists(key).smembers(key).execute()
+
+    if not cached:
+        caching.ensure_cached(
             cache_key=key,
-            cache_func=caching.cache_tasks,
-            cache_args=(pipe,),
+            cache_func=lambda pipe, _: caching.cache_tasks(pipe),
         )
+        tasks = storage.utils.RedisStorage.get().smembers(key)
 
-        tasks, = pipe.smembers(key).execute()
-        tasks = list(models.Task.from_json(task) for task in tasks)
-
+    tasks = list(models.Task.from_json(task) for task in tasks)
     return tasks
 
 
@@ -116,8 +121,8 @@ def update_task_status(
     }
 
     with storage.utils.db_cursor(dict_cursor=True) as (conn, curs):
-        curs.execute(_INSERT_TEAMTASKS_TO_LOG_QUERY, params)
-        curs.execute(_UPDATE_TEAMTASKS_QUERY, params)
+        _INSERT_TEAMTASKS_TO_LOG_QUERY.execute(curs, params)
+        _UPDATE_TEAMTASKS_QUERY.execute(curs, params)
         data = curs.fetchone()
         conn.commit()
 
@@ -2,24 +2,23 @@ from typing import List, Optional
 
 from lib import models
 from lib import storage
-from lib.helpers.cache import cache_helper
 from lib.storage.keys import CacheKeys
 
 
 def get_teams() -> List[models.Team]:
     """Get list of active teams."""
     key = CacheKeys.teams()
-    with storage.utils.redis_pipeline(transaction=True) as pipe:
-        cache_helper(
-            pipeline=pipe,
+    with storage.utils.redis_pipeline(transaction=False) as pipe:
+        cached, teams = pipe.exists(key).smembers(key).execute()
+
+    if not cached:
+        storage.caching.ensure_cached(
             cache_key=key,
-            cache_func=storage.caching.cache_teams,
-            cache_args=(pipe,),
+            cache_func=lambda pipe, _: storage.caching.cache_teams(pipe),
         )
+        teams = storage.utils.RedisStorage.get().smembers(key)
 
-        teams, = pipe.smembers(key).execute()
-        teams = list(models.Team.from_json(team) for team in teams)
-
+    teams = list(models.Team.from_json(team) for team in teams)
     return teams
 
 
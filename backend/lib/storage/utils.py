@@ -1,21 +1,103 @@
+import re
+import threading
+import time
 from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set
 
 import kombu
 import redis
 import socketio
 from lib import config
 from lib.helpers.singleton import Singleton
-from psycopg2 import extras, pool
-
-
-class DBPool(Singleton[pool.SimpleConnectionPool]):
+from prometheus_client import Gauge, Histogram
+from psycopg2 import extensions, extras, pool
+
+DB_POOL_IN_USE = Gauge(
+    'db_pool_connections_in_use',
+    'Database connections taken from the pool',
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a free database connection',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+
+
+class PooledConnection(extensions.connection):
+    """Connection remembering the statements prepared in its session."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """
+    Thread-safe connection pool waiting for a free connection.
+
+    ThreadedConnectionPool raises PoolError if all connections are taken,
+    here the caller waits for at most "timeout" seconds instead.
+    Idle connections aren't closed until the pool is.
+    Locks are created from the threading module, so the pool is
+    green thread-safe if it's monkey-patched.
+
+    Without "prepare_statements" plain connections are created,
+    and PreparedQuery runs its query as is.
+    """
+
+    def __init__(
+            self,
+            minconn: int,
+            maxconn: int,
+            timeout: float,
+            prepare_statements: bool = True,
+            **kwargs: Any,
+    ):
+        if prepare_statements:
+            kwargs['connection_factory'] = PooledConnection
+        super().__init__(minconn, maxconn, **kwargs)
+        # "minconn" connections are opened at once, but all returned ones
+        # are kept open instead, so their prepared statements are reused
+        self.minconn = maxconn
+        self._timeout = timeout
+        self._free_slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key: Any = None) -> PooledConnection:
+        start = time.monotonic()
+        if not self._free_slots.acquire(timeout=self._timeout):
+            raise pool.PoolError(
+                f'no database connection became free in {self._timeout}s',
+            )
+        DB_POOL_WAIT.observe(time.monotonic() - start)
+
+        try:
+            conn = super().getconn(key)
+        except Exception:
+            self._free_slots.release()
+            raise
+        DB_POOL_IN_USE.inc()
+        return conn
+
+    def putconn(self, conn: Any = None, key: Any = None, close: bool = False) -> None:
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            DB_POOL_IN_USE.dec()
+            self._free_slots.release()
+
+
+class DBPool(Singleton[BlockingConnectionPool]):
 
     @staticmethod
-    def create() -> pool.SimpleConnectionPool:
+    def create() -> BlockingConnectionPool:
         database_config = config.get_db_config()
-        return pool.SimpleConnectionPool(
-            minconn=5,
-            maxconn=20,
+        pool_config = config.get_db_pool_config()
+        return BlockingConnectionPool(
+            minconn=pool_config.pool_min_size,
+            maxconn=pool_config.pool_max_size,
+            timeout=pool_config.pool_timeout,
+            prepare_statements=not pool_config.transaction_pooling,
             **database_config.model_dump(),
         )
 
@@ -60,20 +142,64 @@ class BrokerConnection(Singleton[kombu.Connection]):
 
 
 @contextmanager
-def db_cursor(dict_cursor: bool = False):  # type: ignore
+def db_cursor(dict_cursor: bool = False, name: Optional[str] = None):  # type: ignore
+    """Get pooled connection & cursor, server-side one if "name" is passed."""
     db_pool = DBPool.get()
     conn = db_pool.getconn()
     if dict_cursor:
-        curs = conn.cursor(cursor_factory=extras.RealDictCursor)
+        curs = conn.cursor(name=name, cursor_factory=extras.RealDictCursor)
     else:
-        curs = conn.cursor()
+        curs = conn.cursor(name=name)
     try:
         yield conn, curs
     finally:
         curs.close()
+        if name is not None:
+            # server-side cursors live in a transaction, don't leave it open
+            conn.rollback()
         db_pool.putconn(conn)
 
 
 def redis_pipeline(transaction: bool = True) -> redis.client.Pipeline:
     storage = RedisStorage.get()
     return storage.pipeline(transaction=transaction)
+
+
+class PreparedQuery:
+    """
+    Query prepared once in each pooled connection and run with EXECUTE after.
+
+    The query is written with %(name)s placeholders as the plain ones,
+    parameter types are inferred by the database. Connections not tracking
+    prepared statements (behind a transaction pooler) run the plain query.
+    """
+
+    def __init__(self, name: str, query: str):
+        self.name = name
+        self._query = query
+        self._params: List[str] = []
+        statement = re.sub(r'%\((\w+)\)s', self._replace_param, query)
+        self._prepare_query = f'PREPARE {name} AS {statement}'
+
+        self._execute_query = f'EXECUTE {name}'
+        if self._params:
+            placeholders = ', '.join(['%s'] * len(self._params))
+            self._execute_query += f'({placeholders})'
+
+    def _replace_param(self, match: re.Match) -> str:
+        param = match.group(1)
+        if param not in self._params:
+            self._params.append(param)
+        return f'${self._params.index(param) + 1}'
+
+    def execute(self, curs: Any, params: Dict[str, Any]) -> None:
+        """Execute the query with the cursor of a pooled connection."""
+        prepared = getattr(curs.connection, 'prepared', None)
+        if prepared is None:
+            curs.execute(self._query, params)
+            return
+
+        if self.name not in prepared:
+            curs.execute(self._prepare_query)
+            prepared.add(self.name)
+        curs.execute(self._execute_query, [params[param] for param in self._params])
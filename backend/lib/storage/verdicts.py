@@ -0,0 +1,154 @@
+from typing import Iterable, List, Set, Tuple
+
+from lib import models
+from lib.models import Action, TaskStatus
+from lib.storage import utils
+from lib.storage.keys import CacheKeys
+
+# round verdicts keys are deleted when the round is aggregated,
+# expiration only cleans up after the rounds that never were
+VERDICTS_EXPIRE = 60 * 60
+
+RoundVerdict = Tuple[int, int, models.CheckerVerdict, bool]
+
+
+def _team_task(team_id: int, task_id: int) -> str:
+    return f'{team_id}:{task_id}'
+
+
+def _parse_team_task(value: str) -> Tuple[int, int]:
+    team_id, task_id = value.split(':')
+    return int(team_id), int(task_id)
+
+
+def open_round(r: int, team_tasks: Iterable[Tuple[int, int]], deadline: float) -> None:
+    """
+    Register the round's team tasks to be aggregated from the reported verdicts.
+
+    :param r: round
+    :param team_tasks: (team id, task id) pairs checked in the round
+    :param deadline: timestamp after which the missing verdicts aren't waited for
+    """
+    members = [_team_task(team_id, task_id) for team_id, task_id in team_tasks]
+    if not members:
+        return
+
+    expected_key = CacheKeys.round_verdicts_expected(r)
+    with utils.redis_pipeline(transaction=True) as pipe:
+        pipe.delete(expected_key)
+        pipe.sadd(expected_key, *members)
+        pipe.expire(expected_key, VERDICTS_EXPIRE)
+        pipe.zadd(CacheKeys.verdict_rounds(), {str(r): deadline})
+        pipe.execute()
+
+
+def add_round_verdict(
+        r: int,
+        team_id: int,
+        task_id: int,
+        verdict: models.CheckerVerdict,
+        final: bool = False,
+) -> None:
+    """
+    Report the action's verdict to the round's verdicts stream.
+
+    :param r: round
+    :param team_id: team id
+    :param task_id: task id
+    :param verdict: verdict of the action
+    :param final: the verdict is the result of the team task
+                  (e.g. the action failed with exception)
+    """
+    key = CacheKeys.round_verdicts(r)
+    with utils.redis_pipeline(transaction=True) as pipe:
+        pipe.xadd(key, {
+            'team_id': team_id,
+            'task_id': task_id,
+            'final': int(final),
+            'action': verdict.action.value,
+            'status': verdict.status.value,
+            'public_message': verdict.public_message,
+            'private_message': verdict.private_message,
+            'command': verdict.command,
+        })
+        pipe.expire(key, VERDICTS_EXPIRE)
+        pipe.execute()
+
+
+def get_open_rounds() -> List[Tuple[int, float]]:
+    """Get the rounds with verdicts not aggregated yet with their deadlines."""
+    rounds = utils.RedisStorage.get().zrange(
+        CacheKeys.verdict_rounds(), 0, -1, withscores=True,
+    )
+    return [(int(r), deadline) for r, deadline in rounds]
+
+
+def get_round_team_tasks(r: int) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+    """
+    Get the team tasks checked in the round.
+
+    :returns: (team id, task id) pairs expected & already aggregated
+    """
+    with utils.redis_pipeline(transaction=False) as pipe:
+        expected, done = (
+            pipe
+            .smembers(CacheKeys.round_verdicts_expected(r))
+            .smembers(CacheKeys.round_verdicts_done(r))
+            .execute()
+        )
+    return (
+        {_parse_team_task(value) for value in expected},
+        {_parse_team_task(value) for value in done},
+    )
+
+
+def read_round_verdicts(r: int, last_id: str) -> Tuple[str, List[RoundVerdict]]:
+    """
+    Read the verdicts reported to the round's stream after the last read one.
+
+    :param r: round
+    :param last_id: id of the last read stream entry, "0" to read from start
+    :returns: id of the last entry & (team id, task id, verdict, final) tuples
+    """
+    response = utils.RedisStorage.get().xread({CacheKeys.round_verdicts(r): last_id})
+    if not response:
+        return last_id, []
+
+    _, entries = response[0]
+    verdicts = []
+    for _, fields in entries:
+        verdict = models.CheckerVerdict(
+            action=Action(int(fields['action'])),
+            status=TaskStatus(int(fields['status'])),
+            public_message=fields['public_message'],
+            private_message=fields['private_message'],
+            command=fields['command'],
+        )
+        verdicts.append((
+            int(fields['team_id']),
+            int(fields['task_id']),
+            verdict,
+            fields['final'] == '1',
+        ))
+    return entries[-1][0], verdicts
+
+
+def set_team_task_done(r: int, team_id: int, task_id: int) -> None:
+    """Mark the team task as aggregated, so it's not saved again."""
+    key = CacheKeys.round_verdicts_done(r)
+    with utils.redis_pipeline(transaction=True) as pipe:
+        pipe.sadd(key, _team_task(team_id, task_id))
+        pipe.expire(key, VERDICTS_EXPIRE)
+        pipe.execute()
+
+
+def close_round(r: int) -> None:
+    """Remove the aggregated round with its verdicts."""
+    with utils.redis_pipeline(transaction=True) as pipe:
+        pipe.zrem(CacheKeys.verdict_rounds(), str(r))
+        pipe.delete(
+            CacheKeys.round_verdicts(r),
+            CacheKeys.round_verdicts_expected(r),
+            CacheKeys.round_verdicts_done(r),
+        )
+        pipe.execute()
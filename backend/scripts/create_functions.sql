@@ -77,6 +77,100 @@ END;
 $$ LANGUAGE plpgsql ROWS 1;
 
 
+CREATE OR REPLACE FUNCTION recalculate_rating_batch(_attacker_ids INTEGER[], _victim_ids INTEGER[],
+                                                    _task_ids INTEGER[], _flag_ids INTEGER[])
+    RETURNS TABLE
+            (
+                attacker_delta FLOAT,
+                victim_delta   FLOAT
+            )
+AS
+$$
+DECLARE
+    _round          INTEGER;
+    hardness        FLOAT;
+    inflate         BOOLEAN;
+    scale           FLOAT;
+    norm            FLOAT;
+    attacker_score  FLOAT;
+    victim_score    FLOAT;
+    _attacker_delta FLOAT;
+    _victim_delta   FLOAT;
+    attack          RECORD;
+BEGIN
+    SELECT real_round, game_hardness, inflation FROM GameConfig WHERE id = 1 INTO _round, hardness, inflate;
+
+--     avoid deadlocks by locking all affected rows at once in (task_id, team_id) order,
+--     which is consistent with the order used in recalculate_rating
+    PERFORM 1
+    FROM TeamTasks tt
+    WHERE (tt.team_id, tt.task_id) IN (SELECT unnest(_attacker_ids), unnest(_task_ids)
+                                       UNION
+                                       SELECT unnest(_victim_ids), unnest(_task_ids))
+    ORDER BY tt.task_id, tt.team_id
+        FOR NO KEY UPDATE;
+
+    scale = 50 * sqrt(hardness);
+    norm = ln(ln(hardness)) / 12;
+
+--     apply attacks one by one in the passed order, so deltas are the same
+--     as for sequential recalculate_rating calls
+    FOR attack IN SELECT *
+                  FROM unnest(_attacker_ids, _victim_ids, _task_ids, _flag_ids)
+                           WITH ORDINALITY AS a(attacker_id, victim_id, task_id, flag_id, n)
+                  ORDER BY n
+        LOOP
+            SELECT score
+            FROM TeamTasks
+            WHERE team_id = attack.attacker_id
+              AND task_id = attack.task_id
+            INTO attacker_score;
+
+            SELECT score
+            FROM TeamTasks
+            WHERE team_id = attack.victim_id
+              AND task_id = attack.task_id
+            INTO victim_score;
+
+            _attacker_delta = scale / (1 + exp((sqrt(attacker_score) - sqrt(victim_score)) * norm));
+            _victim_delta = -least(victim_score, _attacker_delta);
+
+            IF NOT inflate THEN
+                _attacker_delta = least(_attacker_delta, -_victim_delta);
+            END IF;
+
+--             flag may be already credited, e.g. if the stolen flags set was lost,
+--             then it's reported with null deltas and the scores are left as is
+            INSERT INTO StolenFlags (attacker_id, flag_id)
+            VALUES (attack.attacker_id, attack.flag_id)
+            ON CONFLICT DO NOTHING;
+
+            IF NOT FOUND THEN
+                attacker_delta := NULL;
+                victim_delta := NULL;
+                RETURN NEXT;
+                CONTINUE;
+            END IF;
+
+            UPDATE TeamTasks
+            SET stolen = stolen + 1,
+                score  = score + _attacker_delta
+            WHERE team_id = attack.attacker_id
+              AND task_id = attack.task_id;
+
+            UPDATE TeamTasks
+            SET lost  = lost + 1,
+                score = score + _victim_delta
+            WHERE team_id = attack.victim_id
+              AND task_id = attack.task_id;
+
+            attacker_delta := _attacker_delta;
+            victim_delta := _victim_delta;
+            RETURN NEXT;
+        END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE OR REPLACE FUNCTION get_first_bloods()
     RETURNS TABLE
             (
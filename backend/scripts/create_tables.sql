@@ -7,6 +7,11 @@ CREATE TABLE IF NOT EXISTS GameConfig
     game_hardness      FLOAT CHECK ( game_hardness >= 1 ),
     inflation          BOOLEAN,
     volga_attacks_mode BOOLEAN,
+    flag_rate_limit    FLOAT       DEFAULT 0 CHECK ( flag_rate_limit >= 0 ),
+    flag_rate_burst    INTEGER     DEFAULT 500 CHECK ( flag_rate_burst >= 100 ),
+    write_behind_mode  BOOLEAN     DEFAULT FALSE,
+    signed_flags       BOOLEAN     DEFAULT FALSE,
+    flag_signing_key   VARCHAR(64) DEFAULT '',
     round_time         INTEGER CHECK ( round_time > 0 ),
     mode               VARCHAR(8)  DEFAULT 'classic',
     timezone           VARCHAR(32) DEFAULT 'UTC',
@@ -105,3 +110,6 @@ CREATE INDEX IF NOT EXISTS idx_flags_round_team
 
 CREATE INDEX IF NOT EXISTS idx_flags_round_task
     ON Flags (round, task_id);
+
+CREATE INDEX IF NOT EXISTS idx_flags_team_task_round
+    ON Flags (team_id, task_id, round) INCLUDE (id);
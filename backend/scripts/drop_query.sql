@@ -8,5 +8,6 @@ DROP TABLE IF EXISTS TeamTasksLog CASCADE;
 DROP TABLE IF EXISTS ScheduleHistory CASCADE;
 
 DROP FUNCTION IF EXISTS recalculate_rating(INTEGER, INTEGER, INTEGER, INTEGER);
+DROP FUNCTION IF EXISTS recalculate_rating_batch(INTEGER[], INTEGER[], INTEGER[], INTEGER[]);
 DROP FUNCTION IF EXISTS get_first_bloods();
 DROP FUNCTION IF EXISTS fix_teamtasks();
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import os
+import secrets
 from pathlib import Path
 
 import pytz
@@ -74,6 +75,7 @@ def init_game_config(game_config, curs):
 
     game_config['real_round'] = 0
     game_config['game_running'] = False
+    game_config['flag_signing_key'] = secrets.token_hex(32)
 
     # noinspection PyArgumentList
     game_config['mode'] = models.GameMode(game_config['mode'])
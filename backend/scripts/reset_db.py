@@ -30,7 +30,12 @@ def run():
 
     while True:
         try:
-            storage.utils.RedisStorage.get().flushall()
+            redis_client = storage.utils.RedisStorage.get()
+            redis_client.flushall()
+            redis_client.publish(
+                storage.keys.CacheKeys.cache_invalidation(),
+                storage.caching.ALL_CACHES,
+            )
         except (redis.exceptions.ConnectionError, redis.exceptions.BusyLoadingError):
             print('[*] Redis isn\'t running, waiting...')
             time.sleep(5)
@@ -0,0 +1,86 @@
+import logging
+import os
+
+import asyncpg
+from aiohttp import web
+from redis import asyncio as aioredis
+
+from lib import config
+from lib.flags import LiveFlagsFilter, SubmitMonitor
+
+from judge import AsyncJudge
+from views import routes, judge_key
+
+logger = logging.getLogger('async_receiver')
+
+# connections are shared by all requests of the worker process
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 100))
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 20))
+
+
+async def storages_ctx(app: web.Application):
+    redis_config = config.get_redis_config()
+    redis_pool = aioredis.BlockingConnectionPool(
+        max_connections=REDIS_MAX_CONNECTIONS,
+        decode_responses=True,
+        **redis_config.model_dump(),
+    )
+    redis = aioredis.Redis(connection_pool=redis_pool)
+
+    database_config = config.get_db_config()
+    pool_config = config.get_db_pool_config()
+    db = await asyncpg.create_pool(
+        host=database_config.host,
+        port=database_config.port,
+        user=database_config.user,
+        password=database_config.password,
+        database=database_config.dbname,
+        min_size=min(5, DB_MAX_CONNECTIONS),
+        max_size=DB_MAX_CONNECTIONS,
+        # statements can't be cached in sessions of a transaction pooler
+        statement_cache_size=0 if pool_config.transaction_pooling else 100,
+    )
+
+    receiver_config = config.get_receiver_config()
+    flags_filter = None
+    if receiver_config.flags_filter_error_rate:
+        flags_filter = LiveFlagsFilter(
+            logger=logger,
+            error_rate=receiver_config.flags_filter_error_rate,
+        )
+
+    judge = AsyncJudge(
+        redis=redis,
+        db=db,
+        monitor=SubmitMonitor(logger=logger),
+        logger=logger,
+        flags_filter=flags_filter,
+    )
+    await judge.start()
+    app[judge_key] = judge
+
+    yield
+
+    await judge.close()
+    await db.close()
+    await redis.aclose()
+
+
+def create_app() -> web.Application:
+    application = web.Application(client_max_size=10 * 1024)
+    application.add_routes(routes)
+    application.cleanup_ctx.append(storages_ctx)
+    return application
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    web.run_app(app, host='0.0.0.0', port=5000)
+else:
+    gunicorn_logger = logging.getLogger('gunicorn.error')
+    logging.basicConfig(
+        level=gunicorn_logger.level,
+        handlers=gunicorn_logger.handlers,
+    )
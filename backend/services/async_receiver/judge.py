@@ -0,0 +1,395 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from typing import List, Dict, Optional, Tuple, Any, Callable
+
+import asyncpg
+from redis import asyncio as aioredis
+
+from lib import models, storage
+from lib.flags import LiveFlagsFilter, SubmitMonitor
+from lib.helpers import exceptions
+from lib.storage import scripts
+from lib.storage.keys import CacheKeys
+
+_RECALCULATE_RATING_BATCH_QUERY = '''
+SELECT * FROM recalculate_rating_batch(
+    $1::INTEGER[], $2::INTEGER[], $3::INTEGER[], $4::INTEGER[]
+)
+'''
+
+
+class AsyncJudge:
+    """
+    Asyncio counterpart of lib.flags.Judge.
+
+    Hot path (token, round, config, flags lookup, stolen flags marking and
+    rating recalculation) is fully asynchronous. Rare blocking operations
+    (cold cache warm-up, socket.io notifications) are run in a single
+    dedicated thread, as the synchronous storage isn't thread-safe.
+    """
+
+    def __init__(
+            self,
+            redis: aioredis.Redis,
+            db: asyncpg.Pool,
+            monitor: SubmitMonitor,
+            logger: Logger,
+            monitor_interval: float = 10,
+            flags_filter: Optional[LiveFlagsFilter] = None,
+    ):
+        self._redis = redis
+        self._db = db
+        self._monitor = monitor
+        self._logger = logger
+        self._monitor_interval = monitor_interval
+        self._flags_filter = flags_filter
+
+        self._mark_stolen_script = redis.register_script(
+            scripts.MARK_STOLEN_FLAGS_SCRIPT,
+        )
+        self._take_tokens_script = redis.register_script(
+            scripts.TAKE_SUBMIT_TOKENS_SCRIPT,
+        )
+        self._record_attacks_script = redis.register_script(
+            scripts.RECORD_ATTACKS_SCRIPT,
+        )
+        self._apply_deltas_script = redis.register_script(
+            scripts.APPLY_SCORES_DELTAS_SCRIPT,
+        )
+
+        self._sync_executor = ThreadPoolExecutor(max_workers=1)
+        self._notifications: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        self._sio = None
+        self._background: List[asyncio.Task] = []
+
+    @property
+    def monitor(self) -> SubmitMonitor:
+        return self._monitor
+
+    async def start(self) -> None:
+        self._background = [
+            asyncio.create_task(self._run_monitor()),
+            asyncio.create_task(self._run_notifier()),
+        ]
+        if self._flags_filter is not None:
+            self._background.append(asyncio.create_task(self._run_flags_filter()))
+
+    async def close(self) -> None:
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._sync_executor.shutdown(wait=False)
+
+    async def _run_sync(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._sync_executor, func, *args)
+
+    async def _run_monitor(self) -> None:
+        while True:
+            try:
+                self._monitor.report_statistics()
+            except Exception as e:
+                self._logger.error("Error in monitoring: %s", str(e))
+            await asyncio.sleep(self._monitor_interval)
+
+    def _notify(self, ar: models.AttackResult) -> None:
+        if self._sio is None:
+            self._sio = storage.utils.SIOManager.create(write_only=True)
+
+        flag_data = ar.get_flag_notification()
+        self._logger.debug('Sending notification with %s', flag_data)
+        self._sio.emit(
+            event='flag_stolen',
+            data={'data': flag_data},
+            namespace='/live_events',
+        )
+
+    async def _run_flags_filter(self) -> None:
+        """Same as LiveFlagsFilter.run, loading in the sync storage thread."""
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CacheKeys.new_flags())
+                    messages = pubsub.listen()
+                    # subscription is confirmed, so no new flags are missed
+                    await messages.__anext__()
+                    await self._run_sync(self._flags_filter.load)
+                    async for message in messages:
+                        if message['type'] == 'message':
+                            self._flags_filter.add_published(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._flags_filter.invalidate()
+                self._logger.error("Error in live flags filter: %s", str(e))
+                await asyncio.sleep(1)
+
+    async def _run_notifier(self) -> None:
+        while True:
+            ar = await self._notifications.get()
+            try:
+                await self._run_sync(self._notify, ar)
+            except Exception as e:
+                self._logger.error("Error sending notification: %s", str(e))
+
+    async def get_team_id_by_token(self, token: str) -> Optional[int]:
+        team_id = await self._redis.get(CacheKeys.team_by_token(token))
+        try:
+            return int(team_id)
+        except (ValueError, TypeError):
+            return None
+
+    async def get_real_round(self) -> int:
+        r = await self._redis.get(CacheKeys.current_round())
+        return int(r or -1)
+
+    async def get_game_config(self) -> models.GameConfig:
+        data = await self._redis.get(CacheKeys.game_config())
+        if not data:
+            return await self._run_sync(storage.game.get_current_game_config)
+        return models.GameConfig.from_json(data)
+
+    async def take_submit_tokens(self, team_id: int, count: int) -> Tuple[int, float]:
+        """Same as lib.storage.attacks.take_submit_tokens, but asynchronous."""
+        game_config = await self.get_game_config()
+        if game_config.flag_rate_limit <= 0 or not count:
+            return count, 0.0
+
+        taken, retry_after = await self._take_tokens_script(
+            keys=[CacheKeys.team_submit_bucket(team_id)],
+            args=[
+                game_config.flag_rate_limit,
+                game_config.flag_rate_burst,
+                count,
+            ],
+        )
+        return taken, retry_after / 1000
+
+    async def flags_cache_ready(self) -> bool:
+        """Check if the flags cache is warmed up, start the warm-up if it's not."""
+        if await self._redis.exists(CacheKeys.flags_cached()):
+            return True
+
+        self._background.append(
+            asyncio.create_task(self._run_sync(storage.flags.warm_up_flags_cache)),
+        )
+        self._background = [task for task in self._background if not task.done()]
+        return False
+
+    async def _get_flags(
+            self,
+            flag_strs: List[str],
+            current_round: int,
+    ) -> List[Optional[models.Flag]]:
+        if not flag_strs:
+            return []
+
+        game_config = await self.get_game_config()
+        keys = storage.flags.get_flags_lookup_keys(
+            current_round=current_round,
+            flag_lifetime=game_config.flag_lifetime,
+        )
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.exists(CacheKeys.flags_cached())
+            for key in keys:
+                pipe.hmget(key, flag_strs)
+            cached, *packed_by_round = await pipe.execute()
+
+        if not cached:
+            return await self._run_sync(
+                storage.flags.get_flags_by_str,
+                flag_strs,
+                current_round,
+            )
+
+        return storage.flags.unpack_flags(flag_strs, packed_by_round)
+
+    async def _get_latest_teamtasks(
+            self,
+            team_id: int,
+            task_ids: List[int],
+    ) -> Dict[int, Optional[dict]]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.xrevrange(CacheKeys.teamtasks(team_id, task_id), count=1)
+            data = await pipe.execute()
+
+        teamtasks: Dict[int, Optional[dict]] = {}
+        for task_id, records in zip(task_ids, data):
+            teamtasks[task_id] = None
+            for timestamp, record in records:
+                record['timestamp'] = timestamp
+                teamtasks[task_id] = record
+        return teamtasks
+
+    def _fill_stolen_flags(self, attacker_id: int, current_round: int) -> None:
+        with storage.utils.redis_pipeline(transaction=False) as pipe:
+            storage.caching.cache_last_stolen(attacker_id, current_round, pipe)
+            pipe.execute()
+
+    async def _mark_stolen_flags(
+            self,
+            flags: List[models.Flag],
+            attacker_id: int,
+            current_round: int,
+            flag_lifetime: int,
+    ) -> List[Optional[exceptions.FlagSubmitException]]:
+        if not flags:
+            return []
+
+        keys = [CacheKeys.team_stolen_flags(attacker_id)]
+        args = [attacker_id, current_round, flag_lifetime]
+        for flag in flags:
+            args.extend((flag.id, flag.team_id, flag.round))
+
+        statuses = await self._mark_stolen_script(keys=keys, args=args)
+        if statuses is None:
+            await self._run_sync(self._fill_stolen_flags, attacker_id, current_round)
+            statuses = await self._mark_stolen_script(keys=keys, args=args)
+
+        return [storage.flags.STOLEN_FLAG_ERRORS[status] for status in statuses]
+
+    def _fill_scores(self) -> None:
+        with storage.utils.redis_pipeline(transaction=False) as pipe:
+            storage.caching.cache_teamtasks_scores(pipe)
+            pipe.execute()
+
+    async def _record_attacks(
+            self,
+            attacker_id: int,
+            flags: List[models.Flag],
+            game_config: models.GameConfig,
+    ) -> List[Tuple[float, float]]:
+        keys, args = storage.scores.get_record_attacks_params(
+            attacker_id=attacker_id,
+            flags=flags,
+            game_config=game_config,
+        )
+        deltas = await self._record_attacks_script(keys=keys, args=args)
+        if deltas is None:
+            await self._run_sync(self._fill_scores)
+            deltas = await self._record_attacks_script(keys=keys, args=args)
+
+        return storage.scores.parse_deltas(deltas)
+
+    async def handle_attacks(
+            self,
+            attacker_id: int,
+            flag_strs: List[str],
+            current_round: int,
+    ) -> List[models.AttackResult]:
+        """Same as lib.storage.attacks.handle_attacks, but asynchronous."""
+        results = storage.attacks.get_attack_results(
+            attacker_id=attacker_id,
+            flag_strs=flag_strs,
+            current_round=current_round,
+        )
+        if current_round == -1:
+            return results
+
+        game_config = await self.get_game_config()
+        pending, pending_flags = storage.attacks.filter_signed_flags(
+            attacker_id=attacker_id,
+            results=results,
+            flag_strs=flag_strs,
+            current_round=current_round,
+            game_config=game_config,
+        )
+        flags = await self._get_flags(pending_flags, current_round)
+
+        teamtasks: Dict[int, Optional[dict]] = {}
+        if game_config.volga_attacks_mode:
+            task_ids = list({flag.task_id for flag in flags if flag is not None})
+            teamtasks = await self._get_latest_teamtasks(attacker_id, task_ids)
+
+        checked = storage.attacks.check_flags(
+            attacker_id=attacker_id,
+            results=pending,
+            flags=flags,
+            current_round=current_round,
+            game_config=game_config,
+            teamtasks=teamtasks,
+        )
+        errors = await self._mark_stolen_flags(
+            flags=[flag for _, flag in checked],
+            attacker_id=attacker_id,
+            current_round=current_round,
+            flag_lifetime=game_config.flag_lifetime,
+        )
+        accepted = storage.attacks.get_accepted_flags(checked, errors)
+        if not accepted:
+            return results
+
+        accepted_flags = [flag for _, flag in accepted]
+        try:
+            if game_config.write_behind_mode:
+                deltas = await self._record_attacks(
+                    attacker_id=attacker_id,
+                    flags=accepted_flags,
+                    game_config=game_config,
+                )
+            else:
+                params = storage.attacks.get_rating_batch_params(
+                    attacker_id,
+                    accepted_flags,
+                )
+                deltas = await self._db.fetch(
+                    _RECALCULATE_RATING_BATCH_QUERY,
+                    params['attacker_ids'],
+                    params['victim_ids'],
+                    params['task_ids'],
+                    params['flag_ids'],
+                )
+        except Exception:
+            # none of the attacks are recorded, let the flags be resubmitted
+            await self._redis.srem(
+                CacheKeys.team_stolen_flags(attacker_id),
+                *(flag.id for flag in accepted_flags),
+            )
+            raise
+
+        if not game_config.write_behind_mode:
+            keys, args = storage.scores.get_apply_deltas_params(
+                attacker_id=attacker_id,
+                flags=accepted_flags,
+                deltas=deltas,
+            )
+            if args:
+                await self._apply_deltas_script(keys=keys, args=args)
+
+        storage.attacks.set_attack_results(accepted, deltas)
+        return results
+
+    async def process_many(
+            self,
+            team_id: int,
+            flags: List[str],
+    ) -> List[models.AttackResult]:
+        current_round = await self.get_real_round()
+        rejected: List[Optional[models.AttackResult]] = [None] * len(flags)
+        if self._flags_filter is not None:
+            rejected, flags = self._flags_filter.reject_unknown(
+                attacker_id=team_id,
+                flag_strs=flags,
+                current_round=current_round,
+            )
+
+        checked = iter(await self.handle_attacks(
+            attacker_id=team_id,
+            flag_strs=flags,
+            current_round=current_round,
+        ))
+        results = [ar if ar is not None else next(checked) for ar in rejected]
+
+        for ar in results:
+            if ar.submit_ok:
+                try:
+                    self._notifications.put_nowait(ar)
+                except asyncio.QueueFull:
+                    pass
+                self._monitor.inc_ok()
+            else:
+                self._monitor.inc_bad()
+
+        return results
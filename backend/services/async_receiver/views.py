@@ -0,0 +1,94 @@
+import json
+import logging
+import math
+
+from aiohttp import web
+
+from judge import AsyncJudge
+from lib import storage
+
+logger = logging.getLogger('async_receiver.views')
+
+judge_key = web.AppKey('judge', AsyncJudge)
+routes = web.RouteTableDef()
+
+
+def make_error(message: str, status: int = 400) -> web.Response:
+    return web.json_response({'error': message}, status=status)
+
+
+@routes.put('/flags')
+@routes.put('/flags/')
+async def submit_flags(request: web.Request) -> web.Response:
+    judge = request.app[judge_key]
+    judge.monitor.inc_requests()
+
+    token = request.headers.get('X-Team-Token', '')
+    team_id = await judge.get_team_id_by_token(token)
+    if not team_id:
+        logger.debug('[%s] bad token', request.remote)
+        return make_error('Invalid team token.')
+
+    current_round = await judge.get_real_round()
+    if current_round == -1:
+        return make_error('Game not started.')
+
+    try:
+        data = json.loads(await request.read())
+    except ValueError:
+        logger.debug('[%s] sent invalid json', request.remote)
+        return make_error('Invalid json sent')
+    if not isinstance(data, list) or len(data) > 100:
+        logger.debug('[%s] invalid format', request.remote)
+        return make_error(
+            'Invalid request format. '
+            'Must provide a list with no more than 100 flags.'
+        )
+
+    allowed, retry_after = await judge.take_submit_tokens(team_id, len(data))
+    rate_limit_message = storage.attacks.get_rate_limit_message(retry_after)
+    if data and not allowed:
+        response = make_error(rate_limit_message, 429)
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    attack_results = await judge.process_many(team_id, flags=data[:allowed])
+
+    responses = []
+    for ar, flag in zip(attack_results, data):
+        logger.debug(
+            '[%s] processed flag %s, %s: %s',
+            request.remote,
+            flag,
+            'ok' if ar.submit_ok else 'bad',
+            ar.message,
+        )
+
+        responses.append(
+            {
+                'msg': f'[{flag}] {ar.message}',
+                'flag': flag,
+            }
+        )
+
+    for flag in data[allowed:]:
+        responses.append(
+            {
+                'msg': f'[{flag}] {rate_limit_message}',
+                'flag': flag,
+            }
+        )
+
+    return web.json_response(responses)
+
+
+@routes.get('/flags/health/')
+async def health_check(_request: web.Request) -> web.Response:
+    return web.json_response({'status': 'ok'})
+
+
+@routes.get('/flags/ready/')
+async def ready_check(request: web.Request) -> web.Response:
+    if await request.app[judge_key].flags_cache_ready():
+        return web.json_response({'status': 'ok'})
+    return web.json_response({'status': 'warming_up'}, status=503)
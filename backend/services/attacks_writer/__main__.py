@@ -0,0 +1,69 @@
+import logging
+import os
+import time
+
+from lib import storage
+
+logger = logging.getLogger('attacks_writer')
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+FLUSH_INTERVAL = int(os.getenv('FLUSH_INTERVAL_MS', 100))
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', 1000))
+# must be stable across restarts to replay attacks read before a crash
+CONSUMER_NAME = os.getenv('CONSUMER_NAME', 'attacks_writer')
+
+
+def replay() -> None:
+    """Write attacks read by this consumer before restart, but not written."""
+    while True:
+        entries = storage.scores.read_pending_attacks(
+            consumer=CONSUMER_NAME,
+            count=BATCH_SIZE,
+            replay=True,
+        )
+        if not entries:
+            return
+        written = storage.scores.write_attacks(entries)
+        logger.info('Replayed %d attacks, %d written', len(entries), written)
+
+
+def collect_batch() -> list:
+    """Wait for attacks for at most FLUSH_INTERVAL ms after the first one."""
+    batch = storage.scores.read_pending_attacks(
+        consumer=CONSUMER_NAME,
+        count=BATCH_SIZE,
+        block=FLUSH_INTERVAL,
+    )
+    deadline = time.monotonic() + FLUSH_INTERVAL / 1000
+    while batch and len(batch) < BATCH_SIZE:
+        timeout = int((deadline - time.monotonic()) * 1000)
+        if timeout <= 0:
+            break
+        entries = storage.scores.read_pending_attacks(
+            consumer=CONSUMER_NAME,
+            count=BATCH_SIZE - len(batch),
+            block=timeout,
+        )
+        if not entries:
+            break
+        batch.extend(entries)
+    return batch
+
+
+def main() -> None:
+    storage.scores.create_pending_attacks_group()
+    replay()
+
+    while True:
+        batch = collect_batch()
+        if batch:
+            written = storage.scores.write_attacks(batch)
+            logger.debug('Written %d of %d queued attacks', written, len(batch))
+
+
+if __name__ == '__main__':
+    main()
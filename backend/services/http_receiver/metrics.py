@@ -1,17 +1,41 @@
-from prometheus_client import Counter
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import eventlet
+from prometheus_client import Counter, Gauge
+
+from lib import storage
+from lib.helpers.cache import LocalCache
+from lib.models import AttackResult
+
+logger = logging.getLogger('http_receiver.metrics')
+
+# label names added to the submission metrics by each label group
+LABEL_GROUPS = {
+    'attacker': ('attacker_id', 'attacker_name'),
+    'victim': ('victim_id', 'victim_name'),
+    'task': ('task_id', 'task_name'),
+}
+
+METRICS_LABELS = [
+    group.strip()
+    for group in os.getenv('METRICS_LABELS', ','.join(LABEL_GROUPS)).split(',')
+    if group.strip()
+]
+FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+for _group in METRICS_LABELS:
+    if _group not in LABEL_GROUPS:
+        raise ValueError(f'Unknown metrics label group: {_group}')
+
+_labelnames = [name for group in METRICS_LABELS for name in LABEL_GROUPS[group]]
 
 flag_submissions = Counter(
     'flag_submissions_total',
     documentation='Flag submission counter',
-    labelnames=[
-        'attacker_id',
-        'attacker_name',
-        'victim_id',
-        'victim_name',
-        'task_id',
-        'task_name',
-        'status',
-    ],
+    labelnames=_labelnames + ['status'],
     namespace='forcad',
     subsystem='http_receiver',
 )
@@ -19,14 +43,7 @@ flag_submissions = Counter(
 flag_points_gained = Counter(
     'flag_points_gained_total',
     documentation='Flag points acquired for attacks',
-    labelnames=[
-        'attacker_id',
-        'attacker_name',
-        'victim_id',
-        'victim_name',
-        'task_id',
-        'task_name',
-    ],
+    labelnames=_labelnames,
     namespace='forcad',
     subsystem='http_receiver',
 )
@@ -34,14 +51,167 @@ flag_points_gained = Counter(
 flag_points_lost = Counter(
     'flag_points_lost_total',
     documentation='Flag points lost',
-    labelnames=[
-        'attacker_id',
-        'attacker_name',
-        'victim_id',
-        'victim_name',
-        'task_id',
-        'task_name',
-    ],
+    labelnames=_labelnames,
+    namespace='forcad',
+    subsystem='http_receiver',
+)
+
+local_cache_lookups = Counter(
+    'local_cache_lookups_total',
+    documentation='Lookups in process-local caches by result',
+    labelnames=['cache', 'result'],
     namespace='forcad',
     subsystem='http_receiver',
 )
+
+local_cache_size = Gauge(
+    'local_cache_size',
+    documentation='Number of entries in process-local caches',
+    labelnames=['cache'],
+    namespace='forcad',
+    subsystem='http_receiver',
+    multiprocess_mode='livesum',
+)
+
+submit_bucket_tokens = Gauge(
+    'submit_bucket_tokens',
+    documentation='Flags the team can submit before being rate limited',
+    labelnames=['team_id', 'team_name'],
+    namespace='forcad',
+    subsystem='http_receiver',
+    multiprocess_mode='livemax',
+)
+
+
+class NameCache:
+    """Team & task names by id, dropped when storage cache is invalidated."""
+
+    def __init__(self):
+        self._pid: Optional[int] = None
+        self._teams: Optional[Dict[int, str]] = None
+        self._tasks: Optional[Dict[int, str]] = None
+
+    def _invalidate(self, name: str) -> None:
+        if name in ('teams', storage.caching.ALL_CACHES):
+            self._teams = None
+        if name in ('tasks', storage.caching.ALL_CACHES):
+            self._tasks = None
+
+    def _subscribe(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._teams = self._tasks = None
+            storage.caching.subscribe_invalidation(self._invalidate)
+
+    def teams(self) -> Dict[int, str]:
+        self._subscribe()
+        if self._teams is None:
+            self._teams = {team.id: team.name for team in storage.teams.get_teams()}
+        return self._teams
+
+    def tasks(self) -> Dict[int, str]:
+        self._subscribe()
+        if self._tasks is None:
+            self._tasks = {task.id: task.name for task in storage.tasks.get_tasks()}
+        return self._tasks
+
+
+def _new_pending() -> list:
+    return [0, 0, 0, 0.0, 0.0]
+
+
+class SubmissionMetrics:
+    """
+    Flag submission metrics aggregated in process.
+
+    Requests only add results to in-memory sums by label values,
+    which are flushed to Prometheus every FLUSH_INTERVAL seconds
+    along with the local caches & submit buckets gauges.
+    """
+
+    def __init__(self, label_groups: List[str]):
+        self._label_groups = label_groups
+        self._names = NameCache()
+        # label values -> [ok, bad, rate limited, points gained, points lost]
+        self._pending: Dict[tuple, list] = defaultdict(_new_pending)
+        # cache name -> (cache, last reported hits, negative hits, misses)
+        self._caches: Dict[str, Tuple[LocalCache, List[int]]] = {}
+
+    def _get_pending(self, ar: AttackResult) -> list:
+        key = tuple(getattr(ar, f'{group}_id') for group in self._label_groups)
+        return self._pending[key]
+
+    def add(self, ar: AttackResult) -> None:
+        pending = self._get_pending(ar)
+        pending[0 if ar.submit_ok else 1] += 1
+        pending[3] += ar.attacker_delta
+        pending[4] -= ar.victim_delta
+
+    def add_rate_limited(self, attacker_id: int, count: int) -> None:
+        """Count the flags rejected by the rate limit before being checked."""
+        if count:
+            self._get_pending(AttackResult(attacker_id=attacker_id))[2] += count
+
+    def track_local_cache(self, name: str, cache: LocalCache) -> None:
+        self._caches[name] = (cache, [0, 0, 0])
+
+    def _labels(self, key: tuple) -> Dict[str, object]:
+        labels: Dict[str, object] = {}
+        for group, obj_id in zip(self._label_groups, key):
+            names = self._names.tasks() if group == 'task' else self._names.teams()
+            labels[f'{group}_id'] = obj_id
+            labels[f'{group}_name'] = names.get(obj_id, 'unknown')
+        return labels
+
+    def _flush_submissions(self) -> None:
+        pending, self._pending = self._pending, defaultdict(_new_pending)
+        for key, (ok, bad, rate_limited, gained, lost) in pending.items():
+            labels = self._labels(key)
+            if ok:
+                flag_submissions.labels(status='ok', **labels).inc(ok)
+            if bad:
+                flag_submissions.labels(status='bad', **labels).inc(bad)
+            if rate_limited:
+                flag_submissions.labels(
+                    status='rate_limited',
+                    **labels,
+                ).inc(rate_limited)
+            flag_points_gained.labels(**labels).inc(gained)
+            flag_points_lost.labels(**labels).inc(lost)
+
+    def _flush_caches(self) -> None:
+        for name, (cache, reported) in self._caches.items():
+            current = [cache.hits, cache.negative_hits, cache.misses]
+            for result, value, last in zip(
+                    ('hit', 'negative_hit', 'miss'),
+                    current,
+                    reported,
+            ):
+                local_cache_lookups.labels(cache=name, result=result).inc(value - last)
+            reported[:] = current
+            local_cache_size.labels(cache=name).set(len(cache))
+
+    def _flush_buckets(self) -> None:
+        if storage.game.get_current_game_config().flag_rate_limit <= 0:
+            return
+
+        teams = self._names.teams()
+        buckets = storage.attacks.get_submit_buckets(list(teams))
+        for team_id, tokens in buckets.items():
+            submit_bucket_tokens.labels(
+                team_id=team_id,
+                team_name=teams[team_id],
+            ).set(tokens)
+
+    def flush(self) -> None:
+        self._flush_submissions()
+        self._flush_caches()
+        self._flush_buckets()
+
+    def run(self) -> None:
+        while True:
+            eventlet.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error('Error flushing metrics: %s', str(e))
@@ -1,18 +1,41 @@
 import logging
+import math
 
+import eventlet
 from flask import Blueprint
 from flask import jsonify, make_response, request
 
-from lib import storage
-from lib.flags import SubmitMonitor, Judge
+from lib import config, storage
+from lib.flags import LiveFlagsFilter, SubmitMonitor, Judge
+from lib.helpers.cache import LocalCache
 
-from metrics import flag_submissions, flag_points_gained, flag_points_lost
+from metrics import METRICS_LABELS, SubmissionMetrics
 
 logger = logging.getLogger('http_receiver.views')
 
 receiver_bp = Blueprint('http_receiver', __name__)
 monitor = SubmitMonitor(logger=logger)
-judge = Judge(monitor=monitor, logger=logger)
+receiver_config = config.get_receiver_config()
+flag_cache = LocalCache(
+    maxsize=receiver_config.flag_cache_size,
+    ttl=receiver_config.flag_cache_ttl,
+    negative_ttl=receiver_config.flag_cache_negative_ttl,
+)
+flags_filter = None
+if receiver_config.flags_filter_error_rate:
+    flags_filter = LiveFlagsFilter(
+        logger=logger,
+        error_rate=receiver_config.flags_filter_error_rate,
+    )
+judge = Judge(
+    monitor=monitor,
+    logger=logger,
+    flag_cache=flag_cache,
+    flags_filter=flags_filter,
+)
+submission_metrics = SubmissionMetrics(METRICS_LABELS)
+submission_metrics.track_local_cache('flag_cache', flag_cache)
+eventlet.spawn_n(submission_metrics.run)
 
 
 def make_error(message: str, status: int = 400):
@@ -44,27 +67,19 @@ def get_teams():
             'Must provide a list with no more than 100 flags.'
         )
 
-    attack_results = judge.process_many(team_id, flags=data)
+    allowed, retry_after = storage.attacks.take_submit_tokens(team_id, len(data))
+    rate_limit_message = storage.attacks.get_rate_limit_message(retry_after)
+    submission_metrics.add_rate_limited(team_id, len(data) - allowed)
+    if data and not allowed:
+        response = make_error(rate_limit_message, 429)
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
 
-    team_name_by_id = {team.id: team.name for team in storage.teams.get_teams()}
-    task_name_by_id = {task.id: task.name for task in storage.tasks.get_tasks()}
+    attack_results = judge.process_many(team_id, flags=data[:allowed])
 
     responses = []
     for ar, flag in zip(attack_results, data):
-        common_metric_kwargs = dict(
-            attacker_id=ar.attacker_id,
-            attacker_name=team_name_by_id.get(ar.attacker_id, 'unknown'),
-            victim_id=ar.victim_id,
-            victim_name=team_name_by_id.get(ar.victim_id, 'unknown'),
-            task_id=ar.task_id,
-            task_name=task_name_by_id.get(ar.task_id, 'unknown'),
-        )
-        flag_submissions.labels(
-            status='ok' if ar.submit_ok else 'bad',
-            **common_metric_kwargs,
-        ).inc()
-        flag_points_gained.labels(**common_metric_kwargs).inc(ar.attacker_delta)
-        flag_points_lost.labels(**common_metric_kwargs).inc(-ar.victim_delta)
+        submission_metrics.add(ar)
 
         logger.debug(
             '[%s] processed flag %s, %s: %s',
@@ -81,9 +96,26 @@ def get_teams():
             }
         )
 
+    for flag in data[allowed:]:
+        responses.append(
+            {
+                'msg': f'[{flag}] {rate_limit_message}',
+                'flag': flag,
+            }
+        )
+
     return jsonify(responses)
 
 
 @receiver_bp.route('/health/')
 def health_check():
     return jsonify({'status': 'ok'})
+
+
+@receiver_bp.route('/ready/')
+def ready_check():
+    if storage.flags.flags_cache_ready():
+        return jsonify({'status': 'ok'})
+
+    eventlet.spawn_n(storage.flags.warm_up_flags_cache)
+    return make_response(jsonify({'status': 'warming_up'}), 503)
@@ -1,6 +1,7 @@
 import random
 import secrets
-from typing import Optional, Any
+import traceback
+from typing import Optional, Any, List, Tuple
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
@@ -9,10 +10,29 @@ from lib import models, storage
 from lib.helpers import checkers
 from lib.helpers.jobs import JobNames
 from lib.models import TaskStatus, Action
+from . import handlers
 
 logger = get_task_logger(__name__)
 
 
+def report_verdict(
+        verdict: models.CheckerVerdict,
+        team: models.Team,
+        task: models.Task,
+        current_round: int,
+        stream_verdict: bool,
+) -> models.CheckerVerdict:
+    """Add the action's verdict to the round's verdicts stream if requested."""
+    if stream_verdict:
+        storage.verdicts.add_round_verdict(
+            r=current_round,
+            team_id=team.id or 0,
+            task_id=task.id or 0,
+            verdict=verdict,
+        )
+    return verdict
+
+
 @shared_task(name=JobNames.noop_action)
 def noop(data: Any) -> Any:
     """Helper task to return checker verdict"""
@@ -25,6 +45,7 @@ def put_action(
         team: models.Team,
         task: models.Task,
         current_round: int,
+        stream_verdict: bool = False,
 ) -> models.CheckerVerdict:
     """
     Run "put" checker action.
@@ -33,6 +54,7 @@ def put_action(
     :param team: models.Team instance
     :param task: models.Task instance
     :param current_round: current round
+    :param stream_verdict: report the verdict to the round's verdicts stream
     :returns verdict: models.CheckerVerdict instance
 
     If "check" action fails, put is not run.
@@ -46,11 +68,13 @@ def put_action(
     )
 
     place = secrets.choice(range(1, task.places + 1))
+    game_config = storage.game.get_current_game_config()
     flag = models.Flag.generate(
         service=task.name[0].upper(),
         team_id=team.id or 0,
         task_id=task.id or 0,
         current_round=current_round,
+        signing_key=game_config.flag_signing_key if game_config.signed_flags else None,
     )
     flag.private_flag_data = secrets.token_hex(20)
     flag.vuln_number = place
@@ -68,7 +92,7 @@ def put_action(
         flag = task.set_flag_data(flag, verdict)
         storage.flags.add_flag(flag)
 
-    return verdict
+    return report_verdict(verdict, team, task, current_round, stream_verdict)
 
 
 @shared_task(name=JobNames.get_action)
@@ -77,6 +101,9 @@ def get_action(
         team: models.Team,
         task: models.Task,
         current_round: int,
+        get_round: Optional[int] = None,
+        get_flag: Optional[models.Flag] = None,
+        stream_verdict: bool = False,
 ) -> models.CheckerVerdict:
     """
     Run "get" checker action.
@@ -85,13 +112,21 @@ def get_action(
     :param team: models.Team instance
     :param task: models.Task instance
     :param current_round: current round
+    :param get_round: round of the flag preselected by ticker, if any
+    :param get_flag: flag preselected by ticker, None if the round has none
+                     (for the previous rounds, flags of the current round
+                     are picked here, as they're put after the preselection)
+    :param stream_verdict: report the verdict to the round's verdicts stream
     :returns: previous result & self result
 
     If "check" or previous "get" actions fail, get is not run.
+    If the flag isn't preselected, a random one is picked from storage.
     """
     if prev_verdict.status != TaskStatus.UP:
         if prev_verdict.action == Action.GET:
-            return prev_verdict
+            return report_verdict(
+                prev_verdict, team, task, current_round, stream_verdict,
+            )
 
         # to avoid returning CHECK verdict
         new_verdict = models.CheckerVerdict(
@@ -102,14 +137,15 @@ def get_action(
             private_message=f'Previous returned {prev_verdict}',
         )
 
-        return new_verdict
-
-    flag_lifetime = storage.game.get_current_game_config().flag_lifetime
+        return report_verdict(new_verdict, team, task, current_round, stream_verdict)
 
-    rounds_to_check = list(
-        set(max(1, current_round - x) for x in range(0, flag_lifetime))
-    )
-    round_to_check = random.choice(rounds_to_check)
+    if get_round is not None:
+        round_to_check = get_round
+    else:
+        flag_lifetime = storage.game.get_current_game_config().flag_lifetime
+        round_to_check = random.choice(
+            storage.flags.get_rounds_to_check(current_round, flag_lifetime),
+        )
 
     logger.info(
         'Running GET on round %s for team %s task %s, current round %s',
@@ -127,12 +163,15 @@ def get_action(
         command="",
     )
 
-    flag = storage.flags.get_random_round_flag(
-        team_id=team.id or 0,
-        task_id=task.id or 0,
-        from_round=round_to_check,
-        current_round=current_round,
-    )
+    if get_round is not None and get_round < current_round:
+        flag = get_flag
+    else:
+        flag = storage.flags.get_random_round_flag(
+            team_id=team.id or 0,
+            task_id=task.id or 0,
+            from_round=round_to_check,
+            current_round=current_round,
+        )
 
     if not flag:
         verdict.status = TaskStatus.UP
@@ -146,12 +185,15 @@ def get_action(
         )
         verdict = runner.get()
 
-    return verdict
+    return report_verdict(verdict, team, task, current_round, stream_verdict)
 
 
 @shared_task(name=JobNames.check_action)
 def check_action(
-        team: models.Team, task: models.Task, current_round: int
+        team: models.Team,
+        task: models.Task,
+        current_round: int,
+        stream_verdict: bool = False,
 ) -> models.CheckerVerdict:
     """
     Run "check" checker action.
@@ -159,6 +201,7 @@ def check_action(
     :param team: models.Team instance
     :param task: models.Task instance
     :param current_round: current round (for exception handler)
+    :param stream_verdict: report the verdict to the round's verdicts stream
 
     :return verdict: models.CheckerVerdict instance
     """
@@ -172,4 +215,70 @@ def check_action(
     runner = checkers.CheckerRunner(team=team, task=task, logger=logger)
     verdict = runner.check()
 
-    return verdict
+    return report_verdict(verdict, team, task, current_round, stream_verdict)
+
+
+@shared_task(name=JobNames.round_action, ignore_result=True)
+def round_action(
+        team: models.Team,
+        task: models.Task,
+        current_round: int,
+        get_flags: Optional[List[Tuple[int, Optional[models.Flag]]]] = None,
+) -> None:
+    """
+    Run all checker actions of the round in a single job.
+
+    Runs "check", "put" and "get" actions one after another like
+    the check -> (puts, gets) -> result handler chain does, and saves
+    the final verdict the same way, without messages & results of each action.
+
+    :param team: models.Team instance
+    :param task: models.Task instance
+    :param current_round: current round
+    :param get_flags: (round, flag) preselected by ticker for each get, if any
+    """
+    if get_flags is None:
+        get_flags = [(None, None)] * task.gets
+
+    verdicts = []
+    action, prev_verdict = Action.CHECK, None
+    try:
+        check_verdict = check_action(team, task, current_round)
+        verdicts.append(check_verdict)
+
+        action, prev_verdict = Action.PUT, check_verdict
+        for _ in range(task.puts):
+            verdicts.append(put_action(check_verdict, team, task, current_round))
+
+        action = Action.GET
+        for get_round, get_flag in get_flags:
+            prev_verdict = get_action(
+                prev_verdict,
+                team,
+                task,
+                current_round,
+                get_round=get_round,
+                get_flag=get_flag,
+            )
+        if get_flags:
+            verdicts.append(prev_verdict)
+    except Exception as e:
+        tb = traceback.format_exc()
+        logger.error(
+            'Round job failed on %s for team %s task %s, round %s: %s',
+            action,
+            team.id,
+            task.id,
+            current_round,
+            tb,
+        )
+        verdict = handlers.get_exception_verdict(action, prev_verdict, e, tb)
+        storage.tasks.update_task_status(
+            task_id=task.id or 0,
+            team_id=team.id or 0,
+            current_round=current_round,
+            checker_verdict=verdict,
+        )
+        return
+
+    handlers.save_result_verdict(verdicts, team, task, current_round)
@@ -1,3 +1,26 @@
+import logging
+
+from celery.signals import worker_process_init
+
+from lib import storage
+from lib.helpers.checker_pool import WarmCheckerPool
+from lib.helpers.module_checkers import ModuleCheckersCache
 from .celery_factory import get_celery_app
 
+logger = logging.getLogger(__name__)
+
 celery_app = get_celery_app()
+
+
+@worker_process_init.connect
+def warm_up_checkers(**_kwargs) -> None:
+    """Start warm checker servers & import module checkers beforehand."""
+    try:
+        for task in storage.tasks.get_tasks():
+            if task.checker_is_module:
+                ModuleCheckersCache.get().load(task.checker)
+            elif task.checker_is_warm:
+                WarmCheckerPool.get().warm_up(task.checker, task.env_path)
+    except Exception as e:
+        # checkers are started on first use then
+        logger.warning('Could not warm up checkers: %s', e)
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 
 from celery import shared_task
 from celery.result import AsyncResult
@@ -10,19 +10,47 @@ from lib.models import Action, TaskStatus
 logger = get_task_logger(__name__)
 
 
+def get_exception_verdict(
+        action: Action,
+        prev_verdict: Optional[models.CheckerVerdict],
+        exc: BaseException,
+        traceback: str,
+) -> models.CheckerVerdict:
+    """
+    Get the verdict of the action failed with exception.
+
+    Failed previous action's verdict is preferred, as the failure
+    is most likely caused by it.
+    """
+    if prev_verdict is not None and prev_verdict.status != TaskStatus.UP:
+        return prev_verdict
+
+    return models.CheckerVerdict(
+        action=action,
+        status=TaskStatus.CHECK_FAILED,
+        command='',
+        public_message=f'{action} failed',
+        private_message=f'Exception on {action}: {repr(exc)}\n{traceback}',
+    )
+
+
 @shared_task(name=JobNames.error_handler)
 def exception_callback(result: AsyncResult, exc: Exception, traceback: str) -> None:
     print('!!!', result, type(result))
-    action_name = result.task.split('.')[-1].split('_')[0].upper()
-    action = Action[action_name]
-
     kw = result.kwargs
     team, task, current_round = kw['team'], kw['task'], kw['current_round']
 
-    if action == Action.CHECK:
+    if result.task == JobNames.round_action:
+        # verdicts of the round job actions are lost with it
+        action = Action.CHECK
         prev_verdict = None
     else:
-        prev_verdict, = result.args
+        action_name = result.task.split('.')[-1].split('_')[0].upper()
+        action = Action[action_name]
+        if action == Action.CHECK:
+            prev_verdict = None
+        else:
+            prev_verdict, = result.args
 
     logger.error(
         f"Task exception handler was called for "
@@ -30,16 +58,18 @@ def exception_callback(result: AsyncResult, exc: Exception, traceback: str) -> N
         f"exception {repr(exc)}, traceback\n{traceback}"
     )
 
-    if prev_verdict is not None and prev_verdict.status != TaskStatus.UP:
-        verdict = prev_verdict
-    else:
-        verdict = models.CheckerVerdict(
-            action=action,
-            status=TaskStatus.CHECK_FAILED,
-            command='',
-            public_message=f'{action} failed',
-            private_message=f'Exception on {action}: {repr(exc)}\n{traceback}',
+    verdict = get_exception_verdict(action, prev_verdict, exc, traceback)
+
+    if kw.get('stream_verdict'):
+        # the round's result isn't selected from failed jobs, as with the chord
+        storage.verdicts.add_round_verdict(
+            r=current_round,
+            team_id=team.id,
+            task_id=task.id,
+            verdict=verdict,
+            final=True,
         )
+        return verdict
 
     storage.tasks.update_task_status(
         task_id=task.id,
@@ -50,25 +80,17 @@ def exception_callback(result: AsyncResult, exc: Exception, traceback: str) -> N
     return verdict
 
 
-@shared_task(name=JobNames.result_handler)
-def checker_results_handler(
-        verdicts: Union[List[models.CheckerVerdict], models.CheckerVerdict],
+def save_result_verdict(
+        verdicts: List[models.CheckerVerdict],
         team: models.Team,
         task: models.Task,
         current_round: int,
 ) -> models.CheckerVerdict:
     """
-    Parse returning verdicts and return the final one.
+    Select the final verdict of the round actions & update the task status.
 
-    If there were any errors, the first error is returned
-    Otherwise, verdict of the first action's verdict is returned.
+    Verdicts are expected in the "check, puts, last get" order.
     """
-
-    # Celery passes the one-task-group's result (e.g. a group of a single put)
-    # as the result itself, not the list, as documented.
-    if not isinstance(verdicts, list):
-        verdicts = [verdicts]
-
     check_verdict = None
     puts_verdicts = []
     gets_verdict = None
@@ -125,3 +147,25 @@ def checker_results_handler(
         checker_verdict=result_verdict,
     )
     return result_verdict
+
+
+@shared_task(name=JobNames.result_handler)
+def checker_results_handler(
+        verdicts: Union[List[models.CheckerVerdict], models.CheckerVerdict],
+        team: models.Team,
+        task: models.Task,
+        current_round: int,
+) -> models.CheckerVerdict:
+    """
+    Parse returning verdicts and return the final one.
+
+    If there were any errors, the first error is returned
+    Otherwise, verdict of the first action's verdict is returned.
+    """
+
+    # Celery passes the one-task-group's result (e.g. a group of a single put)
+    # as the result itself, not the list, as documented.
+    if not isinstance(verdicts, list):
+        verdicts = [verdicts]
+
+    return save_result_verdict(verdicts, team, task, current_round)
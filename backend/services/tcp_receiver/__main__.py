@@ -0,0 +1,187 @@
+import eventlet
+
+eventlet.monkey_patch()
+
+import logging
+import os
+import socket
+from typing import List
+
+from eventlet.queue import LightQueue, Empty
+
+from lib import config, storage
+from lib.flags import LiveFlagsFilter, SubmitMonitor, Judge
+from lib.helpers.cache import LocalCache
+
+logger = logging.getLogger('tcp_receiver')
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+handler = logging.StreamHandler()
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+PORT = int(os.getenv('PORT', 31337))
+MAX_CONNECTIONS = int(os.getenv('MAX_CONNECTIONS', 1024))
+# flags read from a connection but not yet processed, reading stops when reached
+MAX_PENDING_FLAGS = int(os.getenv('MAX_PENDING_FLAGS', 500))
+IDLE_TIMEOUT = int(os.getenv('IDLE_TIMEOUT', 60))
+
+BATCH_SIZE = 100
+MAX_LINE_LENGTH = 256
+
+monitor = SubmitMonitor(logger=logger)
+receiver_config = config.get_receiver_config()
+flag_cache = LocalCache(
+    maxsize=receiver_config.flag_cache_size,
+    ttl=receiver_config.flag_cache_ttl,
+    negative_ttl=receiver_config.flag_cache_negative_ttl,
+)
+flags_filter = None
+if receiver_config.flags_filter_error_rate:
+    flags_filter = LiveFlagsFilter(
+        logger=logger,
+        error_rate=receiver_config.flags_filter_error_rate,
+    )
+judge = Judge(
+    monitor=monitor,
+    logger=logger,
+    flag_cache=flag_cache,
+    flags_filter=flags_filter,
+)
+
+
+class FlagConnection:
+    """
+    Line-based flag submission protocol.
+
+    The first line is the team token, then each line is a flag.
+    Each flag gets a "[flag] message" response line in the same order.
+
+    Flags are read by the connection greenlet and validated in batches
+    by a separate one. When too many flags are pending, reading stops,
+    so a fast client is slowed down by TCP flow control.
+    """
+
+    def __init__(self, sock: socket.socket, address: tuple):
+        self._sock = sock
+        self._address = address
+        self._rfile = sock.makefile('rb')
+        self._wfile = sock.makefile('wb')
+        self._pending: LightQueue = LightQueue(maxsize=MAX_PENDING_FLAGS)
+
+    def _send(self, *lines: str) -> None:
+        self._wfile.write(''.join(f'{line}\n' for line in lines).encode())
+        self._wfile.flush()
+
+    def _readline(self) -> str:
+        line = self._rfile.readline(MAX_LINE_LENGTH)
+        if not line:
+            raise EOFError
+        return line.strip().decode(errors='replace')
+
+    def _next_batch(self) -> list:
+        batch = [self._pending.get()]
+        while len(batch) < BATCH_SIZE and batch[-1] is not None:
+            try:
+                batch.append(self._pending.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _judge(team_id: int, flags: List[str]) -> List[str]:
+        allowed, retry_after = storage.attacks.take_submit_tokens(team_id, len(flags))
+        results = judge.process_many(team_id, flags[:allowed])
+        rate_limit_message = storage.attacks.get_rate_limit_message(retry_after)
+        return [ar.message for ar in results] + (
+            [rate_limit_message] * (len(flags) - allowed)
+        )
+
+    def _process(self, team_id: int) -> None:
+        broken = False
+        while True:
+            flags = self._next_batch()
+            finished = flags[-1] is None
+            if finished:
+                flags.pop()
+
+            if flags and not broken:
+                try:
+                    monitor.inc_requests()
+                    self._send(*(
+                        f'[{flag}] {message}'
+                        for flag, message in zip(flags, self._judge(team_id, flags))
+                    ))
+                except OSError:
+                    broken = True
+                except Exception as e:
+                    logger.exception('[%s] processing error: %s', self._address, e)
+                    broken = True
+                    self._sock.shutdown(socket.SHUT_RDWR)
+
+            # after an error keep draining, so the reader never blocks
+            if finished:
+                return
+
+    def handle(self) -> None:
+        self._send('Welcome! Please, enter your team token:')
+        team_id = storage.teams.get_team_id_by_token(self._readline())
+        if not team_id:
+            logger.debug('[%s] bad token', self._address)
+            self._send('Invalid team token.')
+            return
+
+        if storage.game.get_real_round() == -1:
+            self._send('Game not started.')
+            return
+
+        self._send('Enter your flags, one per line.')
+
+        processor = eventlet.spawn(self._process, team_id)
+        try:
+            while True:
+                flag = self._readline()
+                if flag:
+                    self._pending.put(flag)
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._pending.put(None)
+            processor.wait()
+
+    def close(self) -> None:
+        for f in (self._rfile, self._wfile, self._sock):
+            try:
+                f.close()
+            except OSError:
+                pass
+
+
+def handle_connection(sock: socket.socket, address: tuple) -> None:
+    sock.settimeout(IDLE_TIMEOUT)
+    connection = FlagConnection(sock, address)
+    try:
+        connection.handle()
+    except (EOFError, OSError):
+        pass
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    server = eventlet.listen(('0.0.0.0', PORT), backlog=1024)
+    pool = eventlet.GreenPool(MAX_CONNECTIONS)
+    logger.info('Listening on port %s', PORT)
+
+    while True:
+        try:
+            sock, address = server.accept()
+        except OSError as e:
+            logger.error('Error accepting connection: %s', e)
+            continue
+        # blocks when the pool is full, so new clients wait in the backlog
+        pool.spawn_n(handle_connection, sock, address)
+
+
+if __name__ == '__main__':
+    main()
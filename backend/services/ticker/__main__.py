@@ -3,7 +3,7 @@ import sys
 import time
 from datetime import timedelta, datetime, timezone
 
-from lib import storage, models
+from lib import config, storage, models
 from services.tasks import get_celery_app
 from . import hooks
 from .models import TickerState, Schedule
@@ -47,6 +47,16 @@ def bootstrap_schedules(state: TickerState):
         rounds_schedule.load_last_run()
         state.register_schedule(rounds_schedule)
 
+        if config.get_checkers_config().stream_verdicts:
+            verdicts_schedule = Schedule(
+                schedule_id='aggregate_verdicts',
+                start=game_config.start_time,
+                func=hooks.aggregate_round_verdicts,
+                interval=timedelta(seconds=1),
+            )
+            verdicts_schedule.load_last_run()
+            state.register_schedule(verdicts_schedule)
+
     elif game_config.mode == models.GameMode.BLITZ:
         rounds_schedule = Schedule(
             'blitz_rounds',
@@ -1,3 +1,4 @@
+from .aggregate_verdicts import aggregate_round_verdicts
 from .blitz_tasks import run_blitz_puts_round, blitz_check_gets_runner_factory
 from .classic_round import run_classic_round
 from .start_game import start_game
@@ -7,4 +8,5 @@ __all__ = (
     'run_classic_round',
     'run_blitz_puts_round',
     'blitz_check_gets_runner_factory',
+    'aggregate_round_verdicts',
 )
@@ -0,0 +1,116 @@
+import logging
+import time
+from typing import List
+
+from lib import models, storage
+from lib.models import Action, TaskStatus
+from services.tasks import handlers
+from ..models import RoundVerdicts
+
+logger = logging.getLogger(__name__)
+
+
+def get_missing_verdict(action: Action) -> models.CheckerVerdict:
+    return models.CheckerVerdict(
+        action=action,
+        status=TaskStatus.CHECK_FAILED,
+        command='',
+        public_message=f'{action} failed',
+        private_message=f'{action} verdict was not reported in time',
+    )
+
+
+def get_result_verdicts(
+        verdicts: List[models.CheckerVerdict],
+        task: models.Task,
+) -> List[models.CheckerVerdict]:
+    """
+    Get the verdicts the result handler would get from the reported ones.
+
+    Gets are reduced to the verdict returned by the chain of gets,
+    missing actions get CHECK_FAILED verdicts.
+    """
+    checks = [v for v in verdicts if v.action == Action.CHECK]
+    puts = [v for v in verdicts if v.action == Action.PUT]
+    gets = [v for v in verdicts if v.action == Action.GET]
+
+    if not checks:
+        checks.append(get_missing_verdict(Action.CHECK))
+    puts.extend(get_missing_verdict(Action.PUT) for _ in range(task.puts - len(puts)))
+    if len(gets) < task.gets:
+        gets.append(get_missing_verdict(Action.GET))
+
+    result = [checks[0], *puts]
+    if gets:
+        # failed get's verdict is passed through the rest of the chain
+        result.append(next(filter(lambda x: x.status != TaskStatus.UP, gets), gets[-1]))
+    return result
+
+
+def aggregate_round_verdicts(state) -> None:
+    """
+    Save the results of the team tasks from the rounds' verdicts streams.
+
+    Team task's result is saved as soon as all its actions reported
+    verdicts (or one of them failed), or when the round's deadline passes.
+    """
+    open_rounds = storage.verdicts.get_open_rounds()
+    for r in set(state.round_verdicts) - {r for r, _ in open_rounds}:
+        del state.round_verdicts[r]
+    if not open_rounds:
+        return
+
+    now = time.time()
+    teams = {team.id: team for team in storage.teams.get_teams()}
+    tasks = {task.id: task for task in storage.tasks.get_tasks()}
+
+    for r, deadline in open_rounds:
+        round_verdicts = state.round_verdicts.get(r)
+        if round_verdicts is None:
+            # read from the start, e.g. after the restart
+            expected, done = storage.verdicts.get_round_team_tasks(r)
+            round_verdicts = RoundVerdicts(expected=expected, done=done)
+            state.round_verdicts[r] = round_verdicts
+
+        round_verdicts.last_id, verdicts = storage.verdicts.read_round_verdicts(
+            r,
+            round_verdicts.last_id,
+        )
+        for team_id, task_id, verdict, final in verdicts:
+            if final:
+                round_verdicts.final.setdefault((team_id, task_id), verdict)
+            else:
+                round_verdicts.verdicts[(team_id, task_id)].append(verdict)
+
+        timed_out = now >= deadline
+        for team_id, task_id in round_verdicts.expected - round_verdicts.done:
+            team, task = teams.get(team_id), tasks.get(task_id)
+            final_verdict = round_verdicts.final.get((team_id, task_id))
+            team_task_verdicts = round_verdicts.verdicts[(team_id, task_id)]
+
+            if team is None or task is None:
+                logger.warning('Team %s or task %s is gone', team_id, task_id)
+            elif final_verdict is not None:
+                storage.tasks.update_task_status(
+                    task_id=task_id,
+                    team_id=team_id,
+                    current_round=r,
+                    checker_verdict=final_verdict,
+                )
+            elif timed_out or len(team_task_verdicts) >= 1 + task.puts + task.gets:
+                handlers.save_result_verdict(
+                    get_result_verdicts(team_task_verdicts, task),
+                    team,
+                    task,
+                    r,
+                )
+            else:
+                continue
+
+            storage.verdicts.set_team_task_done(r, team_id, task_id)
+            round_verdicts.done.add((team_id, task_id))
+
+        if timed_out or round_verdicts.done >= round_verdicts.expected:
+            logger.info('Aggregated verdicts of round %s', r)
+            storage.verdicts.close_round(r)
+            del state.round_verdicts[r]
@@ -1,6 +1,6 @@
 import logging
 from copy import deepcopy
-from typing import Callable
+from typing import Callable, List, Optional, Tuple
 
 from celery import Celery
 from celery.canvas import chain, group
@@ -23,13 +23,19 @@ def submit_puts_jobs(app: Celery, team: models.Team, task: models.Task, r: int):
     scheme.apply_async()
 
 
-def submit_check_gets_jobs(app: Celery, team: models.Team, task: models.Task, r: int):
+def submit_check_gets_jobs(
+        app: Celery,
+        team: models.Team,
+        task: models.Task,
+        r: int,
+        get_flags: Optional[List[Tuple[int, Optional[models.Flag]]]] = None,
+):
     kwargs, params = utils.get_round_setup(app, team, task, r)
 
     handler = utils.get_result_handler_signature(app, kwargs)
     check = utils.get_check_signature(app, kwargs, params)
     noop = utils.get_noop_signature(app)
-    gets = utils.get_gets_chain(app, task, kwargs, params)
+    gets = utils.get_gets_chain(app, task, kwargs, params, get_flags)
     scheme = chain(check, group([noop, gets]), handler)
     scheme.apply_async()
 
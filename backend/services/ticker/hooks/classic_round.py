@@ -1,21 +1,28 @@
 import logging
+from typing import List, Optional, Tuple
 
 from celery import Celery
 from celery.canvas import chain, group
 
-from lib import models
+from lib import config, models
 from . import utils
 
 logger = logging.getLogger(__name__)
 
 
-def submit_full_round_jobs(app: Celery, team: models.Team, task: models.Task, r: int):
+def submit_full_round_jobs(
+        app: Celery,
+        team: models.Team,
+        task: models.Task,
+        r: int,
+        get_flags: List[Tuple[int, Optional[models.Flag]]],
+):
     kwargs, params = utils.get_round_setup(app, team, task, r)
 
     check = utils.get_check_signature(app, kwargs, params)
     noop = utils.get_noop_signature(app)
     puts = utils.get_puts_group(app, task, kwargs, params)
-    gets = utils.get_gets_chain(app, task, kwargs, params)
+    gets = utils.get_gets_chain(app, task, kwargs, params, get_flags)
 
     handler = utils.get_result_handler_signature(app, kwargs)
 
@@ -27,12 +34,56 @@ def submit_full_round_jobs(app: Celery, team: models.Team, task: models.Task, r:
     scheme.apply_async()
 
 
+def submit_round_job(
+        app: Celery,
+        team: models.Team,
+        task: models.Task,
+        r: int,
+        get_flags: List[Tuple[int, Optional[models.Flag]]],
+):
+    kwargs, params = utils.get_round_setup(app, team, task, r)
+    job = utils.get_round_job_signature(app, task, kwargs, params, get_flags)
+    job.apply_async()
+
+
+def submit_stream_round_jobs(
+        app: Celery,
+        team: models.Team,
+        task: models.Task,
+        r: int,
+        get_flags: List[Tuple[int, Optional[models.Flag]]],
+):
+    kwargs, params = utils.get_round_setup(app, team, task, r)
+    # verdicts are aggregated from the round's stream, not passed to the handler
+    kwargs['stream_verdict'] = True
+    params['ignore_result'] = True
+
+    check = utils.get_check_signature(app, kwargs, params)
+    puts = utils.get_puts_group(app, task, kwargs, params)
+    gets = utils.get_gets_chain(app, task, kwargs, params, get_flags)
+
+    scheme = chain(check, group([puts, gets]))
+    scheme.apply_async()
+
+
 def run_classic_round(state):
     new_round = utils.update_round()
     if not new_round:
         return
 
     args_list = utils.get_round_processor_args(new_round)
+    get_flags = utils.get_round_get_flags(new_round, args_list)
+
+    checkers_config = config.get_checkers_config()
+    if checkers_config.single_round_job:
+        submit_jobs = submit_round_job
+    elif checkers_config.stream_verdicts:
+        utils.open_round_verdicts(new_round, args_list)
+        submit_jobs = submit_stream_round_jobs
+    else:
+        submit_jobs = submit_full_round_jobs
 
-    for args in args_list:
-        submit_full_round_jobs(state.celery_app, *args)
+    for team, task, r in args_list:
+        submit_jobs(
+            state.celery_app, team, task, r, get_flags[(team.id, task.id)],
+        )
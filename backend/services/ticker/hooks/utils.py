@@ -1,7 +1,8 @@
 import itertools
 import logging
 import random
-from typing import List, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 
 from celery import Celery
 from celery.canvas import signature, group, chain
@@ -25,6 +26,63 @@ def get_round_processor_args(r: int, **kwargs) -> List[tuple]:
     return round_args
 
 
+def get_round_get_flags(
+        r: int,
+        round_args: List[tuple],
+) -> Dict[Tuple[int, int], List[Tuple[int, Optional[models.Flag]]]]:
+    """
+    Preselect flags for all GET actions of the round with a single query.
+
+    Rounds and flags are picked at random the same way "get_action" does,
+    so the workers don't need to query storage for GETs. Flags of the round
+    itself aren't put yet, so for the GETs picking it only the round is
+    preselected, and the flag is picked by the worker after the check.
+
+    :param r: round to run GETs in
+    :param round_args: (team, task, round) tuples of the round
+    :returns: (round, flag or None) for each GET by (team id, task id)
+    """
+    flag_lifetime = storage.game.get_current_game_config().flag_lifetime
+    rounds_to_check = storage.flags.get_rounds_to_check(r, flag_lifetime)
+    flags = storage.flags.get_rounds_flags(
+        rounds=[x for x in rounds_to_check if x < r],
+        task_ids=list({task.id for _, task, _ in round_args}),
+    )
+
+    result = {}
+    for team, task, _ in round_args:
+        picks = []
+        for _ in range(task.gets):
+            round_to_check = random.choice(rounds_to_check)
+            candidates = flags.get((team.id, task.id, round_to_check))
+            flag = random.choice(candidates) if candidates else None
+            picks.append((round_to_check, flag))
+        result[(team.id, task.id)] = picks
+    return result
+
+
+def open_round_verdicts(r: int, round_args: List[tuple]) -> None:
+    """
+    Register the round's team tasks to be aggregated from the verdicts stream.
+
+    Missing verdicts are waited for until the end of the round and
+    the time limits of the longest chain of actions (check & gets) after it.
+
+    :param r: round to run actions in
+    :param round_args: (team, task, round) tuples of the round
+    """
+    round_time = storage.game.get_current_game_config().round_time
+    chain_time = max(
+        ((1 + task.gets) * (task.checker_timeout + 5) for _, task, _ in round_args),
+        default=0,
+    )
+    storage.verdicts.open_round(
+        r,
+        team_tasks=[(team.id, task.id) for team, task, _ in round_args],
+        deadline=time.time() + round_time + chain_time,
+    )
+
+
 def get_noop_signature(app: Celery) -> signature:
     return app.signature(JobNames.noop_action)
 
@@ -41,14 +99,48 @@ def get_puts_group(app: Celery, task: models.Task, kwargs: dict, params: dict) -
     return group(*signatures)
 
 
-def get_gets_chain(app: Celery, task: models.Task, kwargs: dict, params: dict) -> chain:
+def get_gets_chain(
+        app: Celery,
+        task: models.Task,
+        kwargs: dict,
+        params: dict,
+        get_flags: Optional[List[Tuple[int, Optional[models.Flag]]]] = None,
+) -> chain:
+    if get_flags is None:
+        signatures = [
+            app.signature(JobNames.get_action, kwargs=kwargs, **params)
+            for _ in range(task.gets)
+        ]
+        return chain(*signatures)
+
     signatures = [
-        app.signature(JobNames.get_action, kwargs=kwargs, **params)
-        for _ in range(task.gets)
+        app.signature(
+            JobNames.get_action,
+            kwargs={**kwargs, 'get_round': get_round, 'get_flag': get_flag},
+            **params,
+        )
+        for get_round, get_flag in get_flags
     ]
     return chain(*signatures)
 
 
+def get_round_job_signature(
+        app: Celery,
+        task: models.Task,
+        kwargs: dict,
+        params: dict,
+        get_flags: Optional[List[Tuple[int, Optional[models.Flag]]]] = None,
+) -> signature:
+    # the job runs all actions, each of which could take the whole timeout
+    actions = 1 + task.puts + task.gets
+    params = {**params, 'time_limit': params['time_limit'] * actions}
+    return app.signature(
+        JobNames.round_action,
+        kwargs={**kwargs, 'get_flags': get_flags},
+        **params,
+    )
+
+
 def get_result_handler_signature(app: Celery, kwargs: dict) -> signature:
     return app.signature(JobNames.result_handler, kwargs=kwargs)
 
@@ -1,9 +1,11 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Callable, Optional
+from typing import DefaultDict, Dict, List, Callable, Optional, Set, Tuple
 
 from celery import Celery
 
+from lib import models
 from lib.storage import schedules
 
 
@@ -48,11 +50,25 @@ class Schedule:
         return False
 
 
+@dataclass
+class RoundVerdicts:
+    """Verdicts of the round's team tasks read from its stream so far."""
+
+    expected: Set[Tuple[int, int]]
+    done: Set[Tuple[int, int]]
+    last_id: str = '0'
+    verdicts: DefaultDict[Tuple[int, int], List[models.CheckerVerdict]] = field(
+        default_factory=lambda: defaultdict(list),
+    )
+    final: Dict[Tuple[int, int], models.CheckerVerdict] = field(default_factory=dict)
+
+
 @dataclass
 class TickerState:
     celery_app: Celery
     game_started: bool
     schedules: List[Schedule] = field(default_factory=list)
+    round_verdicts: Dict[int, RoundVerdicts] = field(default_factory=dict)
 
     def register_schedule(self, schedule: Schedule) -> None:
         self.schedules.append(schedule)
@@ -5,4 +5,4 @@ from cli.utils import run_docker
 
 @click.command(help='Stop updating rounds & receiving flags')
 def pause():
-    run_docker(['stop', 'ticker', 'http-receiver'])
+    run_docker(['stop', 'ticker', 'http-receiver', 'tcp-receiver'])
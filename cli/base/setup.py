@@ -7,12 +7,14 @@ from cli.options import with_external_services_option
 
 @click.command(help='Initialize ForcAD configuration')
 @with_external_services_option
-def setup(redis, database, rabbitmq, **_kwargs):
+def setup(redis, database, rabbitmq, db_pooler, **_kwargs):
     utils.backup_config()
 
     basic_config = utils.load_basic_config()
     config = utils.setup_auxiliary_structure(basic_config)
     utils.override_config(config, redis=redis, database=database, rabbitmq=rabbitmq)
+    if db_pooler:
+        config.storages.db.pooler = True
 
     utils.dump_config(config)
 
@@ -21,18 +23,35 @@ def setup(redis, database, rabbitmq, **_kwargs):
     setup_rabbitmq(config.storages.rabbitmq)
     setup_admin_api(config.admin)
 
-    prepare_compose(redis=redis, database=database, rabbitmq=rabbitmq)
+    prepare_compose(
+        redis=redis,
+        database=database,
+        rabbitmq=rabbitmq,
+        db_pooler=config.storages.db.pooler,
+    )
 
 
 def setup_db(config: models.DatabaseConfig):
     postgres_config = [
         "# THIS FILE IS MANAGED BY 'control.py'",
-        f'POSTGRES_HOST={config.host}',
-        f'POSTGRES_PORT={config.port}',
         f'POSTGRES_USER={config.user}',
         f'POSTGRES_PASSWORD={config.password}',
         f'POSTGRES_DB={config.dbname}',
     ]
+    if config.pooler:
+        # services connect to pgbouncer, which connects to the real database
+        postgres_config += [
+            f'POSTGRES_HOST={constants.PGBOUNCER_HOST}',
+            f'POSTGRES_PORT={constants.PGBOUNCER_PORT}',
+            'POSTGRES_TRANSACTION_POOLING=true',
+            f'PGBOUNCER_UPSTREAM_HOST={config.host}',
+            f'PGBOUNCER_UPSTREAM_PORT={config.port}',
+        ]
+    else:
+        postgres_config += [
+            f'POSTGRES_HOST={config.host}',
+            f'POSTGRES_PORT={config.port}',
+        ]
 
     utils.print_bold(f'Writing database env to {constants.POSTGRES_ENV_PATH}')
     constants.POSTGRES_ENV_PATH.write_text('\n'.join(postgres_config))
@@ -77,7 +96,7 @@ def setup_admin_api(config: models.AdminConfig):
     constants.ADMIN_ENV_PATH.write_text('\n'.join(admin_config))
 
 
-def prepare_compose(redis: str, database: str, rabbitmq: str):
+def prepare_compose(redis: str, database: str, rabbitmq: str, db_pooler: bool):
     with constants.FULL_COMPOSE_PATH.open(mode='r') as f:
         base_conf = yaml.safe_load(f)
 
@@ -87,6 +106,16 @@ def prepare_compose(redis: str, database: str, rabbitmq: str):
     if database:
         del base_conf['services']['postgres']
 
+    if not db_pooler:
+        del base_conf['services']['pgbouncer']
+        for service in base_conf['services'].values():
+            depends_on = service.get('depends_on')
+            # services wait for the pooler in the mapping form only
+            if isinstance(depends_on, dict):
+                depends_on.pop('pgbouncer', None)
+                if not depends_on:
+                    del service['depends_on']
+
     if rabbitmq:
         del base_conf['services']['rabbitmq']
 
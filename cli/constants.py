@@ -2,6 +2,9 @@ from pathlib import Path
 
 ADMIN_USER = 'forcad'
 
+PGBOUNCER_HOST = 'pgbouncer'
+PGBOUNCER_PORT = 6432
+
 BASE_DIR = Path(__file__).absolute().resolve().parents[1]
 BASE_COMPOSE_FILE = 'docker-compose-base.yml'
 FAST_COMPOSE_FILE = 'docker-compose-fast.yml'
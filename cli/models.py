@@ -15,6 +15,7 @@ class DatabaseConfig(BaseModel):
     host: str = 'postgres'
     port: int = 5432
     dbname: str = 'forcad'
+    pooler: bool = False
 
 
 class RabbitMQConfig(BaseModel):
@@ -50,6 +51,10 @@ class GameConfig(BaseModel):
     get_period: Optional[int] = None
     inflation: bool = True
     volga_attacks_mode: bool = False
+    flag_rate_limit: float = 0
+    flag_rate_burst: int = 500
+    write_behind_mode: bool = False
+    signed_flags: bool = False
 
     checkers_path: str = '/checkers/'
     env_path: str = ''
@@ -30,6 +30,11 @@ def with_external_services_option(func):
         metavar='ADDR',
         help='External Postgres address (disables built-in postgres container)',
     )(wrapped)
+    wrapped = click.option(
+        '--db-pooler',
+        is_flag=True,
+        help='Connect to Postgres through the built-in pgbouncer in transaction mode',
+    )(wrapped)
     wrapped = click.option(
         '--rabbitmq',
         metavar='ADDR',
@@ -8,10 +8,18 @@ cd /app/services
 
 case ${SERVICE} in
 "worker")
-  echo "[*] Starting celery worker"
-  celery -A tasks.app \
-    worker \
-    -E -l info
+  if [[ "${CHECKERS_ASYNC_EXECUTOR}" == "true" ]]; then
+    echo "[*] Starting celery worker with async checkers executor"
+    celery -A tasks.app \
+      worker \
+      -E -l info \
+      -P threads -c "${CHECKERS_ASYNC_CONCURRENCY:-500}"
+  else
+    echo "[*] Starting celery worker"
+    celery -A tasks.app \
+      worker \
+      -E -l info
+  fi
   ;;
 "flower")
   set +e
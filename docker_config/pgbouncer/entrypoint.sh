@@ -0,0 +1,28 @@
+#!/bin/sh
+
+set -e
+
+echo "[*] Writing pgbouncer config for ${PGBOUNCER_UPSTREAM_HOST}:${PGBOUNCER_UPSTREAM_PORT}/${POSTGRES_DB}"
+
+cat >/etc/pgbouncer/pgbouncer.ini <<CONFIG
+[databases]
+${POSTGRES_DB} = host=${PGBOUNCER_UPSTREAM_HOST} port=${PGBOUNCER_UPSTREAM_PORT} dbname=${POSTGRES_DB}
+
+[pgbouncer]
+listen_addr = 0.0.0.0
+listen_port = 6432
+auth_type = md5
+auth_file = /etc/pgbouncer/userlist.txt
+pool_mode = transaction
+max_client_conn = ${PGBOUNCER_MAX_CLIENT_CONN:-5000}
+default_pool_size = ${PGBOUNCER_POOL_SIZE:-50}
+reserve_pool_size = 10
+ignore_startup_parameters = extra_float_digits,options
+CONFIG
+
+echo "\"${POSTGRES_USER}\" \"${POSTGRES_PASSWORD}\"" >/etc/pgbouncer/userlist.txt
+chmod 640 /etc/pgbouncer/userlist.txt
+chown root:pgbouncer /etc/pgbouncer/userlist.txt /etc/pgbouncer/pgbouncer.ini
+
+echo "[*] Starting pgbouncer"
+exec pgbouncer -u pgbouncer /etc/pgbouncer/pgbouncer.ini
@@ -23,9 +23,34 @@ start_events() {
 }
 
 start_http_receiver() {
+  if [ -n "${PROMETHEUS_MULTIPROC_DIR}" ]; then
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+    mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+  fi
   start_web http_receiver
 }
 
+start_async_receiver() {
+  echo "[*] Starting async flag receiver"
+  cd services/async_receiver
+  gunicorn "app:app" \
+    --bind "0.0.0.0:${PORT:-5000}" \
+    --log-level "${LOG_LEVEL:-INFO}" \
+    --worker-class aiohttp.GunicornWebWorker
+}
+
+start_tcp_receiver() {
+  echo "[*] Starting tcp flag receiver"
+  cd services
+  python3 -m tcp_receiver
+}
+
+start_attacks_writer() {
+  echo "[*] Starting attacks writer"
+  cd services
+  python3 -m attacks_writer
+}
+
 start_ticker() {
   echo "[*] Starting ticker"
   cd services
@@ -0,0 +1,111 @@
+"""
+Async checkers executor benchmark: time to run all checker actions of a round.
+
+Runs `--teams` * `--services` CHECK actions of a generated checker,
+which waits for `--checker-time` seconds (like a checker waiting for
+the network), with `--processes` workers running one action at a time each
+(the default prefork worker) and with the same number of worker processes
+driving the checkers with the async executor at `--concurrency` actions
+at once each. Checkers in `--slow-share` of the actions hang, so they're
+terminated on timeout as usual. Doesn't need any storage:
+
+    python tests/bench_async_executor.py
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.helpers import commands
+from lib.models import Action, TaskStatus
+
+CHECKER = '''#!/bin/sh
+if [ "$2" = "slow" ]; then
+    exec sleep 1000
+fi
+sleep {checker_time}
+echo OK
+exit 101
+'''
+
+
+def run_round(task, ips, workers):
+    logger = logging.getLogger('bench')
+
+    def run_action(ip):
+        team = models.Team(id=1, name='bench', ip=ip, token='bench')
+        verdict = commands.run_generic_command(
+            [task.checker, 'check', ip], Action.CHECK, task, team, logger,
+        )
+        return TaskStatus(verdict.status).name
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(run_action, ips))
+    elapsed = time.monotonic() - start
+    counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+    return elapsed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Async checkers executor benchmark')
+    parser.add_argument('--teams', type=int, default=100)
+    parser.add_argument('--services', type=int, default=10)
+    parser.add_argument('--checker-time', type=float, default=0.5)
+    parser.add_argument('--checker-timeout', type=int, default=3)
+    parser.add_argument('--slow-share', type=float, default=0.05)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=500)
+    args = parser.parse_args()
+
+    actions = args.teams * args.services
+    slow = int(actions * args.slow_share)
+    ips = ['slow'] * slow + ['10.0.0.1'] * (actions - slow)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checker = Path(tmp_dir) / 'checker.sh'
+        checker.write_text(CHECKER.format(checker_time=args.checker_time))
+        checker.chmod(0o755)
+
+        task = models.Task(
+            id=1,
+            name='bench',
+            checker=str(checker),
+            gets=1,
+            puts=1,
+            places=1,
+            checker_timeout=args.checker_timeout,
+            checker_type='hackerdom',
+            env_path='/checkers/bin/',
+            default_score=1000,
+            get_period=60,
+            active=True,
+        )
+
+        # worker processes run their shares of the round in parallel,
+        # so the round takes as long as one process' share does
+        share = ips[::args.processes]
+        for name, async_executor, workers in (
+                ('prefork', False, 1),
+                ('async executor', True, args.concurrency),
+        ):
+            os.environ['CHECKERS_ASYNC_EXECUTOR'] = str(async_executor)
+            elapsed, counts = run_round(task, share, workers)
+            print(
+                f'{name}: {actions} actions on {args.processes} processes '
+                f'in {elapsed:.1f}s, statuses {counts}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Checker runners benchmark: fresh process per action vs warm server vs module.
+
+Runs `--actions` CHECK actions of a checker as separate processes (default
+checker mode), on a warm checker server ("warm" checker tag) and in-process
+("module" checker tag), reporting the time per action. By default
+a generated checker importing a few heavy standard library modules is used,
+pass `--checker` (and `--env-path`) to measure a real one (it must provide
+"check" function for the "module" runner), e.g. against a local vulnbox:
+
+    python tests/bench_checker_runners.py --checker checkers/collacode/checker.py \\
+        --host 127.0.0.1
+
+Doesn't need any storage.
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.helpers import commands
+from lib.models import Action, TaskStatus
+
+SAMPLE_CHECKER = '''#!/usr/bin/env python3
+import argparse
+import asyncio
+import email.mime.multipart
+import http.client
+import json
+import sys
+import urllib.request
+import xml.etree.ElementTree
+
+
+def check(host):
+    print(json.dumps({'action': 'check', 'host': host}))
+    sys.exit(101)
+
+
+if __name__ == '__main__':
+    check(sys.argv[2])
+'''
+
+
+def bench(name, task, team, args):
+    logger = logging.getLogger('bench')
+    command = [task.checker, 'check', team.ip]
+
+    # the first action starts the warm checker server or imports the module
+    commands.run_generic_command(command, Action.CHECK, task, team, logger)
+
+    start = time.perf_counter()
+    statuses = set()
+    for _ in range(args.actions):
+        verdict = commands.run_generic_command(
+            command, Action.CHECK, task, team, logger,
+        )
+        statuses.add(TaskStatus(verdict.status).name)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f'{name}: {elapsed / args.actions * 1000:.1f}ms/action, '
+        f'statuses {sorted(statuses)}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Checker runners benchmark')
+    parser.add_argument('--checker')
+    parser.add_argument('--env-path', default='/checkers/bin/')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--actions', type=int, default=100)
+    parser.add_argument('--timeout', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checker = args.checker
+        if checker is None:
+            checker_path = Path(tmp_dir) / 'checker.py'
+            checker_path.write_text(SAMPLE_CHECKER)
+            checker_path.chmod(0o755)
+            checker = str(checker_path)
+
+        team = models.Team(id=1, name='bench', ip=args.host, token='bench')
+        runners = (
+            ('process', 'hackerdom'),
+            ('warm', 'warm'),
+            ('module', 'module'),
+        )
+        for name, checker_type in runners:
+            task = models.Task(
+                id=1,
+                name='bench',
+                checker=str(Path(checker).resolve()),
+                gets=1,
+                puts=1,
+                places=1,
+                checker_timeout=args.timeout,
+                checker_type=checker_type,
+                env_path=args.env_path,
+                default_score=1000,
+                get_period=60,
+                active=True,
+            )
+            bench(name, task, team, args)
+
+
+if __name__ == '__main__':
+    main()
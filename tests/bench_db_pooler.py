@@ -0,0 +1,147 @@
+"""
+Database pooler benchmark: server connections & throughput of many workers.
+
+Simulates `--workers` celery worker processes, each with its own connection
+pool of `--pool-size` connections, as threads running the checker's hot
+query (random flag of a round) with `--think-time` seconds between the
+queries, as the workers spend most of the time waiting for checkers.
+Reports the throughput, errors and peak number of PostgreSQL backends
+(from pg_stat_activity) for each target. Needs the game database, run with
+the storage environment of the backend, once connecting to PostgreSQL
+directly and once through PgBouncer, e.g.:
+
+    set -a
+    . docker_config/postgres_environment.env
+    POSTGRES_HOST=127.0.0.1 POSTGRES_PORT=5432 python tests/bench_db_pooler.py
+    POSTGRES_HOST=<pgbouncer> POSTGRES_PORT=6432 POSTGRES_TRANSACTION_POOLING=true \\
+        python tests/bench_db_pooler.py
+
+Direct connections need `max_connections` above `--workers` * `--pool-size`,
+otherwise the errors show how many workers couldn't connect at all.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import pool
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import config
+from lib.storage import utils
+from lib.storage.flags import _GET_RANDOM_ROUND_FLAG_QUERY
+
+COUNT_BACKENDS_QUERY = '''
+SELECT COUNT(*) FROM pg_stat_activity
+WHERE datname = current_database() AND pid <> pg_backend_pid()
+'''
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.errors = 0
+        self.latency = 0.0
+
+    def record(self, latency=None):
+        with self.lock:
+            if latency is None:
+                self.errors += 1
+            else:
+                self.queries += 1
+                self.latency += latency
+
+
+def worker(database_config, pool_config, args, stats, stop):
+    try:
+        db_pool = utils.BlockingConnectionPool(
+            minconn=args.pool_size,
+            maxconn=args.pool_size,
+            timeout=pool_config.pool_timeout,
+            prepare_statements=not pool_config.transaction_pooling,
+            **database_config.model_dump(),
+        )
+    except psycopg2.Error:
+        stats.record()
+        return
+
+    params = {'round': 1, 'team_id': 1, 'task_id': 1}
+    while not stop.is_set():
+        start = time.monotonic()
+        try:
+            conn = db_pool.getconn()
+            try:
+                with conn.cursor() as curs:
+                    _GET_RANDOM_ROUND_FLAG_QUERY.execute(curs, params)
+                    curs.fetchone()
+                conn.commit()
+            finally:
+                db_pool.putconn(conn)
+        except (psycopg2.Error, pool.PoolError):
+            stats.record()
+        else:
+            stats.record(time.monotonic() - start)
+        stop.wait(args.think_time)
+
+    db_pool.closeall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database pooler benchmark')
+    parser.add_argument('--workers', type=int, default=200)
+    parser.add_argument('--pool-size', type=int, default=1)
+    parser.add_argument('--think-time', type=float, default=0.05)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    database_config = config.get_db_config()
+    pool_config = config.get_db_pool_config()
+    target = f'{database_config.host}:{database_config.port}'
+    mode = 'transaction pooling' if pool_config.transaction_pooling else 'direct'
+
+    stats = Stats()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(database_config, pool_config, args, stats, stop),
+        )
+        for _ in range(args.workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # through the pooler, pg_stat_activity shows its server connections
+    peak = 0
+    monitor = psycopg2.connect(**database_config.model_dump())
+    monitor.autocommit = True
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        with monitor.cursor() as curs:
+            curs.execute(COUNT_BACKENDS_QUERY)
+            peak = max(peak, curs.fetchone()[0])
+        time.sleep(0.2)
+    monitor.close()
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    mean_latency = stats.latency / stats.queries * 1000 if stats.queries else 0
+    print(
+        f'{mode} ({target}), {args.workers} workers: '
+        f'{stats.queries / args.duration:.0f} queries/s, '
+        f'mean latency {mean_latency:.2f}ms, {stats.errors} errors, '
+        f'peak {peak} server connections'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Live flags filter benchmark: false positive rate, memory and lookup cost.
+
+Fills the receivers' live flags filter with `--flags-per-round` generated
+flags for each of the `--lifetime` + 1 live rounds and probes it with
+the same number of flags which were never added, also with the rounds
+overfilled `--overfill` times over the expected capacity. Doesn't need any
+storage:
+
+    python tests/bench_flags_filter.py
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.flags import LiveFlagsFilter
+
+CURRENT_ROUND = 100
+
+
+def generate_flags(count, flag_round):
+    return [
+        (models.Flag.generate('bench', 1, 1, flag_round).flag, flag_round)
+        for _ in range(count)
+    ]
+
+
+def bench(name, error_rate, capacity, flags_per_round, lifetime):
+    live = []
+    for flag_round in range(CURRENT_ROUND - lifetime, CURRENT_ROUND + 1):
+        live.extend(generate_flags(flags_per_round, flag_round))
+    probes = [flag for flag, _ in generate_flags(len(live), CURRENT_ROUND)]
+
+    flags_filter = LiveFlagsFilter(
+        logger=logging.getLogger('bench'),
+        error_rate=error_rate,
+    )
+    start = time.perf_counter()
+    flags_filter.load_flags(live, capacity=capacity, flag_lifetime=lifetime)
+    load_elapsed = time.perf_counter() - start
+
+    live_flags = [flag for flag, _ in live]
+    assert all(flags_filter.contains_many(live_flags, CURRENT_ROUND))
+
+    start = time.perf_counter()
+    passed = flags_filter.contains_many(probes, CURRENT_ROUND)
+    lookup_elapsed = time.perf_counter() - start
+
+    print(
+        f'{name}: {len(live)} live flags, {flags_filter.nbytes / 1024:.1f} KiB, '
+        f'false positives {sum(passed) / len(probes):.4%} '
+        f'(target {error_rate:.4%}), '
+        f'add {load_elapsed / len(live) * 1e6:.2f}us/flag, '
+        f'lookup {lookup_elapsed / len(probes) * 1e6:.2f}us/flag'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live flags filter benchmark')
+    parser.add_argument('--flags-per-round', type=int, default=3000)
+    parser.add_argument('--lifetime', type=int, default=5)
+    parser.add_argument('--error-rate', type=float, default=0.001)
+    parser.add_argument('--overfill', type=float, default=2)
+    args = parser.parse_args()
+
+    bench(
+        'sized',
+        args.error_rate,
+        args.flags_per_round,
+        args.flags_per_round,
+        args.lifetime,
+    )
+    bench(
+        f'overfilled x{args.overfill:g}',
+        args.error_rate,
+        args.flags_per_round,
+        int(args.flags_per_round * args.overfill),
+        args.lifetime,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Flags cache memory benchmark: two json strings per flag vs round hashes.
+
+Writes `--flags` generated flags to redis in both formats, reporting the redis
+memory used by each and the time to decode a flag on lookup. Needs only redis,
+run with the storage environment of the backend, e.g.:
+
+    set -a
+    . docker_config/redis_environment.env
+    REDIS_HOST=127.0.0.1 python tests/bench_flags_memory.py
+
+Flags are written for a round far in the future & removed afterwards.
+"""
+
+import argparse
+import secrets
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models, storage
+from lib.storage.keys import CacheKeys
+
+BENCH_ROUND = 10 ** 9
+BATCH_SIZE = 1000
+
+
+def generate_flags(count, rounds):
+    flags = []
+    for i in range(count):
+        flag = models.Flag.generate('bench', 1, 1, BENCH_ROUND + i % rounds)
+        flag.id = BENCH_ROUND + i
+        flag.private_flag_data = secrets.token_hex(20)
+        flag.public_flag_data = ''
+        flag.vuln_number = 1
+        flags.append(flag)
+    return flags
+
+
+def write_legacy(flags):
+    for i in range(0, len(flags), BATCH_SIZE):
+        with storage.utils.redis_pipeline(transaction=False) as pipe:
+            for flag in flags[i:i + BATCH_SIZE]:
+                pipe.set(f'flag:id:{flag.id}', flag.to_json(), ex=3600)
+                pipe.set(f'flag:str:{flag.flag}', flag.to_json(), ex=3600)
+            pipe.execute()
+
+
+def write_compact(flags):
+    for i in range(0, len(flags), BATCH_SIZE):
+        with storage.utils.redis_pipeline(transaction=False) as pipe:
+            storage.caching.cache_flags(flags[i:i + BATCH_SIZE], 3600, pipe)
+            pipe.execute()
+
+
+def cleanup(flags, rounds):
+    with storage.utils.redis_pipeline(transaction=False) as pipe:
+        for flag_round in range(BENCH_ROUND, BENCH_ROUND + rounds):
+            pipe.delete(CacheKeys.round_flags(flag_round))
+            pipe.delete(CacheKeys.round_flags_data(flag_round))
+        for i in range(0, len(flags), BATCH_SIZE):
+            batch = flags[i:i + BATCH_SIZE]
+            pipe.delete(*(f'flag:id:{f.id}' for f in batch))
+            pipe.delete(*(f'flag:str:{f.flag}' for f in batch))
+        pipe.execute()
+
+
+def used_memory():
+    return storage.utils.RedisStorage.get().info('memory')['used_memory']
+
+
+def keys_memory(keys):
+    client = storage.utils.RedisStorage.get()
+    return sum(client.memory_usage(key, samples=0) or 0 for key in keys)
+
+
+def measure_memory(name, write, flags, rounds, submit_memory):
+    cleanup(flags, rounds)
+    before = used_memory()
+    write(flags)
+    used = used_memory() - before
+    submit_used = submit_memory()
+    print(
+        f'{name}: {used / 2 ** 20:.1f} MiB total, {used / len(flags):.0f} B/flag, '
+        f'submit path {submit_used / len(flags):.0f} B/flag'
+    )
+    cleanup(flags, rounds)
+
+
+def measure_decode(flags):
+    legacy = [flag.to_json() for flag in flags]
+    start = time.perf_counter()
+    for data in legacy:
+        models.Flag.from_json(data)
+    legacy_elapsed = time.perf_counter() - start
+
+    compact = [(flag.flag, flag.pack()) for flag in flags]
+    start = time.perf_counter()
+    for flag_str, packed in compact:
+        models.Flag.unpack(flag_str, packed)
+    compact_elapsed = time.perf_counter() - start
+
+    print(
+        f'decode: json {legacy_elapsed / len(flags) * 1e6:.2f}us/flag, '
+        f'packed {compact_elapsed / len(flags) * 1e6:.2f}us/flag'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flags cache memory benchmark')
+    parser.add_argument('--flags', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    flags = generate_flags(args.flags, args.rounds)
+    # MEMORY USAGE of each of the legacy keys would take long, estimate by 1%
+    sample = flags[::100]
+    legacy_keys = [f'flag:str:{f.flag}' for f in sample]
+    compact_keys = [
+        CacheKeys.round_flags(r)
+        for r in range(BENCH_ROUND, BENCH_ROUND + args.rounds)
+    ]
+
+    try:
+        measure_memory(
+            'json strings',
+            write_legacy,
+            flags,
+            args.rounds,
+            lambda: keys_memory(legacy_keys) * len(flags) / len(sample),
+        )
+        measure_memory(
+            'round hashes',
+            write_compact,
+            flags,
+            args.rounds,
+            lambda: keys_memory(compact_keys),
+        )
+    finally:
+        cleanup(flags, args.rounds)
+
+    measure_decode(flags)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Flags cache warm-up benchmark: one MULTI with all flags vs streaming batches.
+
+Inserts `--flags` live flags for the current round, then warms the flags cache
+up from scratch with both implementations, measuring the warm-up time, peak
+python memory and the latency of redis PINGs sent meanwhile (how long redis is
+blocked for other clients). Needs the game database & redis, run with
+the storage environment of the backend, e.g.:
+
+    set -a
+    . docker_config/postgres_environment.env
+    . docker_config/redis_environment.env
+    POSTGRES_HOST=127.0.0.1 REDIS_HOST=127.0.0.1 python tests/bench_flags_warmup.py
+
+Inserted flags are deleted afterwards unless `--keep` is passed.
+"""
+
+import argparse
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from psycopg2 import extras
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models, storage
+from lib.storage.keys import CacheKeys
+
+INSERT_FLAGS_QUERY = '''
+INSERT INTO Flags (flag, team_id, task_id, round, public_flag_data, private_flag_data)
+VALUES %s RETURNING id
+'''
+
+
+def insert_flags(count, current_round):
+    team = storage.teams.get_teams()[0]
+    task = storage.tasks.get_tasks()[0]
+    flags = [
+        models.Flag.generate(task.name, team.id, task.id, current_round)
+        for _ in range(count)
+    ]
+    rows = [(f.flag, f.team_id, f.task_id, f.round, '', '') for f in flags]
+    with storage.utils.db_cursor() as (conn, curs):
+        ids = extras.execute_values(curs, INSERT_FLAGS_QUERY, rows, fetch=True)
+        conn.commit()
+
+    for flag, (flag_id,) in zip(flags, ids):
+        flag.id = flag_id
+    return flags
+
+
+def delete_flags(flags):
+    with storage.utils.db_cursor() as (conn, curs):
+        curs.execute('DELETE FROM Flags WHERE id = ANY(%s)', ([f.id for f in flags],))
+        conn.commit()
+
+
+def reset_cache(flags):
+    with storage.utils.redis_pipeline(transaction=False) as pipe:
+        pipe.delete(CacheKeys.flags_cached())
+        for flag_round in {f.round for f in flags}:
+            pipe.delete(CacheKeys.round_flags(flag_round))
+            pipe.delete(CacheKeys.round_flags_data(flag_round))
+        for i in range(0, len(flags), 1000):
+            batch = flags[i:i + 1000]
+            pipe.delete(*(f'flag:id:{f.id}' for f in batch))
+            pipe.delete(*(f'flag:str:{f.flag}' for f in batch))
+        pipe.execute()
+
+
+def legacy_warm_up(current_round):
+    """Previous implementation: all flags fetched & written in one MULTI as json."""
+    game_config = storage.game.get_current_game_config()
+    expires = game_config.flag_lifetime * game_config.round_time * 2
+    with storage.utils.db_cursor(dict_cursor=True) as (_, curs):
+        curs.execute(
+            'SELECT * from Flags WHERE round >= %(round)s',
+            {'round': current_round - game_config.flag_lifetime},
+        )
+        flags = [models.Flag.from_dict(data) for data in curs.fetchall()]
+
+    with storage.utils.redis_pipeline(transaction=True) as pipe:
+        pipe.set(CacheKeys.flags_cached(), 1)
+        for flag in flags:
+            pipe.set(f'flag:id:{flag.id}', flag.to_json(), ex=expires)
+            pipe.set(f'flag:str:{flag.flag}', flag.to_json(), ex=expires)
+        pipe.execute()
+
+
+class Pinger(threading.Thread):
+    """Measures latency of redis PINGs from a separate connection."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.client = storage.utils.RedisStorage.create()
+        self.latencies = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            start = time.monotonic()
+            self.client.ping()
+            self.latencies.append(time.monotonic() - start)
+            time.sleep(0.001)
+
+
+def legacy_lookup(flags):
+    return storage.utils.RedisStorage.get().exists(
+        *(f'flag:str:{f.flag}' for f in flags),
+    )
+
+
+def lookup(flags):
+    found = storage.flags.get_flags_by_str(
+        flag_strs=[f.flag for f in flags],
+        current_round=flags[0].round,
+    )
+    return sum(flag is not None for flag in found)
+
+
+def bench(name, warm_up, count_cached, flags):
+    reset_cache(flags)
+    pinger = Pinger()
+    pinger.start()
+    tracemalloc.start()
+    start = time.monotonic()
+    warm_up()
+    elapsed = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pinger.stopped.set()
+    pinger.join()
+
+    latencies = sorted(pinger.latencies) or [0.0]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    sample = flags[::max(1, len(flags) // 100)]
+    cached = count_cached(sample)
+    print(
+        f'{name}: {elapsed:.2f}s, peak memory {peak / 2 ** 20:.1f} MiB, '
+        f'redis ping p99 {p99 * 1000:.1f}ms max {latencies[-1] * 1000:.1f}ms, '
+        f'{cached}/{len(sample)} sampled flags cached'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flags cache warm-up benchmark')
+    parser.add_argument('--flags', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    if args.batch_size:
+        storage.caching.FLAGS_WARMUP_BATCH_SIZE = args.batch_size
+
+    current_round = max(storage.game.get_real_round(), 1)
+    flags = insert_flags(args.flags, current_round)
+    try:
+        bench(
+            'single multi',
+            lambda: legacy_warm_up(current_round),
+            legacy_lookup,
+            flags,
+        )
+        bench('streaming', storage.flags.warm_up_flags_cache, lookup, flags)
+    finally:
+        if not args.keep:
+            reset_cache(flags)
+            delete_flags(flags)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+GET flag selection benchmark: ORDER BY RANDOM() query vs cached flag ids.
+
+Inserts a flag for each team & task for `--rounds` rounds, then picks
+random flags of the live rounds for GET actions as before (the query
+without the (team_id, task_id, round) index, which is dropped
+in a transaction rolled back afterwards), with the query using the index
+and from the per team & task flag id sets in redis. Needs the game
+database & redis of a game that isn't running, run with the storage
+environment of the backend, e.g.:
+
+    set -a
+    . docker_config/postgres_environment.env
+    . docker_config/redis_environment.env
+    POSTGRES_HOST=127.0.0.1 REDIS_HOST=127.0.0.1 python tests/bench_get_flag.py
+
+Inserted flags are deleted afterwards unless `--keep` is passed.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from psycopg2 import extras
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models, storage
+from lib.storage.keys import CacheKeys
+
+# rounds of the inserted flags start here, so they don't clash with the game ones
+FIRST_ROUND = 1000000
+
+INSERT_FLAGS_QUERY = '''
+INSERT INTO Flags (flag, team_id, task_id, round, public_flag_data, private_flag_data)
+VALUES %s RETURNING id
+'''
+
+GET_RANDOM_ROUND_FLAG_QUERY = '''
+SELECT id FROM Flags
+WHERE round = %(round)s AND team_id = %(team_id)s AND task_id = %(task_id)s
+ORDER BY RANDOM()
+LIMIT 1
+'''
+
+
+def insert_flags(rounds, teams, tasks):
+    flags = []
+    with storage.utils.db_cursor() as (conn, curs):
+        for flag_round in range(FIRST_ROUND, FIRST_ROUND + rounds):
+            round_flags = [
+                models.Flag.generate(task.name, team.id, task.id, flag_round)
+                for team in teams
+                for task in tasks
+            ]
+            rows = [
+                (f.flag, f.team_id, f.task_id, f.round, '', '')
+                for f in round_flags
+            ]
+            ids = extras.execute_values(curs, INSERT_FLAGS_QUERY, rows, fetch=True)
+            for flag, (flag_id,) in zip(round_flags, ids):
+                flag.id = flag_id
+            flags.extend(round_flags)
+        conn.commit()
+        conn.autocommit = True
+        curs.execute('ANALYZE Flags')
+        conn.autocommit = False
+    return flags
+
+
+def delete_flags(flags):
+    with storage.utils.db_cursor() as (conn, curs):
+        curs.execute('DELETE FROM Flags WHERE round >= %s', (FIRST_ROUND,))
+        conn.commit()
+
+    keys = {CacheKeys.flags_cached()}
+    for flag in flags:
+        keys.add(CacheKeys.round_flags(flag.round))
+        keys.add(CacheKeys.round_flags_data(flag.round))
+        keys.add(
+            CacheKeys.round_team_task_flags(flag.round, flag.team_id, flag.task_id),
+        )
+    storage.utils.RedisStorage.get().delete(*keys)
+
+
+def query_pick(curs, params, current_round):
+    curs.execute(GET_RANDOM_ROUND_FLAG_QUERY, params)
+    flag_id, = curs.fetchone()
+    return storage.flags.get_flag_by_id(flag_id, params['round'], current_round)
+
+
+def bench(name, pick, picks):
+    start = time.perf_counter()
+    for params in picks:
+        assert pick(params) is not None
+    elapsed = time.perf_counter() - start
+    print(f'{name}: {elapsed / len(picks) * 1000:.3f}ms/GET')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GET flag selection benchmark')
+    parser.add_argument('--rounds', type=int, default=10000)
+    parser.add_argument('--picks', type=int, default=2000)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    teams = storage.teams.get_teams()
+    tasks = storage.tasks.get_tasks()
+    game_config = storage.game.get_current_game_config()
+    current_round = FIRST_ROUND + args.rounds - 1
+
+    flags = insert_flags(args.rounds, teams, tasks)
+    print(f'{len(flags)} flags in {args.rounds} rounds')
+    try:
+        live = [f for f in flags if current_round - f.round < game_config.flag_lifetime]
+        with storage.utils.redis_pipeline(transaction=False) as pipe:
+            storage.caching.cache_flags(live, expires=3600, pipe=pipe)
+            pipe.set(CacheKeys.flags_cached(), 1)
+            pipe.execute()
+
+        picks = [
+            {'round': f.round, 'team_id': f.team_id, 'task_id': f.task_id}
+            for f in random.choices(live, k=args.picks)
+        ]
+
+        with storage.utils.db_cursor() as (conn, curs):
+            curs.execute('DROP INDEX IF EXISTS idx_flags_team_task_round')
+            bench(
+                'query, (round, team_id) index',
+                lambda params: query_pick(curs, params, current_round),
+                picks,
+            )
+            conn.rollback()
+
+        with storage.utils.db_cursor() as (conn, curs):
+            bench(
+                'query, (team_id, task_id, round) index',
+                lambda params: query_pick(curs, params, current_round),
+                picks,
+            )
+
+        bench(
+            'redis flag ids set',
+            lambda params: storage.flags.get_random_round_flag(
+                team_id=params['team_id'],
+                task_id=params['task_id'],
+                from_round=params['round'],
+                current_round=current_round,
+            ),
+            picks,
+        )
+    finally:
+        if not args.keep:
+            delete_flags(flags)
+
+
+if __name__ == '__main__':
+    main()
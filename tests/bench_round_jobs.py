@@ -0,0 +1,197 @@
+"""
+Round jobs benchmark: broker & result backend traffic of a classic round.
+
+Runs a round for the game's teams & tasks (with a trivial generated checker
+instead of the tasks' ones) on an in-process worker: with the chain of jobs
+for each team & task, with the chain reporting verdicts to the round's
+stream (aggregated here, as by the ticker) and with a single round job
+for each team & task. Counts messages published to the broker and commands
+sent to the result backend database (with redis MONITOR).
+
+Needs the broker, the game database & redis of a game that isn't running,
+with the celery workers stopped, so that they don't take the jobs.
+Run with the storage & broker environment of the backend, e.g.:
+
+    docker compose stop celery ticker
+    set -a
+    . docker_config/postgres_environment.env
+    . docker_config/redis_environment.env
+    . docker_config/rabbitmq_environment.env
+    POSTGRES_HOST=127.0.0.1 REDIS_HOST=127.0.0.1 RABBITMQ_HOST=127.0.0.1 \\
+        python tests/bench_round_jobs.py
+
+Statuses of the teams' tasks are changed, flags & logs of the bench rounds
+are deleted afterwards.
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import redis
+from celery.contrib.testing.worker import start_worker
+from celery.signals import after_task_publish
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+# worker imports the tasks modules as the celery service does
+sys.path.insert(0, str(BACKEND_DIR / 'services'))
+
+from lib import config, storage
+from lib.storage.keys import CacheKeys
+from services.ticker.hooks import aggregate_verdicts, classic_round, utils
+from services.ticker.models import TickerState
+from tasks.app import celery_app
+
+# rounds of the bench start here, so they don't clash with the game ones
+FIRST_ROUND = 1000000
+
+CHECKER = '''#!/bin/sh
+echo OK
+exit 101
+'''
+
+published = Counter()
+
+
+@after_task_publish.connect
+def count_message(sender=None, **_kwargs):
+    published[sender] += 1
+
+
+class BackendMonitor:
+    """Counts commands sent to the result backend database while entered."""
+
+    STOP = 'bench-round-jobs-stop'
+
+    def __init__(self, url):
+        self._client = redis.Redis.from_url(url)
+        self._db = self._client.connection_pool.connection_kwargs.get('db', 0)
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.commands = 0
+
+    def _run(self):
+        with self._client.monitor() as monitor:
+            self._ready.set()
+            for command in monitor.listen():
+                if command['command'] == f'ECHO {self.STOP}':
+                    return
+                if command['db'] == self._db:
+                    self.commands += 1
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *_exc):
+        self._client.echo(self.STOP)
+        self._thread.join()
+
+
+def wait_for_round(r, team_tasks, timeout, tick):
+    # each team task's final verdict is logged once
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        tick()
+        with storage.utils.db_cursor() as (_, curs):
+            curs.execute('SELECT COUNT(*) FROM TeamTasksLog WHERE round = %s', (r,))
+            done, = curs.fetchone()
+        if done >= team_tasks:
+            return
+        time.sleep(0.1)
+    raise TimeoutError(f'Round {r} is not finished in {timeout}s')
+
+
+def cleanup(rounds, teams, tasks):
+    with storage.utils.db_cursor() as (conn, curs):
+        curs.execute('DELETE FROM Flags WHERE round >= %s', (FIRST_ROUND,))
+        curs.execute('DELETE FROM TeamTasksLog WHERE round >= %s', (FIRST_ROUND,))
+        conn.commit()
+
+    keys = set()
+    for r in rounds:
+        storage.verdicts.close_round(r)
+        keys.add(CacheKeys.round_flags(r))
+        keys.add(CacheKeys.round_flags_data(r))
+        for team in teams:
+            for task in tasks:
+                keys.add(CacheKeys.round_team_task_flags(r, team.id, task.id))
+    storage.utils.RedisStorage.get().delete(*keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round jobs benchmark')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    teams = storage.teams.get_teams()
+    tasks = storage.tasks.get_tasks()
+    backend_url = config.get_celery_config().result_backend
+
+    modes = (
+        ('chain of jobs', classic_round.submit_full_round_jobs, False),
+        ('verdicts stream', classic_round.submit_stream_round_jobs, True),
+        ('single round job', classic_round.submit_round_job, False),
+    )
+    state = TickerState(celery_app=celery_app, game_started=False)
+    rounds = [FIRST_ROUND + i for i in range(len(modes))]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checker = Path(tmp_dir) / 'checker.sh'
+        checker.write_text(CHECKER)
+        checker.chmod(0o755)
+        for task in tasks:
+            task.checker = str(checker)
+            task.checker_type = 'hackerdom'
+
+        try:
+            with start_worker(
+                    celery_app,
+                    pool='threads',
+                    concurrency=args.concurrency,
+                    perform_ping_check=False,
+            ):
+                for r, (name, submit, stream) in zip(rounds, modes):
+                    round_args = [(team, task, r) for team in teams for task in tasks]
+                    get_flags = utils.get_round_get_flags(r, round_args)
+
+                    def tick(stream=stream):
+                        if stream:
+                            aggregate_verdicts.aggregate_round_verdicts(state)
+
+                    if stream:
+                        utils.open_round_verdicts(r, round_args)
+
+                    published.clear()
+                    with BackendMonitor(backend_url) as monitor:
+                        start = time.monotonic()
+                        for team, task, _ in round_args:
+                            submit(
+                                celery_app, team, task, r,
+                                get_flags[(team.id, task.id)],
+                            )
+                        wait_for_round(r, len(round_args), args.timeout, tick)
+                        elapsed = time.monotonic() - start
+                        # the last results are stored after the verdicts
+                        time.sleep(1)
+
+                    print(
+                        f'{name}: {len(round_args)} team tasks in {elapsed:.1f}s, '
+                        f'{sum(published.values())} broker messages '
+                        f'({dict(published)}), '
+                        f'{monitor.commands} result backend commands'
+                    )
+        finally:
+            cleanup(rounds, teams, tasks)
+
+
+if __name__ == '__main__':
+    main()
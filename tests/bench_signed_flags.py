@@ -0,0 +1,105 @@
+"""
+Signed flags micro-benchmark: cost of rejecting flags without storage lookups.
+
+Measures generation of random & signed flags and the verification of valid,
+forged and malformed signed flags, and the whole receiver pre-check
+(storage.attacks.check_signed_flag). Doesn't need any storage:
+
+    python tests/bench_signed_flags.py
+"""
+
+import argparse
+import secrets
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models, storage
+from lib.helpers import exceptions
+
+SIGNING_KEY = secrets.token_hex(32)
+
+
+def report(name, func, flags_count, args):
+    number = max(1, args.number // flags_count)
+    best = min(timeit.repeat(func, number=number, repeat=args.repeat))
+    per_flag = best / (number * flags_count) * 1e6
+    print(f'{name}: {per_flag:.2f}us/flag')
+
+
+def forge(flag):
+    position = secrets.randbelow(models.flag.SIGNED_PAYLOAD_LENGTH - 1) + 1
+    char = '1' if flag[position] != '1' else '2'
+    return flag[:position] + char + flag[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Signed flags micro-benchmark')
+    parser.add_argument('--number', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    flags = [
+        models.Flag.generate('bench', i % 100 + 1, i % 10 + 1, 100, SIGNING_KEY).flag
+        for i in range(1000)
+    ]
+    forged = [forge(flag) for flag in flags]
+    malformed = [secrets.token_hex(8) for _ in flags]
+
+    game_config = models.GameConfig(
+        id=None,
+        flag_lifetime=5,
+        game_hardness=10,
+        inflation=True,
+        volga_attacks_mode=False,
+        signed_flags=True,
+        flag_signing_key=SIGNING_KEY,
+        round_time=60,
+        mode='classic',
+        timezone='UTC',
+        start_time='2020-01-01 00:00:00+00:00',
+        real_round=100,
+        game_running=True,
+    )
+
+    def generate(signing_key):
+        return lambda: [
+            models.Flag.generate('bench', 1, 1, 100, signing_key)
+            for _ in flags
+        ]
+
+    def verify(sample):
+        return lambda: [
+            models.Flag.verify_signed(flag, SIGNING_KEY)
+            for flag in sample
+        ]
+
+    def precheck(sample):
+        def run():
+            for flag in sample:
+                try:
+                    storage.attacks.check_signed_flag(
+                        attacker_id=0,
+                        flag_str=flag,
+                        current_round=100,
+                        game_config=game_config,
+                    )
+                except exceptions.FlagSubmitException:
+                    pass
+        return run
+
+    report('generate random', generate(None), len(flags), args)
+    report('generate signed', generate(SIGNING_KEY), len(flags), args)
+    report('verify valid', verify(flags), len(flags), args)
+    report('verify forged', verify(forged), len(flags), args)
+    report('verify malformed', verify(malformed), len(flags), args)
+    report('receiver pre-check valid', precheck(flags), len(flags), args)
+    report('receiver pre-check forged', precheck(forged), len(flags), args)
+
+
+if __name__ == '__main__':
+    main()
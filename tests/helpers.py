@@ -1,7 +1,18 @@
 import time
 
+import redis
+
 
 def wait_rounds(rounds):
     round_time = 20
     print(f'Waiting for {round_time * rounds}s')
     time.sleep(rounds * round_time)
+
+
+def get_redis():
+    """Client of the game's redis, published on the host as the database is."""
+    from lib import config
+
+    redis_config = config.get_redis_config()
+    redis_config.host = '127.0.0.1'
+    return redis.Redis(decode_responses=True, **redis_config.model_dump())
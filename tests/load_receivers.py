@@ -0,0 +1,133 @@
+"""
+Flag receivers throughput comparison: HTTP `PUT /flags/` vs raw TCP.
+
+Needs a running game (./control.py setup && ./control.py start), run with
+`python tests/load_receivers.py`. The same flags are submitted through
+both receivers: the latest flags of the other teams from the database
+padded with random ones, so the first run accepts the real flags
+and the second one gets "already stolen" verdicts through the same path.
+"""
+
+import argparse
+import random
+import socket
+import string
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from psycopg2 import connect
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import config
+
+HTTP_BATCH_SIZE = 100
+
+
+def get_working_token():
+    command = ['./control.py', 'print_tokens']
+    out = subprocess.check_output(command, cwd=PROJECT_DIR)
+    for line in out.decode().split('\n'):
+        if 'working' in line:
+            return line.strip().split(':')[1]
+    raise RuntimeError('No working team found')
+
+
+def get_flags(token, count):
+    database_config = config.get_db_config()
+    database_config.host = '127.0.0.1'
+    conn = connect(**database_config.model_dump())
+    curs = conn.cursor()
+    query = '''
+    SELECT F.flag FROM Flags F
+    INNER JOIN Teams T on F.team_id = T.id
+    WHERE T.token != %s
+    ORDER BY F.id DESC LIMIT %s
+    '''
+    curs.execute(query, (token, count))
+    flags = [row[0] for row in curs.fetchall()]
+    conn.close()
+
+    alphabet = string.ascii_uppercase + string.digits
+    while len(flags) < count:
+        flags.append(''.join(random.choices(alphabet, k=31)) + '=')
+    random.shuffle(flags)
+    return flags
+
+
+def submit_http(url, token, flags):
+    session = requests.Session()
+    for i in range(0, len(flags), HTTP_BATCH_SIZE):
+        response = session.put(
+            url,
+            json=flags[i:i + HTTP_BATCH_SIZE],
+            headers={'X-Team-Token': token},
+        )
+        response.raise_for_status()
+    return len(flags)
+
+
+def submit_tcp(host, port, token, flags):
+    sock = socket.create_connection((host, port))
+    f = sock.makefile('rwb')
+    f.readline()
+    f.write(f'{token}\n'.encode())
+    f.flush()
+    greeting = f.readline().decode().strip()
+    if greeting != 'Enter your flags, one per line.':
+        raise RuntimeError(f'TCP receiver rejected the token: {greeting}')
+
+    f.write(''.join(f'{flag}\n' for flag in flags).encode())
+    f.flush()
+    sock.shutdown(socket.SHUT_WR)
+    responses = f.read().decode().splitlines()
+    sock.close()
+    return len(responses)
+
+
+def run(name, submit, flags, connections):
+    chunks = [flags[i::connections] for i in range(connections)]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        processed = sum(executor.map(submit, chunks))
+    elapsed = time.monotonic() - start
+    print(
+        f'{name}: {processed} flags in {elapsed:.2f}s, '
+        f'{processed / elapsed:.0f} flags/s over {connections} connections'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag receivers load test')
+    parser.add_argument('--flags', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--http-url', default='http://127.0.0.1:8080/flags/')
+    parser.add_argument('--tcp-host', default='127.0.0.1')
+    parser.add_argument('--tcp-port', type=int, default=31337)
+    args = parser.parse_args()
+
+    token = get_working_token()
+    flags = get_flags(token, args.flags)
+
+    run(
+        'http',
+        lambda chunk: submit_http(args.http_url, token, chunk),
+        flags,
+        args.connections,
+    )
+    run(
+        'tcp',
+        lambda chunk: submit_tcp(args.tcp_host, args.tcp_port, token, chunk),
+        flags,
+        args.connections,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.models import Action, TaskStatus
+from services.ticker.hooks import aggregate_verdicts
+from services.ticker.models import TickerState
+
+
+def get_verdict(action, status=TaskStatus.UP, message=''):
+    return models.CheckerVerdict(
+        action=action,
+        status=status,
+        public_message=message or f'{action} message',
+        private_message='',
+        command='',
+    )
+
+
+class FakeVerdicts:
+    """In-memory version of the round verdicts storage."""
+
+    def __init__(self):
+        self.deadlines = {}
+        self.expected = {}
+        self.done = {}
+        self.streams = {}
+
+    def open_round(self, r, team_tasks, deadline):
+        self.deadlines[r] = deadline
+        self.expected[r] = set(team_tasks)
+        self.done[r] = set()
+        self.streams[r] = []
+
+    def add_round_verdict(self, r, team_id, task_id, verdict, final=False):
+        self.streams[r].append((team_id, task_id, verdict, final))
+
+    def get_open_rounds(self):
+        return sorted(self.deadlines.items())
+
+    def get_round_team_tasks(self, r):
+        return set(self.expected[r]), set(self.done[r])
+
+    def read_round_verdicts(self, r, last_id):
+        entries = self.streams.get(r, [])[int(last_id):]
+        return str(len(self.streams.get(r, []))), entries
+
+    def set_team_task_done(self, r, team_id, task_id):
+        self.done[r].add((team_id, task_id))
+
+    def close_round(self, r):
+        del self.deadlines[r]
+        del self.expected[r]
+        del self.done[r]
+        del self.streams[r]
+
+
+class ResultVerdictsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.task = SimpleNamespace(puts=2, gets=2)
+
+    def test_all_reported(self):
+        verdicts = [
+            get_verdict(Action.CHECK),
+            get_verdict(Action.PUT, message='first put'),
+            get_verdict(Action.GET, message='first get'),
+            get_verdict(Action.PUT, message='second put'),
+            get_verdict(Action.GET, message='second get'),
+        ]
+
+        result = aggregate_verdicts.get_result_verdicts(verdicts, self.task)
+
+        self.assertEqual(
+            [(v.action, v.public_message) for v in result],
+            [
+                (Action.CHECK, 'CHECK message'),
+                (Action.PUT, 'first put'),
+                (Action.PUT, 'second put'),
+                (Action.GET, 'second get'),
+            ],
+        )
+
+    def test_failed_get_passed(self):
+        verdicts = [
+            get_verdict(Action.CHECK),
+            get_verdict(Action.PUT),
+            get_verdict(Action.PUT),
+            get_verdict(Action.GET, TaskStatus.CORRUPT),
+            get_verdict(Action.GET, TaskStatus.CORRUPT, 'Skipped'),
+        ]
+
+        *_, get = aggregate_verdicts.get_result_verdicts(verdicts, self.task)
+
+        self.assertIs(get, verdicts[3])
+
+    def test_missing_verdicts(self):
+        verdicts = [
+            get_verdict(Action.PUT),
+            get_verdict(Action.GET),
+        ]
+
+        check, put, missing_put, get = aggregate_verdicts.get_result_verdicts(
+            verdicts,
+            self.task,
+        )
+
+        self.assertEqual(check.action, Action.CHECK)
+        self.assertEqual(check.status, TaskStatus.CHECK_FAILED)
+        self.assertIs(put, verdicts[0])
+        self.assertEqual(missing_put.action, Action.PUT)
+        self.assertEqual(missing_put.status, TaskStatus.CHECK_FAILED)
+        self.assertEqual(get.action, Action.GET)
+        self.assertEqual(get.status, TaskStatus.CHECK_FAILED)
+
+    def test_nothing_reported(self):
+        result = aggregate_verdicts.get_result_verdicts([], self.task)
+
+        self.assertEqual(
+            [v.action for v in result],
+            [Action.CHECK, Action.PUT, Action.PUT, Action.GET],
+        )
+        for verdict in result:
+            self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+
+    def test_no_gets(self):
+        self.task.gets = 0
+        verdicts = [get_verdict(Action.CHECK), get_verdict(Action.PUT)]
+
+        result = aggregate_verdicts.get_result_verdicts(verdicts, self.task)
+
+        actions = [v.action for v in result]
+        self.assertEqual(actions, [Action.CHECK, Action.PUT, Action.PUT])
+
+
+class AggregateRoundVerdictsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.teams = [
+            models.Team(id=team_id, name=f'team{team_id}', ip='', token='')
+            for team_id in (1, 2)
+        ]
+        self.task = SimpleNamespace(id=1, puts=1, gets=1)
+        self.state = TickerState(celery_app=None, game_started=True)
+        self.verdicts = FakeVerdicts()
+
+        patchers = [
+            mock.patch.multiple(
+                aggregate_verdicts.storage.verdicts,
+                get_open_rounds=self.verdicts.get_open_rounds,
+                get_round_team_tasks=self.verdicts.get_round_team_tasks,
+                read_round_verdicts=self.verdicts.read_round_verdicts,
+                set_team_task_done=self.verdicts.set_team_task_done,
+                close_round=self.verdicts.close_round,
+            ),
+            mock.patch.object(
+                aggregate_verdicts.storage.teams,
+                'get_teams',
+                return_value=self.teams,
+            ),
+            mock.patch.object(
+                aggregate_verdicts.storage.tasks,
+                'get_tasks',
+                return_value=[self.task],
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(
+            aggregate_verdicts.storage.tasks,
+            'update_task_status',
+        )
+        self.update_task_status = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_round(self, r, deadline=None):
+        self.verdicts.open_round(
+            r,
+            team_tasks=[(team.id, self.task.id) for team in self.teams],
+            deadline=time.time() + 60 if deadline is None else deadline,
+        )
+
+    def report(self, r, team_id, *verdicts, final=False):
+        for verdict in verdicts:
+            self.verdicts.add_round_verdict(r, team_id, self.task.id, verdict, final)
+
+    def get_saved(self):
+        saved = {}
+        for call in self.update_task_status.call_args_list:
+            kwargs = call.kwargs
+            verdict = kwargs['checker_verdict']
+            saved[kwargs['team_id']] = (kwargs['current_round'], verdict)
+        return saved
+
+    def test_saved_when_complete(self):
+        self.open_round(5)
+        self.report(5, 1, get_verdict(Action.CHECK), get_verdict(Action.PUT))
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+        self.assertEqual(self.get_saved(), {})
+
+        self.report(5, 1, get_verdict(Action.GET, TaskStatus.CORRUPT))
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        r, verdict = self.get_saved()[1]
+        self.assertEqual(r, 5)
+        self.assertEqual(verdict.action, Action.GET)
+        self.assertEqual(verdict.status, TaskStatus.CORRUPT)
+        self.assertEqual(self.verdicts.done[5], {(1, self.task.id)})
+        # the round is still waiting for the other team
+        self.assertIn(5, self.state.round_verdicts)
+
+    def test_saved_once(self):
+        self.open_round(5)
+        self.report(
+            5, 1,
+            get_verdict(Action.CHECK),
+            get_verdict(Action.PUT),
+            get_verdict(Action.GET),
+        )
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        self.assertEqual(self.update_task_status.call_count, 1)
+
+    def test_final_verdict(self):
+        self.open_round(5)
+        final = get_verdict(Action.PUT, TaskStatus.CHECK_FAILED)
+        self.report(5, 1, get_verdict(Action.CHECK))
+        self.report(5, 1, final, final=True)
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        _, verdict = self.get_saved()[1]
+        self.assertIs(verdict, final)
+
+    def test_round_closed(self):
+        self.open_round(5)
+        for team in self.teams:
+            self.report(
+                5, team.id,
+                get_verdict(Action.CHECK),
+                get_verdict(Action.PUT),
+                get_verdict(Action.GET),
+            )
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        self.assertEqual(set(self.get_saved()), {1, 2})
+        self.assertEqual(self.verdicts.get_open_rounds(), [])
+        self.assertNotIn(5, self.state.round_verdicts)
+
+    def test_deadline(self):
+        self.open_round(5, deadline=time.time() - 1)
+        self.report(5, 1, get_verdict(Action.CHECK), get_verdict(Action.PUT))
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        saved = self.get_saved()
+        # missing get of the first team & all actions of the second one
+        _, verdict = saved[1]
+        self.assertEqual(verdict.action, Action.GET)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+        _, verdict = saved[2]
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+        self.assertEqual(self.verdicts.get_open_rounds(), [])
+
+    def test_restart(self):
+        self.open_round(5)
+        self.report(5, 1, get_verdict(Action.CHECK), get_verdict(Action.PUT))
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        # stream is read from the start by the new ticker
+        state = TickerState(celery_app=None, game_started=True)
+        self.report(5, 1, get_verdict(Action.GET))
+        aggregate_verdicts.aggregate_round_verdicts(state)
+
+        _, verdict = self.get_saved()[1]
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.UP)
+
+    def test_closed_rounds_forgotten(self):
+        self.open_round(5)
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+        self.assertIn(5, self.state.round_verdicts)
+
+        self.verdicts.close_round(5)
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        self.assertEqual(self.state.round_verdicts, {})
+
+    def test_unknown_team(self):
+        self.open_round(5, deadline=time.time() - 1)
+        self.teams.pop()
+
+        aggregate_verdicts.aggregate_round_verdicts(self.state)
+
+        self.assertEqual(set(self.get_saved()), {1})
+        self.assertEqual(self.verdicts.get_open_rounds(), [])
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.helpers import commands
+from lib.helpers.async_commands import (
+    AsyncCommandExecutor,
+    run_command_gracefully_async,
+)
+from lib.models import Action, TaskStatus
+
+CHECKER = '''#!/bin/sh
+if [ "$1" = "hang" ]; then
+    trap "" TERM
+fi
+if [ "$1" = "wait" ] || [ "$1" = "hang" ]; then
+    exec sleep "$2"
+fi
+if [ "$1" = "sleep" ]; then
+    sleep "$2"
+fi
+echo "public $1"
+echo "private $1" >&2
+exit "${3:-101}"
+'''
+
+
+class AsyncCommandsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        checker = Path(self.tmp_dir.name) / 'checker.sh'
+        checker.write_text(CHECKER)
+        checker.chmod(0o755)
+        self.checker = str(checker)
+
+    def run_command(self, command, **kwargs):
+        return asyncio.run(run_command_gracefully_async(command, **kwargs))
+
+    def test_run(self):
+        command = [self.checker, 'check', '0', '104']
+        result, killed = self.run_command(command, timeout=5)
+
+        self.assertFalse(killed)
+        self.assertEqual(result.args, command)
+        self.assertEqual(result.returncode, 104)
+        self.assertEqual(result.stdout, b'public check\n')
+        self.assertEqual(result.stderr, b'private check\n')
+
+    def test_input(self):
+        result, _ = self.run_command(['cat'], input=b'data', timeout=5)
+
+        self.assertEqual(result.stdout, b'data')
+
+    def test_env(self):
+        result, _ = self.run_command(
+            ['sh', '-c', 'echo "$VALUE"'],
+            timeout=5,
+            env={**os.environ, 'VALUE': 'value'},
+        )
+
+        self.assertEqual(result.stdout, b'value\n')
+
+    def test_timeout(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired) as ctx:
+            self.run_command([self.checker, 'wait', '10'], timeout=0.5)
+
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(ctx.exception.timeout, 0.5)
+
+    def test_timeout_killed(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_command(
+                [self.checker, 'hang', '10'],
+                timeout=0.5,
+                terminate_timeout=0.5,
+            )
+
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_executor_runs_concurrently(self):
+        executor = AsyncCommandExecutor()
+        results = []
+
+        def run():
+            results.append(executor.run([self.checker, 'sleep', '0.5'], timeout=5))
+
+        threads = [threading.Thread(target=run) for _ in range(20)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(results), 20)
+        for result, killed in results:
+            self.assertFalse(killed)
+            self.assertEqual(result.returncode, 101)
+            self.assertEqual(result.stdout, b'public sleep\n')
+
+    def test_executor_timeout(self):
+        executor = AsyncCommandExecutor()
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            executor.run([self.checker, 'wait', '10'], timeout=0.5)
+
+
+class AsyncGenericCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        checker = Path(self.tmp_dir.name) / 'checker.sh'
+        checker.write_text(CHECKER)
+        checker.chmod(0o755)
+
+        self.team = models.Team(id=1, name='team', ip='10.0.0.1', token='token')
+        self.task = models.Task(
+            id=1,
+            name='task',
+            checker=str(checker),
+            gets=1,
+            puts=1,
+            places=1,
+            checker_timeout=1,
+            checker_type='hackerdom',
+            env_path=os.path.dirname(sys.executable),
+            default_score=1000,
+            get_period=30,
+            active=True,
+        )
+        self.logger = logging.getLogger(__name__)
+
+        patcher = mock.patch.object(
+            commands.config,
+            'get_checkers_config',
+            return_value=SimpleNamespace(async_executor=True),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_action(self, *args):
+        return commands.run_generic_command(
+            [self.task.checker, *args],
+            Action.CHECK,
+            self.task,
+            self.team,
+            self.logger,
+        )
+
+    def test_statuses(self):
+        for code, status in (
+                ('101', TaskStatus.UP),
+                ('102', TaskStatus.CORRUPT),
+                ('103', TaskStatus.MUMBLE),
+                ('104', TaskStatus.DOWN),
+                ('110', TaskStatus.CHECK_FAILED),
+        ):
+            verdict = self.run_action('check', '0', code)
+            self.assertEqual(verdict.status, status)
+            self.assertEqual(verdict.public_message, 'public check')
+            self.assertEqual(verdict.private_message, 'private check')
+
+    def test_unknown_status(self):
+        verdict = self.run_action('check', '0', '7')
+
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+        self.assertEqual(verdict.public_message, 'Check failed')
+
+    def test_timeout(self):
+        verdict = self.run_action('wait', '10')
+
+        self.assertEqual(verdict.status, TaskStatus.DOWN)
+        self.assertEqual(verdict.public_message, 'Checker timed out')
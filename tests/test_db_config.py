@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+from unittest import TestCase, mock
+
+from psycopg2.extensions import make_dsn
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import config
+
+ENV = {
+    'POSTGRES_HOST': 'postgres',
+    'POSTGRES_PORT': '5432',
+    'POSTGRES_USER': 'user',
+    'POSTGRES_PASSWORD': 'password',
+    'POSTGRES_DB': 'forcad',
+    'POSTGRES_POOL_MAX_SIZE': '7',
+    'POSTGRES_TRANSACTION_POOLING': 'true',
+}
+
+
+class DatabaseConfigTestCase(TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.dict(os.environ, ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_connection_params(self):
+        params = config.get_db_config().model_dump()
+
+        self.assertEqual(params, {
+            'host': 'postgres',
+            'port': 5432,
+            'user': 'user',
+            'password': 'password',
+            'dbname': 'forcad',
+        })
+        # pool settings don't leak into the connection string
+        make_dsn(**params)
+
+    def test_pool_config(self):
+        pool_config = config.get_db_pool_config()
+
+        self.assertEqual(pool_config.pool_min_size, 5)
+        self.assertEqual(pool_config.pool_max_size, 7)
+        self.assertEqual(pool_config.pool_timeout, 30)
+        self.assertTrue(pool_config.transaction_pooling)
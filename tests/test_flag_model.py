@@ -0,0 +1,241 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.helpers.exceptions import FlagExceptionEnum
+from lib.models import AttackResult
+from lib.storage import attacks, flags as flags_storage
+
+SIGNING_KEY = 'signing key'
+
+
+class FlagPackTestCase(TestCase):
+    def setUp(self) -> None:
+        self.flag = models.Flag.generate(
+            service='task',
+            team_id=12,
+            task_id=3,
+            current_round=456,
+        )
+        self.flag.id = 7890
+        self.flag.public_flag_data = 'public'
+        self.flag.private_flag_data = 'private'
+        self.flag.vuln_number = 2
+
+    def test_generate(self):
+        self.assertEqual(len(self.flag.flag), 32)
+        self.assertTrue(self.flag.flag.startswith('T'))
+        self.assertTrue(self.flag.flag.endswith('='))
+
+    def test_pack(self):
+        self.assertEqual(self.flag.pack(), '7890|12|3|456')
+
+    def test_unpack(self):
+        flag = models.Flag.unpack(self.flag.flag, self.flag.pack())
+
+        self.assertEqual(flag.id, self.flag.id)
+        self.assertEqual(flag.team_id, self.flag.team_id)
+        self.assertEqual(flag.task_id, self.flag.task_id)
+        self.assertEqual(flag.round, self.flag.round)
+        self.assertEqual(flag.flag, self.flag.flag)
+        # checker data is not packed
+        self.assertIsNone(flag.public_flag_data)
+        self.assertIsNone(flag.private_flag_data)
+        self.assertIsNone(flag.vuln_number)
+
+    def test_unpack_flags(self):
+        other = models.Flag.generate(
+            service='task',
+            team_id=1,
+            task_id=1,
+            current_round=455,
+        )
+        other.id = 1
+        flag_strs = [self.flag.flag, 'missing', other.flag]
+        packed_by_round = [
+            [self.flag.pack(), None, None],
+            [None, None, other.pack()],
+        ]
+
+        flag, missing, other_flag = flags_storage.unpack_flags(
+            flag_strs,
+            packed_by_round,
+        )
+
+        self.assertEqual(flag.to_dict(), models.Flag.unpack(
+            self.flag.flag,
+            self.flag.pack(),
+        ).to_dict())
+        self.assertIsNone(missing)
+        self.assertEqual((other_flag.id, other_flag.round), (1, 455))
+
+    def test_unpack_flags_first_round_wins(self):
+        flag, = flags_storage.unpack_flags(
+            [self.flag.flag],
+            [[None], [self.flag.pack()], ['1|1|1|1']],
+        )
+
+        self.assertEqual(flag.id, self.flag.id)
+
+    def test_unpack_flags_empty(self):
+        self.assertEqual(flags_storage.unpack_flags([], []), [])
+        self.assertEqual(flags_storage.unpack_flags(['flag'], []), [None])
+
+
+class SignedFlagTestCase(TestCase):
+    def generate(self, team_id=12, task_id=3, current_round=456):
+        return models.Flag.generate(
+            service='task',
+            team_id=team_id,
+            task_id=task_id,
+            current_round=current_round,
+            signing_key=SIGNING_KEY,
+        )
+
+    def test_generate(self):
+        flag = self.generate()
+
+        self.assertEqual(len(flag.flag), models.flag.SIGNED_FLAG_LENGTH)
+        self.assertEqual(len(flag.flag), 32)
+        self.assertTrue(flag.flag.startswith('T'))
+        self.assertTrue(flag.flag.endswith('='))
+        self.assertNotEqual(flag.flag, self.generate().flag)
+
+    def test_verify(self):
+        max_fields = (36 ** 3 - 1, 36 ** 2 - 1, 36 ** 4 - 1)
+        for fields in ((12, 3, 456), (0, 0, 0), max_fields):
+            flag = self.generate(*fields)
+            self.assertEqual(models.Flag.verify_signed(flag.flag, SIGNING_KEY), fields)
+
+    def test_fields_overflow(self):
+        with self.assertRaises(ValueError):
+            self.generate(team_id=36 ** 3)
+        with self.assertRaises(ValueError):
+            self.generate(current_round=36 ** 4)
+
+    def test_wrong_key(self):
+        flag = self.generate()
+
+        self.assertIsNone(models.Flag.verify_signed(flag.flag, 'other key'))
+
+    def test_tampered(self):
+        flag = self.generate().flag
+        for i in range(len(flag) - 1):
+            char = 'A' if flag[i] != 'A' else 'B'
+            tampered = flag[:i] + char + flag[i + 1:]
+            self.assertIsNone(models.Flag.verify_signed(tampered, SIGNING_KEY))
+
+    def test_malformed(self):
+        flag = self.generate().flag
+        for value in (
+                flag[:-1],
+                flag + '=',
+                flag[:-1] + 'A',
+                flag[:-2] + '\u0410=',
+                '',
+                None,
+        ):
+            self.assertIsNone(models.Flag.verify_signed(value, SIGNING_KEY))
+
+    def test_unsigned(self):
+        flag = models.Flag.generate(
+            service='task',
+            team_id=12,
+            task_id=3,
+            current_round=456,
+        )
+
+        self.assertIsNone(models.Flag.verify_signed(flag.flag, SIGNING_KEY))
+
+
+class CheckSignedFlagTestCase(TestCase):
+    def setUp(self) -> None:
+        self.game_config = SimpleNamespace(
+            signed_flags=True,
+            flag_signing_key=SIGNING_KEY,
+            flag_lifetime=5,
+        )
+
+    def get_flag(self, team_id, current_round):
+        return models.Flag.generate(
+            service='task',
+            team_id=team_id,
+            task_id=1,
+            current_round=current_round,
+            signing_key=SIGNING_KEY,
+        ).flag
+
+    def check(self, flag_str, attacker_id=1, current_round=10):
+        attacks.check_signed_flag(
+            attacker_id=attacker_id,
+            flag_str=flag_str,
+            current_round=current_round,
+            game_config=self.game_config,
+        )
+
+    def test_valid(self):
+        self.check(self.get_flag(team_id=2, current_round=10))
+        self.check(self.get_flag(team_id=2, current_round=5))
+
+    def test_forged(self):
+        with self.assertRaises(type(FlagExceptionEnum.FLAG_INVALID)) as ctx:
+            self.check('T' * 31 + '=')
+        self.assertIs(ctx.exception, FlagExceptionEnum.FLAG_INVALID)
+
+    def test_future_round(self):
+        with self.assertRaises(type(FlagExceptionEnum.FLAG_INVALID)) as ctx:
+            self.check(self.get_flag(team_id=2, current_round=11))
+        self.assertIs(ctx.exception, FlagExceptionEnum.FLAG_INVALID)
+
+    def test_own(self):
+        with self.assertRaises(type(FlagExceptionEnum.FLAG_YOUR_OWN)) as ctx:
+            self.check(self.get_flag(team_id=1, current_round=10))
+        self.assertIs(ctx.exception, FlagExceptionEnum.FLAG_YOUR_OWN)
+
+    def test_too_old(self):
+        with self.assertRaises(type(FlagExceptionEnum.FLAG_TOO_OLD)) as ctx:
+            self.check(self.get_flag(team_id=2, current_round=4))
+        self.assertIs(ctx.exception, FlagExceptionEnum.FLAG_TOO_OLD)
+
+    def test_filter_signed_flags(self):
+        flag_strs = [
+            self.get_flag(team_id=2, current_round=10),
+            self.get_flag(team_id=1, current_round=10),
+            'T' * 31 + '=',
+        ]
+        results = [AttackResult(attacker_id=1) for _ in flag_strs]
+
+        left_results, left_flags = attacks.filter_signed_flags(
+            attacker_id=1,
+            results=results,
+            flag_strs=flag_strs,
+            current_round=10,
+            game_config=self.game_config,
+        )
+
+        self.assertEqual(left_flags, flag_strs[:1])
+        self.assertEqual(left_results, results[:1])
+        self.assertEqual(results[1].message, str(FlagExceptionEnum.FLAG_YOUR_OWN))
+        self.assertEqual(results[2].message, str(FlagExceptionEnum.FLAG_INVALID))
+
+    def test_filter_signed_flags_disabled(self):
+        self.game_config.signed_flags = False
+        flag_strs = ['T' * 31 + '=']
+        results = [AttackResult(attacker_id=1)]
+
+        self.assertEqual(
+            attacks.filter_signed_flags(
+                attacker_id=1,
+                results=results,
+                flag_strs=flag_strs,
+                current_round=10,
+                game_config=self.game_config,
+            ),
+            (results, flag_strs),
+        )
@@ -1,4 +1,5 @@
 import re
+import socket
 import subprocess
 import sys
 import time
@@ -53,6 +54,19 @@ class FlagSubmitTestCase(TestCase):
         curs.execute(query, (team_token,))
         return curs.fetchall()
 
+    def get_not_stolen_flags_from_db(self, team_token):
+        conn = self.db_pool.getconn()
+        curs = conn.cursor(cursor_factory=extras.RealDictCursor)
+
+        query = '''
+        SELECT * FROM Flags F
+        INNER JOIN Teams T on F.team_id = T.id
+        WHERE round >= (SELECT MAX(round) - 3 FROM Flags) AND T.token = %s
+        AND NOT EXISTS (SELECT 1 FROM StolenFlags SF WHERE SF.flag_id = F.id)
+        '''
+        curs.execute(query, (team_token,))
+        return curs.fetchall()
+
     def submit_flags_to_http(self, token, flags=None, token_valid=True):
         response = requests.put(
             'http://127.0.0.1:8080/flags/',
@@ -90,6 +104,40 @@ class FlagSubmitTestCase(TestCase):
 
         return results
 
+    def submit_flags_to_tcp(self, token, flags=None, token_valid=True):
+        with socket.create_connection(('127.0.0.1', 31337), timeout=10) as sock:
+            rfile = sock.makefile('r')
+            self.assertIn('token', rfile.readline())
+            sock.sendall(f'{token}\n'.encode())
+
+            if not token_valid:
+                self.assertEqual(rfile.readline(), 'Invalid team token.\n')
+                return []
+
+            self.assertIn('flags', rfile.readline())
+            sock.sendall(''.join(f'{flag}\n' for flag in flags).encode())
+            lines = [rfile.readline() for _ in flags]
+
+            # connection is closed after all responses are sent
+            sock.shutdown(socket.SHUT_WR)
+            self.assertEqual(rfile.read(), '')
+
+        results = []
+        for need, line in zip(flags, lines):
+            self.assertTrue(line.endswith('\n'))
+            message = line[:-1]
+
+            self.assertIn(f'[{need}] ', message)
+
+            match = re.fullmatch(
+                f'\\[{need}] \\w+.*',
+                message,
+            )
+            self.assertTrue(match is not None, msg=f'{message} is incorrect')
+            results.append(message)
+
+        return results
+
     def get_teams(self):
         r = requests.get('http://127.0.0.1:8080/api/client/teams/')
         self.assertTrue(r.ok)
@@ -201,3 +249,12 @@ class FlagSubmitTestCase(TestCase):
 
         self.assertEqual(all_stolen, len(ok_flags))
         self.assertEqual(all_lost, len(ok_flags))
+
+    def test_tcp_flag_submission(self):
+        # flags stolen by the other tests would be reported as already stolen
+        ok_flags = self.get_not_stolen_flags_from_db(self.working_token)
+        ok_flags = [flag['flag'] for flag in ok_flags]
+
+        self.assertTrue(len(ok_flags) > 1)
+
+        self.run_submission_tests(self.submit_flags_to_tcp, ok_flags)
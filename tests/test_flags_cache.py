@@ -0,0 +1,284 @@
+import contextlib
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+TESTS_DIR = PROJECT_DIR / 'tests'
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(TESTS_DIR))
+
+from helpers import get_redis
+from lib import models
+from lib.helpers.cache import LocalCache
+from lib.storage import caching, flags as flags_storage, scripts, utils
+from lib.storage.keys import CacheKeys
+
+# rounds of the tests start here, so they don't clash with the game ones
+FIRST_ROUND = 1000000
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.execute_calls = []
+        self.fetch_sizes = []
+
+    def execute(self, query, params):
+        self.execute_calls.append((query, params))
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class FlagsCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis = get_redis()
+        self.game_config = SimpleNamespace(flag_lifetime=2, round_time=30)
+        self.rounds = [FIRST_ROUND, FIRST_ROUND + 1, FIRST_ROUND + 2]
+        # own marker, so the game's flags cache state doesn't matter
+        self.cached_key = f'test:flags:cached:{uuid.uuid4()}'
+        self.addCleanup(self.cleanup)
+
+        patchers = [
+            mock.patch.object(utils.RedisStorage, 'get', return_value=self.redis),
+            mock.patch.object(
+                caching.game,
+                'get_current_game_config',
+                return_value=self.game_config,
+            ),
+            mock.patch.object(
+                flags_storage.CacheKeys,
+                'flags_cached',
+                return_value=self.cached_key,
+            ),
+            mock.patch.object(
+                scripts.GetRandomRoundFlagScript,
+                'get',
+                return_value=self.redis.register_script(
+                    scripts.GET_RANDOM_ROUND_FLAG_SCRIPT,
+                ),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def cleanup(self):
+        self.redis.delete(self.cached_key)
+        for r in self.rounds:
+            keys = self.redis.keys(f'round:{r}:*')
+            if keys:
+                self.redis.delete(*keys)
+
+    @staticmethod
+    def get_flag(flag_id, team_id, task_id, r):
+        flag = models.Flag.generate(
+            service='T',
+            team_id=team_id,
+            task_id=task_id,
+            current_round=r,
+        )
+        flag.id = flag_id
+        flag.public_flag_data = f'public {flag_id}'
+        flag.private_flag_data = f'private {flag_id}'
+        flag.vuln_number = 1
+        return flag
+
+    def get_flags(self):
+        flags = []
+        for r in self.rounds:
+            for team_id in (1, 2):
+                flag_id = len(flags) + 1
+                flags.append(self.get_flag(flag_id, team_id, 1, r))
+        return flags
+
+    def assert_flags_cached(self, flags):
+        for flag in flags:
+            self.assertEqual(
+                self.redis.hget(CacheKeys.round_flags(flag.round), flag.flag),
+                flag.pack(),
+            )
+            flag_json = self.redis.hget(CacheKeys.round_flags_data(flag.round), flag.id)
+            self.assertEqual(models.Flag.from_json(flag_json).to_dict(), flag.to_dict())
+
+            team_task_key = CacheKeys.round_team_task_flags(
+                flag.round, flag.team_id, flag.task_id,
+            )
+            self.assertIn(str(flag.id), self.redis.smembers(team_task_key))
+            self.assertGreater(self.redis.ttl(team_task_key), 0)
+
+    def test_cache_flags(self):
+        flags = self.get_flags()
+        with utils.redis_pipeline(transaction=True) as pipe:
+            caching.cache_flags(flags=flags, expires=60, pipe=pipe)
+            pipe.execute()
+
+        self.assert_flags_cached(flags)
+        for r in self.rounds:
+            self.assertEqual(self.redis.hlen(CacheKeys.round_flags(r)), 2)
+            self.assertLessEqual(self.redis.ttl(CacheKeys.round_flags(r)), 60)
+
+    def test_last_flags_cached_in_batches(self):
+        flags = self.get_flags()
+        cursor = FakeCursor(flag.to_dict() for flag in flags)
+
+        @contextlib.contextmanager
+        def db_cursor(**_kwargs):
+            yield None, cursor
+
+        pipe = mock.Mock()
+        with mock.patch.object(
+                caching, 'FLAGS_WARMUP_BATCH_SIZE', 4,
+        ), mock.patch.object(
+            caching.utils, 'db_cursor', db_cursor,
+        ), mock.patch.object(
+            caching.utils, 'redis_pipeline', wraps=utils.redis_pipeline,
+        ) as redis_pipeline:
+            caching.cache_last_flags(self.rounds[-1], pipe)
+
+        _, params = cursor.execute_calls[0]
+        self.assertEqual(params, {'round': self.rounds[0]})
+        self.assertEqual(cursor.fetch_sizes, [4, 4, 4])
+        # one non-transactional pipeline for each non-empty batch
+        self.assertEqual(redis_pipeline.call_count, 2)
+        redis_pipeline.assert_called_with(transaction=False)
+        self.assert_flags_cached(flags)
+
+        # only the marker is left for the caller's pipeline
+        pipe.set.assert_called_once_with(self.cached_key, 1)
+        pipe.execute.assert_not_called()
+
+    def test_get_flags_by_str(self):
+        flags = self.get_flags()
+        with utils.redis_pipeline(transaction=True) as pipe:
+            caching.cache_flags(flags=flags, expires=60, pipe=pipe)
+            pipe.execute()
+
+        flag_strs = [flag.flag for flag in flags] + ['missing']
+        with mock.patch.object(flags_storage, '_ensure_flags_cached'):
+            found = flags_storage.get_flags_by_str(
+                flag_strs=flag_strs,
+                current_round=self.rounds[-1],
+            )
+
+        *found, missing = found
+        self.assertIsNone(missing)
+        for flag, found_flag in zip(flags, found):
+            unpacked = models.Flag.unpack(flag.flag, flag.pack())
+            self.assertEqual(found_flag.to_dict(), unpacked.to_dict())
+
+    def test_get_flags_by_str_expired(self):
+        flag = self.get_flag(1, 1, 1, self.rounds[0])
+        with utils.redis_pipeline(transaction=True) as pipe:
+            caching.cache_flags(flags=[flag], expires=60, pipe=pipe)
+            pipe.execute()
+
+        with mock.patch.object(flags_storage, '_ensure_flags_cached'):
+            found, = flags_storage.get_flags_by_str(
+                flag_strs=[flag.flag],
+                current_round=self.rounds[0] + self.game_config.flag_lifetime + 1,
+            )
+
+        self.assertIsNone(found)
+
+    def test_get_flags_by_str_not_strings(self):
+        flag = self.get_flag(1, 1, 1, self.rounds[-1])
+        with utils.redis_pipeline(transaction=True) as pipe:
+            caching.cache_flags(flags=[flag], expires=60, pipe=pipe)
+            pipe.execute()
+
+        flag_strs = [123, None, {'flag': flag.flag}, [flag.flag], flag.flag]
+        for local_cache in (None, LocalCache(maxsize=10, ttl=60, negative_ttl=5)):
+            with mock.patch.object(flags_storage, '_ensure_flags_cached'):
+                *found, found_flag = flags_storage.get_flags_by_str(
+                    flag_strs=flag_strs,
+                    current_round=self.rounds[-1],
+                    local_cache=local_cache,
+                )
+
+            self.assertEqual(found, [None] * 4)
+            self.assertEqual(found_flag.flag, flag.flag)
+
+    def cache_flags(self, flags):
+        with utils.redis_pipeline(transaction=True) as pipe:
+            caching.cache_flags(flags=flags, expires=60, pipe=pipe)
+            pipe.set(self.cached_key, 1)
+            pipe.execute()
+
+    def get_random_round_flag(self, r, team_id=1, task_id=1):
+        return flags_storage.get_random_round_flag(
+            team_id=team_id,
+            task_id=task_id,
+            from_round=r,
+            current_round=self.rounds[-1],
+        )
+
+    def test_random_round_flag(self):
+        flags = self.get_flags()
+        r = self.rounds[1]
+        team_flags = [self.get_flag(100, 1, 1, r), self.get_flag(101, 1, 1, r)]
+        for flag in flags:
+            if (flag.round, flag.team_id, flag.task_id) == (r, 1, 1):
+                team_flags.append(flag)
+        self.cache_flags(flags + team_flags[:2])
+
+        picked = {}
+        for _ in range(50):
+            flag = self.get_random_round_flag(r)
+            picked[flag.id] = flag.to_dict()
+
+        expected = {flag.id: flag.to_dict() for flag in team_flags}
+        self.assertEqual(picked, expected)
+
+    def test_random_round_flag_not_cached(self):
+        flag = self.get_flag(1, 1, 1, self.rounds[0])
+
+        with mock.patch.object(
+                flags_storage,
+                '_ensure_flags_cached',
+                side_effect=lambda _: self.cache_flags([flag]),
+        ) as ensure_flags_cached:
+            found = self.get_random_round_flag(self.rounds[0])
+
+        ensure_flags_cached.assert_called_once_with(self.rounds[-1])
+        self.assertEqual(found.to_dict(), flag.to_dict())
+
+    def test_random_round_flag_from_db(self):
+        self.cache_flags(self.get_flags())
+        flag = self.get_flag(100, 3, 1, self.rounds[0])
+        cursor = mock.Mock()
+        cursor.connection.prepared = None
+        cursor.fetchone.return_value = (flag.id,)
+
+        @contextlib.contextmanager
+        def db_cursor():
+            yield None, cursor
+
+        with mock.patch.object(
+                flags_storage.utils, 'db_cursor', db_cursor,
+        ), mock.patch.object(
+            flags_storage, 'get_flag_by_id', return_value=flag,
+        ) as get_flag_by_id:
+            found = self.get_random_round_flag(self.rounds[0], team_id=3)
+
+        self.assertIs(found, flag)
+        get_flag_by_id.assert_called_once_with(flag.id, self.rounds[0], self.rounds[-1])
+
+    def test_no_random_round_flag(self):
+        self.cache_flags(self.get_flags())
+        cursor = mock.Mock()
+        cursor.connection.prepared = None
+        cursor.fetchone.return_value = None
+
+        @contextlib.contextmanager
+        def db_cursor():
+            yield None, cursor
+
+        with mock.patch.object(flags_storage.utils, 'db_cursor', db_cursor):
+            self.assertIsNone(self.get_random_round_flag(self.rounds[0], team_id=3))
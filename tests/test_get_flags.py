@@ -0,0 +1,177 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.models import Action, TaskStatus
+from services.tasks import actions
+from services.ticker.hooks import utils
+
+CHECKER = '''#!/bin/sh
+echo "$@" >> "{calls}"
+echo OK
+exit 101
+'''
+
+
+class GetFlagsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.calls = Path(self.tmp_dir.name) / 'calls'
+        checker = Path(self.tmp_dir.name) / 'checker.sh'
+        checker.write_text(CHECKER.format(calls=self.calls))
+        checker.chmod(0o755)
+
+        self.team = models.Team(id=1, name='team', ip='10.0.0.1', token='token')
+        self.task = models.Task(
+            id=1,
+            name='task',
+            checker=str(checker),
+            gets=3,
+            puts=1,
+            places=1,
+            checker_timeout=5,
+            checker_type='hackerdom',
+            env_path=os.path.dirname(sys.executable),
+            default_score=1000,
+            get_period=30,
+            active=True,
+        )
+        self.check_verdict = models.CheckerVerdict(
+            action=Action.CHECK,
+            status=TaskStatus.UP,
+            public_message='OK',
+            private_message='',
+            command='',
+        )
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def get_flag(self, r):
+        flag = models.Flag.generate(
+            service='T',
+            team_id=self.team.id,
+            task_id=self.task.id,
+            current_round=r,
+        )
+        flag.id = r
+        flag.public_flag_data = ''
+        flag.private_flag_data = 'flag_id'
+        flag.vuln_number = 1
+        return flag
+
+    def get_checker_calls(self):
+        if not self.calls.exists():
+            return []
+        return self.calls.read_text().splitlines()
+
+    def preselect(self, r, flag_lifetime, rounds_flags):
+        game_config = SimpleNamespace(flag_lifetime=flag_lifetime)
+        with mock.patch.object(
+                utils.storage.game,
+                'get_current_game_config',
+                return_value=game_config,
+        ), mock.patch.object(
+            utils.storage.flags,
+            'get_rounds_flags',
+            return_value=rounds_flags,
+        ) as get_rounds_flags:
+            picks = utils.get_round_get_flags(r, [(self.team, self.task, r)])
+        return picks[(self.team.id, self.task.id)], get_rounds_flags
+
+    def test_current_round_flags_not_preselected(self):
+        picks, get_rounds_flags = self.preselect(r=5, flag_lifetime=1, rounds_flags={})
+
+        self.assertEqual(picks, [(5, None)] * self.task.gets)
+        self.assertEqual(get_rounds_flags.call_args.kwargs['rounds'], [])
+
+    def test_previous_rounds_flags_preselected(self):
+        flags = {(self.team.id, self.task.id, r): [self.get_flag(r)] for r in (3, 4)}
+        picks, get_rounds_flags = self.preselect(
+            r=5,
+            flag_lifetime=3,
+            rounds_flags=flags,
+        )
+
+        self.assertEqual(get_rounds_flags.call_args.kwargs['rounds'], [3, 4])
+        for get_round, flag in picks:
+            self.assertIn(get_round, (3, 4, 5))
+            if get_round == 5:
+                self.assertIsNone(flag)
+            else:
+                self.assertEqual(flag.round, get_round)
+
+    def test_current_round_get_runs_checker(self):
+        flag = self.get_flag(5)
+        with mock.patch.object(
+                actions.storage.flags,
+                'get_random_round_flag',
+                return_value=flag,
+        ) as get_random_round_flag:
+            verdict = actions.get_action(
+                self.check_verdict,
+                self.team,
+                self.task,
+                5,
+                get_round=5,
+                get_flag=None,
+            )
+
+        get_random_round_flag.assert_called_once_with(
+            team_id=self.team.id,
+            task_id=self.task.id,
+            from_round=5,
+            current_round=5,
+        )
+        self.assertEqual(verdict.status, TaskStatus.UP)
+        self.assertEqual(
+            self.get_checker_calls(),
+            [f'get {self.team.ip} flag_id {flag.flag} 1'],
+        )
+
+    def test_previous_round_get_uses_preselected_flag(self):
+        flag = self.get_flag(4)
+        with mock.patch.object(
+                actions.storage.flags,
+                'get_random_round_flag',
+        ) as get_random_round_flag:
+            actions.get_action(
+                self.check_verdict,
+                self.team,
+                self.task,
+                5,
+                get_round=4,
+                get_flag=flag,
+            )
+
+        get_random_round_flag.assert_not_called()
+        self.assertEqual(
+            self.get_checker_calls(),
+            [f'get {self.team.ip} flag_id {flag.flag} 1'],
+        )
+
+    def test_previous_round_without_flags_skipped(self):
+        with mock.patch.object(
+                actions.storage.flags,
+                'get_random_round_flag',
+        ) as get_random_round_flag:
+            verdict = actions.get_action(
+                self.check_verdict,
+                self.team,
+                self.task,
+                5,
+                get_round=4,
+                get_flag=None,
+            )
+
+        get_random_round_flag.assert_not_called()
+        self.assertEqual(verdict.status, TaskStatus.UP)
+        self.assertEqual(self.get_checker_calls(), [])
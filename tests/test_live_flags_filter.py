@@ -0,0 +1,192 @@
+import logging
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib.flags import live_filter
+from lib.flags.live_filter import LiveFlagsFilter
+from lib.helpers.bloom import BloomFilter
+from lib.helpers.exceptions import FlagExceptionEnum
+
+logger = logging.getLogger(__name__)
+
+
+def get_flags(r, count):
+    return [(f'R{r:05}F{i:024}=', r) for i in range(count)]
+
+
+class BloomFilterTestCase(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'item{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertEqual(len(bloom), 1000)
+        for item in items:
+            self.assertIn(item, bloom)
+
+    def test_error_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'item{i}')
+
+        false_positives = sum(f'other{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_empty(self):
+        bloom = BloomFilter(capacity=0, error_rate=0.01)
+
+        self.assertNotIn('item', bloom)
+        self.assertGreater(bloom.nbytes, 0)
+
+    def test_shared_positions(self):
+        first = BloomFilter(capacity=100, error_rate=0.01)
+        second = BloomFilter(capacity=100, error_rate=0.01)
+        first.add('item')
+
+        positions = second.positions('item')
+        self.assertTrue(first.contains_positions(positions))
+        self.assertFalse(second.contains_positions(positions))
+
+
+class LiveFlagsFilterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.filter = LiveFlagsFilter(logger=logger, error_rate=0.001)
+        self.flags = {r: get_flags(r, 10) for r in range(1, 6)}
+
+    def load(self, rounds, flag_lifetime=2):
+        self.filter.load_flags(
+            flags=[flag for r in rounds for flag in self.flags[r]],
+            capacity=10,
+            flag_lifetime=flag_lifetime,
+        )
+
+    def test_not_ready(self):
+        flag_strs = ['unknown', 'other']
+
+        self.assertFalse(self.filter.ready)
+        self.assertEqual(self.filter.contains_many(flag_strs, 5), [True, True])
+        self.assertEqual(
+            self.filter.reject_unknown(1, flag_strs, 5),
+            ([None, None], flag_strs),
+        )
+
+    def test_loaded(self):
+        self.load(rounds=(3, 4, 5))
+
+        self.assertTrue(self.filter.ready)
+        flag_strs = [flag for flag, _ in self.flags[4]]
+        self.assertTrue(all(self.filter.contains_many(flag_strs, 5)))
+        self.assertEqual(self.filter.contains_many(['unknown'], 5), [False])
+
+    def test_lifetime_window(self):
+        self.load(rounds=(3, 4, 5))
+        flag_str, _ = self.flags[5][0]
+        old_flag_str, _ = self.flags[3][0]
+
+        # flags of the future rounds aren't live yet
+        self.assertEqual(self.filter.contains_many([flag_str], 5), [True])
+        self.assertEqual(self.filter.contains_many([flag_str], 4), [False])
+        # and the ones of the rounds older than the lifetime are expired
+        self.assertEqual(self.filter.contains_many([old_flag_str], 6), [False])
+        self.assertEqual(self.filter.contains_many([flag_str], 6), [True])
+
+    def test_no_rounds(self):
+        self.load(rounds=())
+
+        self.assertEqual(self.filter.contains_many(['unknown'], 5), [False])
+
+    def test_expired_rounds_dropped(self):
+        self.load(rounds=(1, 2, 3))
+        nbytes = self.filter.nbytes
+
+        for flag_str, flag_round in self.flags[4] + self.flags[5]:
+            self.filter.add(flag_round, flag_str)
+
+        # rounds 1 & 2 are dropped as rounds 4 & 5 are added
+        self.assertEqual(self.filter.nbytes, nbytes)
+
+    def test_add_published(self):
+        self.load(rounds=(5,))
+
+        self.filter.add_published('5:published:flag=')
+
+        self.assertEqual(self.filter.contains_many(['published:flag='], 5), [True])
+
+    def test_invalidate(self):
+        self.load(rounds=(5,))
+
+        self.filter.invalidate()
+
+        self.assertFalse(self.filter.ready)
+        self.assertEqual(self.filter.contains_many(['unknown'], 5), [True])
+
+    def test_reject_unknown(self):
+        self.load(rounds=(5,))
+        flag_str, _ = self.flags[5][0]
+
+        results, left = self.filter.reject_unknown(7, ['unknown', flag_str], 5)
+
+        self.assertEqual(left, [flag_str])
+        rejected, passed = results
+        self.assertIsNone(passed)
+        self.assertEqual(rejected.attacker_id, 7)
+        self.assertFalse(rejected.submit_ok)
+        self.assertEqual(rejected.message, str(FlagExceptionEnum.FLAG_INVALID))
+
+    def test_reject_not_strings(self):
+        flag_str, _ = self.flags[5][0]
+        flag_strs = [123, {'flag': flag_str}, [flag_str], flag_str]
+
+        for ready in (False, True):
+            if ready:
+                self.load(rounds=(5,))
+
+            results, left = self.filter.reject_unknown(7, flag_strs, 5)
+
+            self.assertEqual(left, [flag_str])
+            *rejected, passed = results
+            self.assertIsNone(passed)
+            for ar in rejected:
+                self.assertFalse(ar.submit_ok)
+                self.assertEqual(ar.message, str(FlagExceptionEnum.FLAG_INVALID))
+
+    def test_reject_unknown_game_not_started(self):
+        self.load(rounds=(5,))
+
+        self.assertEqual(
+            self.filter.reject_unknown(7, ['unknown'], -1),
+            ([None], ['unknown']),
+        )
+
+    def test_load(self):
+        game_config = SimpleNamespace(flag_lifetime=2)
+        teams = [object()] * 3
+        tasks = [SimpleNamespace(puts=2), SimpleNamespace(puts=1)]
+        storage = live_filter.storage
+        with mock.patch.object(
+                storage.game, 'get_current_game_config', return_value=game_config,
+        ), mock.patch.object(
+            storage.game, 'get_real_round', return_value=5,
+        ), mock.patch.object(
+            storage.teams, 'get_teams', return_value=teams,
+        ), mock.patch.object(
+            storage.tasks, 'get_tasks', return_value=tasks,
+        ), mock.patch.object(
+            storage.flags,
+            'iter_live_flags',
+            return_value=iter([self.flags[4], self.flags[5]]),
+        ) as iter_live_flags:
+            self.filter.load()
+
+        iter_live_flags.assert_called_once_with(current_round=5, flag_lifetime=2)
+        self.assertTrue(self.filter.ready)
+        flag_strs = [flag for flag, _ in self.flags[4] + self.flags[5]]
+        self.assertTrue(all(self.filter.contains_many(flag_strs, 5)))
+        self.assertEqual(self.filter.contains_many(['unknown'], 5), [False])
@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib.helpers import cache
+from lib.helpers.cache import LocalCache
+
+
+class LocalCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.now = 1000.0
+        patcher = mock.patch.object(cache.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cache = LocalCache(maxsize=3, ttl=60, negative_ttl=5)
+
+    def test_get_missing(self):
+        self.assertEqual(self.cache.get('flag'), (False, None))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_get_cached(self):
+        self.cache.set('flag', 'value')
+
+        self.assertEqual(self.cache.get('flag'), (True, 'value'))
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 0)
+
+    def test_negative_result(self):
+        self.cache.set('flag', None)
+
+        self.assertEqual(self.cache.get('flag'), (True, None))
+        self.assertEqual(self.cache.negative_hits, 1)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_ttl(self):
+        self.cache.set('flag', 'value')
+
+        self.now += 59
+        self.assertEqual(self.cache.get('flag'), (True, 'value'))
+
+        self.now += 2
+        self.assertEqual(self.cache.get('flag'), (False, None))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_negative_ttl(self):
+        self.cache.set('flag', None)
+
+        self.now += 6
+        self.assertEqual(self.cache.get('flag'), (False, None))
+
+    def test_custom_ttl(self):
+        self.cache.set('flag', 'value', ttl=10)
+
+        self.now += 11
+        self.assertEqual(self.cache.get('flag'), (False, None))
+
+    def test_lru_eviction(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+
+        # "a" is used, so "b" is the least recently used one
+        self.cache.get('a')
+        self.cache.set('d', 'd')
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.get('b'), (False, None))
+        for key in ('a', 'c', 'd'):
+            self.assertEqual(self.cache.get(key), (True, key))
+
+    def test_set_refreshes_entry(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+
+        self.cache.set('a', 'new')
+        self.cache.set('d', 'd')
+
+        self.assertEqual(self.cache.get('a'), (True, 'new'))
+        self.assertEqual(self.cache.get('b'), (False, None))
+
+    def test_clear(self):
+        self.cache.set('flag', 'value')
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.get('flag'), (False, None))
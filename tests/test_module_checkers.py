@@ -0,0 +1,162 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib.helpers.module_checkers import ModuleCheckers
+
+CHECKER = '''import sys
+import time
+
+{version}
+
+
+def check(host):
+    print(VERSION, host)
+    sys.exit(101)
+
+
+def put(host, flag_id, flag, vuln):
+    print(flag_id)
+    return 101
+
+
+def get(host, flag_id, flag, vuln):
+    print('missing flag', file=sys.stderr)
+    sys.exit('Flag is missing')
+
+
+def sleep(seconds):
+    time.sleep(float(seconds))
+    return 101
+
+
+def spin():
+    while True:
+        pass
+
+
+def none():
+    pass
+
+
+def fail():
+    raise RuntimeError('checker failed')
+'''
+
+
+class ModuleCheckersTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.checker = Path(self.tmp_dir.name) / 'checker.py'
+        self.write_checker("VERSION = 'OK'")
+
+        self.checkers = ModuleCheckers()
+
+    def write_checker(self, version, mtime=None):
+        self.checker.write_text(CHECKER.format(version=version))
+        if mtime is not None:
+            os.utime(self.checker, (mtime, mtime))
+
+    def run_action(self, *args, timeout=10, terminate_timeout=3):
+        return self.checkers.run(
+            [str(self.checker), *args],
+            timeout=timeout,
+            terminate_timeout=terminate_timeout,
+        )
+
+    def test_exit_status(self):
+        result, killed = self.run_action('check', '10.0.0.1')
+
+        self.assertFalse(killed)
+        self.assertEqual(result.args, [str(self.checker), 'check', '10.0.0.1'])
+        self.assertEqual(result.returncode, 101)
+        self.assertEqual(result.stdout, b'OK 10.0.0.1\n')
+        self.assertEqual(result.stderr, b'')
+
+    def test_returned_status(self):
+        result, _ = self.run_action('put', '10.0.0.1', 'flag_id', 'flag', '1')
+
+        self.assertEqual(result.returncode, 101)
+        self.assertEqual(result.stdout, b'flag_id\n')
+
+    def test_no_status(self):
+        result, _ = self.run_action('none')
+
+        self.assertEqual(result.returncode, 0)
+
+    def test_exit_message(self):
+        result, _ = self.run_action('get', '10.0.0.1', 'flag_id', 'flag', '1')
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout, b'')
+        self.assertEqual(result.stderr, b'missing flag\nFlag is missing\n')
+
+    def test_exception(self):
+        result, _ = self.run_action('fail')
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'RuntimeError: checker failed', result.stderr)
+
+    def test_outputs_captured_per_thread(self):
+        results = {}
+
+        def run(host):
+            results[host], _ = self.run_action('check', host)
+
+        threads = [
+            threading.Thread(target=run, args=(f'10.0.0.{i}',))
+            for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for host, result in results.items():
+            self.assertEqual(result.stdout, f'OK {host}\n'.encode())
+
+    def test_timeout(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_action('spin', timeout=0.5, terminate_timeout=5)
+        # the exception is raised in the thread, so it doesn't wait for long
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_timeout_abandoned(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_action('sleep', '10', timeout=0.5, terminate_timeout=0.5)
+        # the thread blocked in a system call is left behind
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_module_cached(self):
+        module = self.checkers.load(str(self.checker))
+
+        self.assertIs(self.checkers.load(str(self.checker)), module)
+
+    def test_reload(self):
+        self.run_action('check', 'host')
+
+        self.write_checker("VERSION = 'NEW'", mtime=time.time() + 10)
+        result, _ = self.run_action('check', 'host')
+
+        self.assertEqual(result.stdout, b'NEW host\n')
+
+    def test_load_error(self):
+        self.write_checker('VERSION = ')
+
+        result, killed = self.run_action('check', 'host')
+
+        self.assertFalse(killed)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'SyntaxError', result.stderr)
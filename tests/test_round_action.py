@@ -0,0 +1,274 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib import models
+from lib.models import Action, TaskStatus
+from services.tasks import actions, handlers
+
+# exits with the status written to the file named after the action, if any
+CHECKER = '''#!/bin/sh
+echo "$@" >> "{calls}"
+status=101
+if [ -f "{statuses}/$1" ]; then
+    status=$(cat "{statuses}/$1")
+fi
+echo "$1 message"
+exit "$status"
+'''
+
+
+def get_verdict(action, status=TaskStatus.UP):
+    return models.CheckerVerdict(
+        action=action,
+        status=status,
+        public_message=f'{action} message',
+        private_message='',
+        command='',
+    )
+
+
+class ExceptionVerdictTestCase(TestCase):
+    def test_no_previous_verdict(self):
+        exc = RuntimeError('error')
+
+        verdict = handlers.get_exception_verdict(Action.CHECK, None, exc, 'traceback')
+
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+        self.assertEqual(verdict.public_message, 'CHECK failed')
+        self.assertIn(repr(exc), verdict.private_message)
+        self.assertIn('traceback', verdict.private_message)
+
+    def test_previous_verdict_up(self):
+        prev_verdict = get_verdict(Action.CHECK)
+
+        verdict = handlers.get_exception_verdict(
+            Action.PUT,
+            prev_verdict,
+            RuntimeError('error'),
+            'traceback',
+        )
+
+        self.assertEqual(verdict.action, Action.PUT)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+
+    def test_previous_verdict_failed(self):
+        prev_verdict = get_verdict(Action.CHECK, TaskStatus.MUMBLE)
+
+        verdict = handlers.get_exception_verdict(
+            Action.GET,
+            prev_verdict,
+            RuntimeError('error'),
+            'traceback',
+        )
+
+        self.assertIs(verdict, prev_verdict)
+
+
+class SaveResultVerdictTestCase(TestCase):
+    def setUp(self) -> None:
+        self.team = models.Team(id=1, name='team', ip='10.0.0.1', token='token')
+        self.task = SimpleNamespace(id=2)
+
+        patcher = mock.patch.object(handlers.storage.tasks, 'update_task_status')
+        self.update_task_status = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, verdicts):
+        verdict = handlers.save_result_verdict(verdicts, self.team, self.task, 5)
+        self.update_task_status.assert_called_once_with(
+            task_id=2,
+            team_id=1,
+            current_round=5,
+            checker_verdict=verdict,
+        )
+        return verdict
+
+    def test_all_up(self):
+        verdicts = [
+            get_verdict(Action.CHECK),
+            get_verdict(Action.PUT),
+            get_verdict(Action.GET),
+        ]
+
+        self.assertIs(self.save(verdicts), verdicts[0])
+
+    def test_first_failed(self):
+        verdicts = [
+            get_verdict(Action.CHECK),
+            get_verdict(Action.PUT, TaskStatus.MUMBLE),
+            get_verdict(Action.GET, TaskStatus.CORRUPT),
+        ]
+
+        self.assertIs(self.save(verdicts), verdicts[1])
+
+    def test_no_verdicts(self):
+        verdict = self.save([])
+
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+
+
+class RoundActionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        tmp_path = Path(self.tmp_dir.name)
+        self.calls = tmp_path / 'calls'
+        self.statuses = tmp_path / 'statuses'
+        self.statuses.mkdir()
+        checker = tmp_path / 'checker.sh'
+        checker.write_text(CHECKER.format(calls=self.calls, statuses=self.statuses))
+        checker.chmod(0o755)
+
+        self.team = models.Team(id=1, name='team', ip='10.0.0.1', token='token')
+        self.task = models.Task(
+            id=2,
+            name='task',
+            checker=str(checker),
+            gets=2,
+            puts=2,
+            places=1,
+            checker_timeout=5,
+            checker_type='hackerdom',
+            env_path=os.path.dirname(sys.executable),
+            default_score=1000,
+            get_period=30,
+            active=True,
+        )
+
+        self.flag = models.Flag.generate(
+            service='T',
+            team_id=self.team.id,
+            task_id=self.task.id,
+            current_round=4,
+        )
+        self.flag.id = 1
+        self.flag.private_flag_data = 'flag_id'
+        self.flag.vuln_number = 1
+
+        game_config = SimpleNamespace(
+            signed_flags=False,
+            flag_signing_key='',
+            flag_lifetime=3,
+        )
+        patchers = [
+            mock.patch.object(
+                actions.storage.game,
+                'get_current_game_config',
+                return_value=game_config,
+            ),
+            mock.patch.object(actions.storage.flags, 'add_flag'),
+            mock.patch.object(
+                actions.storage.flags,
+                'get_random_round_flag',
+                return_value=self.flag,
+            ),
+            mock.patch.object(actions.storage.tasks, 'update_task_status'),
+        ]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        (
+            _,
+            self.add_flag,
+            self.get_random_round_flag,
+            self.update_task_status,
+        ) = [patcher.start() for patcher in patchers]
+
+    def set_status(self, action, status):
+        (self.statuses / action).write_text(str(status.value))
+
+    def get_calls(self):
+        if not self.calls.exists():
+            return []
+        return [line.split()[0] for line in self.calls.read_text().splitlines()]
+
+    def run_round(self, get_flags=None):
+        actions.round_action(self.team, self.task, 5, get_flags=get_flags)
+        self.update_task_status.assert_called_once()
+        kwargs = self.update_task_status.call_args.kwargs
+        self.assertEqual(kwargs['team_id'], self.team.id)
+        self.assertEqual(kwargs['task_id'], self.task.id)
+        self.assertEqual(kwargs['current_round'], 5)
+        return kwargs['checker_verdict']
+
+    def test_actions_order(self):
+        verdict = self.run_round()
+
+        self.assertEqual(self.get_calls(), ['check', 'put', 'put', 'get', 'get'])
+        self.assertEqual(self.add_flag.call_count, 2)
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.UP)
+
+    def test_preselected_flags(self):
+        self.run_round(get_flags=[(4, self.flag), (4, None)])
+
+        # the round without flags is skipped
+        self.assertEqual(self.get_calls(), ['check', 'put', 'put', 'get'])
+        self.get_random_round_flag.assert_not_called()
+
+    def test_failed_put(self):
+        self.set_status('put', TaskStatus.MUMBLE)
+
+        verdict = self.run_round()
+
+        self.assertEqual(self.get_calls(), ['check', 'put', 'put', 'get', 'get'])
+        self.add_flag.assert_not_called()
+        self.assertEqual(verdict.action, Action.PUT)
+        self.assertEqual(verdict.status, TaskStatus.MUMBLE)
+
+    def test_failed_check_skips_gets(self):
+        self.set_status('check', TaskStatus.DOWN)
+
+        verdict = self.run_round()
+
+        self.assertNotIn('get', self.get_calls())
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.DOWN)
+
+    def test_failed_get_skips_next_gets(self):
+        self.set_status('get', TaskStatus.CORRUPT)
+
+        verdict = self.run_round()
+
+        self.assertEqual(self.get_calls(), ['check', 'put', 'put', 'get'])
+        self.assertEqual(verdict.action, Action.GET)
+        self.assertEqual(verdict.status, TaskStatus.CORRUPT)
+
+    def test_exception_on_put(self):
+        self.add_flag.side_effect = RuntimeError('storage failed')
+
+        verdict = self.run_round()
+
+        self.assertEqual(self.get_calls(), ['check', 'put'])
+        self.assertEqual(verdict.action, Action.PUT)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
+        self.assertIn('storage failed', verdict.private_message)
+
+    def test_exception_after_failed_get(self):
+        with mock.patch.object(
+                actions,
+                'get_action',
+                side_effect=[get_verdict(Action.GET, TaskStatus.CORRUPT), RuntimeError],
+        ):
+            verdict = self.run_round()
+
+        # failed action's verdict is preferred to the exception one
+        self.assertEqual(verdict.action, Action.GET)
+        self.assertEqual(verdict.status, TaskStatus.CORRUPT)
+
+    def test_exception_on_check(self):
+        with mock.patch.object(actions, 'check_action', side_effect=RuntimeError):
+            verdict = self.run_round()
+
+        self.assertEqual(self.get_calls(), [])
+        self.assertEqual(verdict.action, Action.CHECK)
+        self.assertEqual(verdict.status, TaskStatus.CHECK_FAILED)
@@ -0,0 +1,110 @@
+import sys
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+TESTS_DIR = PROJECT_DIR / 'tests'
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(TESTS_DIR))
+
+from helpers import get_redis
+from lib.storage import attacks, scripts
+from lib.storage.keys import CacheKeys
+
+
+class SubmitBucketsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis = get_redis()
+        # ids of no real team, so the game's buckets are left alone
+        self.team_id = 10 ** 9 + uuid.uuid4().int % 10 ** 6
+        self.addCleanup(self.redis.delete, CacheKeys.team_submit_bucket(self.team_id))
+
+        self.game_config = SimpleNamespace(flag_rate_limit=10, flag_rate_burst=5)
+        patchers = [
+            mock.patch.object(
+                attacks.game,
+                'get_current_game_config',
+                return_value=self.game_config,
+            ),
+            mock.patch.object(
+                attacks.utils.RedisStorage,
+                'get',
+                return_value=self.redis,
+            ),
+            mock.patch.object(
+                scripts.TakeSubmitTokensScript,
+                'get',
+                return_value=self.redis.register_script(
+                    scripts.TAKE_SUBMIT_TOKENS_SCRIPT,
+                ),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def take(self, count):
+        return attacks.take_submit_tokens(self.team_id, count)
+
+    def get_tokens(self):
+        return attacks.get_submit_buckets([self.team_id])[self.team_id]
+
+    def test_no_limit(self):
+        self.game_config.flag_rate_limit = 0
+
+        self.assertEqual(self.take(100), (100, 0.0))
+        self.assertFalse(self.redis.exists(CacheKeys.team_submit_bucket(self.team_id)))
+
+    def test_full_bucket(self):
+        self.assertEqual(self.get_tokens(), 5)
+        self.assertEqual(self.take(3), (3, 0.0))
+        self.assertAlmostEqual(self.get_tokens(), 2, delta=0.5)
+
+    def test_burst_exceeded(self):
+        taken, retry_after = self.take(7)
+
+        self.assertEqual(taken, 5)
+        # 2 more tokens at 10 per second
+        self.assertAlmostEqual(retry_after, 0.2, delta=0.05)
+
+    def test_retry_after_capped_by_burst(self):
+        taken, retry_after = self.take(100)
+
+        self.assertEqual(taken, 5)
+        # the rest never fits, so waiting for the whole bucket
+        self.assertAlmostEqual(retry_after, 0.5, delta=0.05)
+
+    def test_empty_bucket(self):
+        self.take(5)
+        taken, retry_after = self.take(1)
+
+        self.assertEqual(taken, 0)
+        self.assertAlmostEqual(retry_after, 0.1, delta=0.05)
+
+    def test_refill(self):
+        self.take(5)
+        self.assertLess(self.get_tokens(), 1)
+
+        time.sleep(0.3)
+        self.assertAlmostEqual(self.get_tokens(), 3, delta=1)
+        taken, _ = self.take(5)
+        self.assertGreaterEqual(taken, 2)
+        self.assertLess(taken, 5)
+
+    def test_refill_capped_by_burst(self):
+        self.take(5)
+
+        time.sleep(0.7)
+        self.assertEqual(self.get_tokens(), 5)
+        self.assertEqual(self.take(10)[0], 5)
+
+    def test_bucket_expires(self):
+        self.take(1)
+
+        ttl = self.redis.ttl(CacheKeys.team_submit_bucket(self.team_id))
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, 2)
@@ -0,0 +1,136 @@
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+
+# receiver monkey-patches the process with eventlet, so it's run in a child
+# with the storage calls replaced: team "n" < 100 is rate limited after "n" flags
+RECEIVER = f'''
+import sys
+sys.path.insert(0, {str(BACKEND_DIR)!r})
+sys.path.insert(0, {str(BACKEND_DIR / 'services')!r})
+
+from tcp_receiver import __main__ as receiver
+
+import eventlet
+from eventlet import corolocal
+from lib import models, storage
+
+local = corolocal.local()
+budgets = {{}}
+
+
+def get_team_id_by_token(token):
+    local.token = token
+    return int(token) if token.isdigit() else None
+
+
+def get_real_round():
+    return -1 if local.token == '404' else 5
+
+
+def take_submit_tokens(team_id, count):
+    if team_id >= 100:
+        return count, 0.0
+    allowed = min(count, budgets.get(team_id, team_id))
+    budgets[team_id] = budgets.get(team_id, team_id) - allowed
+    return allowed, 1.5
+
+
+def process_many(team_id, flags):
+    return [
+        models.AttackResult(attacker_id=team_id, message=f'team {{team_id}} {{flag}}')
+        for flag in flags
+    ]
+
+
+storage.teams.get_team_id_by_token = get_team_id_by_token
+storage.game.get_real_round = get_real_round
+storage.attacks.take_submit_tokens = take_submit_tokens
+receiver.judge.process_many = process_many
+
+server = eventlet.listen(('127.0.0.1', 0))
+print(server.getsockname()[1], flush=True)
+while True:
+    sock, address = server.accept()
+    eventlet.spawn_n(receiver.handle_connection, sock, address)
+'''
+
+
+class TCPReceiverTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.receiver = subprocess.Popen(
+            [sys.executable, '-c', RECEIVER],
+            stdout=subprocess.PIPE,
+            env={**os.environ, 'FLAGS_FILTER_ERROR_RATE': '0'},
+        )
+        cls.port = int(cls.receiver.stdout.readline())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.receiver.kill()
+        cls.receiver.wait()
+        cls.receiver.stdout.close()
+
+    def connect(self, token):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=10)
+        self.addCleanup(sock.close)
+        rfile = sock.makefile('r')
+        self.addCleanup(rfile.close)
+
+        self.assertEqual(rfile.readline(), 'Welcome! Please, enter your team token:\n')
+        sock.sendall(f'{token}\n'.encode())
+        return sock, rfile
+
+    def submit(self, token, flags):
+        sock, rfile = self.connect(token)
+        self.assertEqual(rfile.readline(), 'Enter your flags, one per line.\n')
+
+        sock.sendall(''.join(f'{flag}\n' for flag in flags).encode())
+        sock.shutdown(socket.SHUT_WR)
+        return rfile.read().splitlines()
+
+    def test_invalid_token(self):
+        _, rfile = self.connect('invalid')
+
+        self.assertEqual(rfile.read(), 'Invalid team token.\n')
+
+    def test_game_not_started(self):
+        _, rfile = self.connect('404')
+
+        self.assertEqual(rfile.read(), 'Game not started.\n')
+
+    def test_responses_order(self):
+        # more than a batch is pending at once
+        flags = [f'FLAG{i}=' for i in range(250)]
+
+        lines = self.submit('1000', flags)
+
+        self.assertEqual(lines, [f'[{flag}] team 1000 {flag}' for flag in flags])
+
+    def test_empty_lines_skipped(self):
+        lines = self.submit('1000', ['', 'FLAG1=', '  ', 'FLAG2='])
+
+        self.assertEqual(lines, [
+            '[FLAG1=] team 1000 FLAG1=',
+            '[FLAG2=] team 1000 FLAG2=',
+        ])
+
+    def test_rate_limited(self):
+        flags = [f'FLAG{i}=' for i in range(5)]
+
+        lines = self.submit('3', flags)
+
+        self.assertEqual(lines[:3], [f'[{flag}] team 3 {flag}' for flag in flags[:3]])
+        for flag, line in zip(flags[3:], lines[3:]):
+            self.assertRegex(line, rf'^\[{flag}\] .*retry in 1\.5s\.$')
+        self.assertEqual(len(lines), 5)
+
+    def test_no_flags(self):
+        self.assertEqual(self.submit('1000', []), [])
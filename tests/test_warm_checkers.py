@@ -0,0 +1,196 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+PROJECT_DIR = Path(__file__).absolute().resolve().parents[1]
+BACKEND_DIR = PROJECT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from lib.helpers.checker_pool import CheckerPool, WarmChecker
+
+CHECKER = '''#!/usr/bin/env python3
+import signal
+import sys
+import time
+
+{version}
+
+
+def main():
+    action, *args = sys.argv[1:]
+    if action == 'check':
+        print(VERSION)
+        sys.exit(101)
+    if action == 'sleep':
+        if args[1] == 'ignore':
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        time.sleep(float(args[0]))
+        sys.exit(101)
+    if action == 'message':
+        sys.exit('message')
+    raise RuntimeError('unknown action')
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+
+class WarmCheckerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.checker = Path(self.tmp_dir.name) / 'checker.py'
+        self.write_checker("VERSION = 'OK'")
+        self.env_path = os.path.dirname(sys.executable)
+
+        self.server = WarmChecker(str(self.checker), self.env_path)
+        self.addCleanup(self.server.close)
+
+    def write_checker(self, version, mtime=None):
+        self.checker.write_text(CHECKER.format(version=version))
+        if mtime is not None:
+            os.utime(self.checker, (mtime, mtime))
+
+    def test_run(self):
+        result, killed = self.server.run(['check'], timeout=10)
+
+        self.assertFalse(killed)
+        self.assertEqual(result.args, [str(self.checker), 'check'])
+        self.assertEqual(result.returncode, 101)
+        self.assertEqual(result.stdout, b'OK\n')
+        self.assertEqual(result.stderr, b'')
+
+    def test_server_reused(self):
+        for _ in range(3):
+            result, _ = self.server.run(['check'], timeout=10)
+            self.assertEqual(result.returncode, 101)
+        self.assertTrue(self.server.alive)
+
+    def test_exception(self):
+        result, _ = self.server.run(['unknown'], timeout=10)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'RuntimeError: unknown action', result.stderr)
+
+    def test_exit_message(self):
+        result, _ = self.server.run(['message'], timeout=10)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stderr, b'message\n')
+
+    def test_timeout(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.server.run(['sleep', '10', 'term'], timeout=0.5)
+        self.assertLess(time.monotonic() - start, 3)
+
+        # the server is still usable after the action is terminated
+        result, _ = self.server.run(['check'], timeout=10)
+        self.assertEqual(result.returncode, 101)
+
+    def test_timeout_killed(self):
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.server.run(
+                ['sleep', '10', 'ignore'],
+                timeout=0.5,
+                terminate_timeout=0.5,
+            )
+        self.assertLess(time.monotonic() - start, 3)
+
+        result, _ = self.server.run(['check'], timeout=10)
+        self.assertEqual(result.returncode, 101)
+
+    def test_reload(self):
+        self.server.run(['check'], timeout=10)
+
+        self.write_checker("VERSION = 'NEW'", mtime=time.time() + 10)
+        result, _ = self.server.run(['check'], timeout=10)
+
+        self.assertEqual(result.stdout, b'NEW\n')
+
+    def test_load_error(self):
+        self.write_checker('VERSION = ', mtime=time.time() + 10)
+
+        result, _ = self.server.run(['check'], timeout=10)
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'SyntaxError', result.stderr)
+        self.assertTrue(self.server.alive)
+
+
+class CheckerPoolTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.checker = Path(self.tmp_dir.name) / 'checker.py'
+        self.checker.write_text(CHECKER.format(version="VERSION = 'OK'"))
+        self.env_path = os.path.dirname(sys.executable)
+
+        self.pool = CheckerPool()
+        self.addCleanup(self.close_pool)
+
+    def close_pool(self):
+        for server in self.get_servers():
+            server.close()
+
+    def get_servers(self):
+        return self.pool._idle[(str(self.checker), self.env_path)]
+
+    def run_action(self, *args, timeout=10):
+        return self.pool.run([str(self.checker), *args], timeout, self.env_path)
+
+    def test_warm_up(self):
+        self.pool.warm_up(str(self.checker), self.env_path)
+        self.pool.warm_up(str(self.checker), self.env_path)
+
+        self.assertEqual(len(self.get_servers()), 1)
+
+    def test_server_reused(self):
+        self.run_action('check')
+        server, = self.get_servers()
+
+        result, killed = self.run_action('check')
+
+        self.assertEqual(result.returncode, 101)
+        self.assertFalse(killed)
+        self.assertEqual(self.get_servers(), [server])
+
+    def test_concurrent_actions(self):
+        results = []
+
+        def run():
+            results.append(self.run_action('sleep', '0.5', 'term'))
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([result.returncode for result, _ in results], [101, 101])
+        self.assertEqual(len(self.get_servers()), 2)
+
+    def test_dead_server_replaced(self):
+        self.run_action('check')
+        server, = self.get_servers()
+        server._proc.kill()
+        server._proc.wait()
+
+        result, _ = self.run_action('check')
+
+        self.assertEqual(result.returncode, 101)
+        new_server, = self.get_servers()
+        self.assertIsNot(new_server, server)
+
+    def test_timeout_keeps_server(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_action('sleep', '10', 'term', timeout=0.5)
+
+        self.assertEqual(len(self.get_servers()), 1)